@@ -7,18 +7,28 @@ import traceback
 from typing import Any, Dict
 
 from homeassistant.config_entries import ConfigEntry, ConfigEntryNotReady
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import Event, HomeAssistant
 from homeassistant.helpers.typing import ConfigType
 
 from .api import BluestarAPI
 from .const import (
     CONF_BASE_URL,
+    CONF_MQTT_PUSH,
     CONF_PASSWORD,
     CONF_PHONE,
+    CONF_RUNTIME_STATISTICS,
+    CONF_TRACE_EXPORT,
+    DATA_HUB,
     DOMAIN,
 )
 from .coordinator import BluestarDataUpdateCoordinator
+from .hub import BluestarHub
+from .outbox import BluestarOutbox
+from .runtime import BluestarRuntimeTracker
+from .sequences import BluestarCommandSequences
+from .services import async_setup_services
+from .tracing import TRACER, create_exporter
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,6 +44,7 @@ PLATFORMS: list[Platform] = [
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the Bluestar Smart AC component."""
     _LOGGER.debug("B1 async_setup() called")
+    async_setup_services(hass)
     return True
 
 
@@ -41,30 +52,72 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Bluestar Smart AC from a config entry."""
     _LOGGER.debug("B2 async_setup_entry() start for entry_id=%s title=%s", entry.entry_id, entry.title)
     hass.data.setdefault(DOMAIN, {})
+    if DATA_HUB not in hass.data[DOMAIN]:
+        hass.data[DOMAIN][DATA_HUB] = BluestarHub(hass)
+    hub: BluestarHub = hass.data[DOMAIN][DATA_HUB]
+
+    if entry.options.get(CONF_TRACE_EXPORT):
+        try:
+            exporter = create_exporter(entry.options[CONF_TRACE_EXPORT], hass.config.path)
+        except ValueError as e:
+            _LOGGER.error("❌ Not exporting trace spans: %s", e)
+        else:
+            await TRACER.async_configure(exporter, entry.entry_id)
 
     try:
-        _LOGGER.debug("B3 creating API client")
-        # Create API client
-        api = BluestarAPI(
+        _LOGGER.debug("B3 acquiring shared API client")
+        # Get (or create and log in) the API client for this account
+        api = await hub.async_acquire_api(
+            entry.entry_id,
             phone=entry.data[CONF_PHONE],
             password=entry.data[CONF_PASSWORD],
             base_url=entry.data.get(CONF_BASE_URL),
+            api_factory=BluestarAPI,
         )
 
-        _LOGGER.debug("B4 logging in to API")
-        # Login to API
-        await api.login()
-
         _LOGGER.debug("B5 creating coordinator")
-        # Create coordinator
-        coordinator = BluestarDataUpdateCoordinator(hass, api)
+        # Create coordinator; the hub drives its polling
+        outbox = BluestarOutbox(hass, entry.entry_id)
+        await outbox.async_load()
+        runtime = BluestarRuntimeTracker(
+            hass, entry.entry_id, statistics=entry.options.get(CONF_RUNTIME_STATISTICS, False)
+        )
+        await runtime.async_load()
+        sequences = BluestarCommandSequences(hass, entry.entry_id)
+        await sequences.async_load()
+        coordinator = BluestarDataUpdateCoordinator(
+            hass,
+            api,
+            scan_interval=None,
+            outbox=outbox,
+            runtime=runtime,
+            limiter=hub.limiter,
+            sequences=sequences,
+        )
         
         _LOGGER.debug("B6 first refresh start")
         # Fetch initial data
-        await coordinator.async_config_entry_first_refresh()
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            await runtime.async_shutdown()
+            await hub.async_release_api(entry.entry_id)
+            raise
         _LOGGER.debug("B7 first refresh OK")
 
         hass.data[DOMAIN][entry.entry_id] = coordinator
+        hub.async_add_coordinator(coordinator)
+        if entry.options.get(CONF_MQTT_PUSH, False):
+            coordinator.async_enable_push()
+        entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+        async def _async_stop(event: Event) -> None:
+            """Close this entry's connections when Home Assistant stops."""
+            await coordinator.async_shutdown()
+            await hub.async_release_api(entry.entry_id)
+            await TRACER.async_release(entry.entry_id)
+
+        entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop))
         _LOGGER.debug("B8 stored hass.data for entry")
 
         _LOGGER.debug("B9 forward_entry_setups -> %s", PLATFORMS)
@@ -76,9 +129,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         return True
 
     except asyncio.TimeoutError as e:
+        await TRACER.async_release(entry.entry_id)
         _LOGGER.exception("TMO: Timeout during setup at breadcrumb above. %s", e)
         raise ConfigEntryNotReady from e
     except Exception as e:
+        await TRACER.async_release(entry.entry_id)
         _LOGGER.error(
             "FATAL in async_setup_entry at breadcrumb above: %s\n%s",
             e, traceback.format_exc()
@@ -92,15 +147,24 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        hub: BluestarHub = hass.data[DOMAIN][DATA_HUB]
+        hub.async_remove_coordinator(coordinator)
+        await coordinator.async_shutdown()
+        # Closes the MQTT thread and HTTP session once no entry uses the account
+        await hub.async_release_api(entry.entry_id)
+        await TRACER.async_release(entry.entry_id)
+        if hub.is_idle:
+            await hub.async_shutdown()
+            hass.data[DOMAIN].pop(DATA_HUB)
 
     return unload_ok
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    # Through the config entry manager, so its async_on_unload hooks run too
+    await hass.config_entries.async_reload(entry.entry_id)
 
 
 
@@ -1,33 +1,72 @@
 """Bluestar Smart AC API client with MQTT support."""
 import asyncio
 import base64
+import hashlib
+import heapq
+import importlib
+import itertools
 import json
 import logging
-from typing import Any, Dict, List, Optional
+import time
+from contextlib import asynccontextmanager
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import aiohttp
 
-# Try to import MQTT, but make it optional
-try:
-    import paho.mqtt.client as mqtt_client
-    import ssl
-    MQTT_AVAILABLE = True
-except ImportError:
-    MQTT_AVAILABLE = False
-    _LOGGER = logging.getLogger(__name__)
-    _LOGGER.warning("paho-mqtt not available, MQTT functionality disabled")
-
 from .const import (
     DEFAULT_BASE_URL,
+    DEVICE_STATE_FIELDS,
+    DEVICE_STATE_META_FIELDS,
     LOGIN_ENDPOINT,
     DEVICES_ENDPOINT,
     CONTROL_ENDPOINT,
     PREFERENCES_ENDPOINT,
+    PRIORITY_BACKGROUND,
+    PRIORITY_USER,
     STATE_ENDPOINT,
 )
+from .endpoints import BluestarEndpointPool
+from .jsonstream import ThingsStreamParser
+from .latency import AdaptiveTimeouts
+from .tracing import TRACER, set_span_attributes
+from .traffic import BluestarReplayTransport, RecordedResponse, TrafficRecorder
+
+if TYPE_CHECKING:
+    from .mqtt import BluestarMQTTClient
 
 _LOGGER = logging.getLogger(__name__)
 
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# Request budgets, shared by every account through the hub: (burst capacity, tokens per second)
+RATE_LIMITS = {
+    "login": (3, 1 / 30),
+    "read": (10, 2.0),
+    "write": (10, 2.0),
+}
+
+# The MQTT transport (paho-mqtt + ssl) is only imported once a login returns
+# MQTT credentials
+_MQTT_MODULE: Optional[ModuleType] = None
+_MQTT_UNAVAILABLE = False
+
+
+async def _async_load_mqtt_module() -> Optional[ModuleType]:
+    """Import the MQTT transport on first use, or return None if paho is missing."""
+    global _MQTT_MODULE, _MQTT_UNAVAILABLE
+    if _MQTT_MODULE is None and not _MQTT_UNAVAILABLE:
+        # Import off the event loop; paho and ssl do file I/O when loaded
+        loop = asyncio.get_running_loop()
+        try:
+            _MQTT_MODULE = await loop.run_in_executor(
+                None, importlib.import_module, f"{__package__}.mqtt"
+            )
+        except ImportError as error:
+            _MQTT_UNAVAILABLE = True
+            _LOGGER.warning(f"paho-mqtt not available, MQTT functionality disabled: {error}")
+    return _MQTT_MODULE
+
 
 class BluestarAPIError(Exception):
     """Exception raised for Bluestar API errors."""
@@ -37,6 +76,233 @@ class BluestarAPIError(Exception):
         self.status_code = status_code
 
 
+class TokenBucket:
+    """Token bucket whose waiters are served lowest priority value first.
+
+    A user command queued behind background polls takes the next token as
+    soon as it is waiting, so polls can be delayed but commands are never
+    starved by them.
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: int = PRIORITY_USER) -> float:
+        """Take one token, waiting if none is left; return the seconds waited."""
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The token was handed to us just before we were cancelled
+                self.tokens += 1
+            raise
+
+        waited = time.monotonic() - start
+        self.waits += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def _schedule(self) -> None:
+        """Wake the waiters when the next token is due."""
+        if self._timer is not None or not self._waiters:
+            return
+        delay = max(0.0, (1 - self.tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _wake(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._waiters and self.tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+        # Drop waiters that gave up so an idle bucket does not keep a timer
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        self._schedule()
+
+    def close(self) -> None:
+        """Cancel the wake-up timer and every waiter; the bucket can be reused afterwards."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        waiters, self._waiters = self._waiters, []
+        for _, _, future in waiters:
+            future.cancel()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return token level and wait statistics for diagnostics."""
+        self._refill()
+        return {
+            "tokens": round(self.tokens, 2),
+            "capacity": self.capacity,
+            "rate": self.rate,
+            "waiting": sum(1 for _, _, future in self._waiters if not future.done()),
+            "waits": self.waits,
+            "average_wait": self.total_wait / self.waits if self.waits else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+
+class BluestarRateLimiter:
+    """Separate login, read and write budgets for requests to the Bluestar cloud."""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.buckets = {
+            name: TokenBucket(capacity, rate)
+            for name, (capacity, rate) in (limits or RATE_LIMITS).items()
+        }
+
+    async def acquire(self, budget: str, priority: int = PRIORITY_USER) -> float:
+        """Take a token from a budget; return the seconds waited."""
+        waited = await self.buckets[budget].acquire(priority)
+        if waited > 1:
+            _LOGGER.debug("R1 waited %.1fs for a %s token", waited, budget)
+        return waited
+
+    def close(self) -> None:
+        """Drop pending timers and waiters, e.g. when the hub shuts down."""
+        for bucket in self.buckets.values():
+            bucket.close()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return every budget's state for diagnostics."""
+        return {name: bucket.as_dict() for name, bucket in self.buckets.items()}
+
+
+class BluestarDevicesCache:
+    """Cache of the last ``/things`` response.
+
+    Device metadata (``things``) and volatile state (``states``) are kept
+    apart: each gets a version number that only moves when its content
+    changes, so consumers can skip rebuilding metadata that is unchanged.
+
+    Bodies are parsed incrementally, one thing or state at a time. Each
+    member is hashed before decoding and unchanged members are reused as-is,
+    and only the fields the entities use are kept.
+    """
+
+    def __init__(self):
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.things: List[Dict[str, Any]] = []
+        self.states: Dict[str, Any] = {}
+        self.metadata_version = 0
+        self.state_version = 0
+        self._thing_digests: List[bytes] = []
+        self._state_digests: Dict[str, bytes] = {}
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Return the cached response in the shape of the ``/things`` body."""
+        return {"things": self.things, "states": self.states}
+
+    def seed(self, data: Dict[str, Any]) -> None:
+        """Adopt a ``/things`` snapshot fetched by another client."""
+        self.things = data.get("things", [])
+        self.states = data.get("states", {})
+        self.metadata_version += 1
+        self.state_version += 1
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Return validators for a conditional request, if the server sent any."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def _project_thing(self, thing: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep only the metadata the entities use."""
+        projected = {"thing_id": thing.get("thing_id")}
+        name = thing.get("user_config", {}).get("name")
+        if name is not None:
+            projected["user_config"] = {"name": name}
+        return projected
+
+    def _project_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep only the state fields the entities use."""
+        projected = {key: state[key] for key in DEVICE_STATE_META_FIELDS if key in state}
+        device_state = state.get("state", {})
+        projected["state"] = {
+            key: device_state[key] for key in DEVICE_STATE_FIELDS if key in device_state
+        }
+        return projected
+
+    async def async_store(self, response: aiohttp.ClientResponse) -> Dict[str, Any]:
+        """Update the cache from a 200 response, streaming its body.
+
+        The validators are only adopted once the whole body parsed: after a
+        truncated or failed read the next poll must not get a 304 for it.
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        parser = ThingsStreamParser()
+        previous_things = dict(zip(self._thing_digests, self.things))
+        things: List[Dict[str, Any]] = []
+        thing_digests: List[bytes] = []
+        states: Dict[str, Any] = {}
+        state_digests: Dict[str, bytes] = {}
+
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            for section, key, raw in parser.feed(chunk):
+                digest = hashlib.blake2b(raw.encode(), digest_size=16).digest()
+                if section == "things":
+                    thing = previous_things.get(digest)
+                    if thing is None:
+                        thing = self._project_thing(json.loads(raw))
+                    things.append(thing)
+                    thing_digests.append(digest)
+                elif self._state_digests.get(key) == digest:
+                    states[key] = self.states[key]
+                    state_digests[key] = digest
+                else:
+                    states[key] = self._project_state(json.loads(raw))
+                    state_digests[key] = digest
+        parser.close()
+
+        self.etag = etag
+        self.last_modified = last_modified
+        if thing_digests != self._thing_digests:
+            self.things = things
+            self._thing_digests = thing_digests
+            self.metadata_version += 1
+        if state_digests != self._state_digests:
+            self.states = states
+            self._state_digests = state_digests
+            self.state_version += 1
+            _LOGGER.debug(f"Bluestar states changed: {states}")
+        return self.data
+
+
 class BluestarCredentialExtractor:
     """Extract and manage MQTT credentials from login response."""
     
@@ -93,174 +359,6 @@ class BluestarCredentialExtractor:
                 self.credentials.get("session_id"))
 
 
-class BluestarMQTTClient:
-    """MQTT client for Bluestar Smart AC control."""
-    
-    def __init__(self, credentials: Dict[str, str]):
-        if not MQTT_AVAILABLE:
-            raise ImportError("MQTT functionality not available - paho-mqtt not installed")
-            
-        self.credentials = credentials
-        self.client = None
-        self.is_connected = False
-        self.client_id = f"u-{credentials['session_id']}"
-        
-        # EXACT CONSTANTS FROM DECOMPILED APP
-        self.FORCE_FETCH_KEY_NAME = "fpsh"
-        self.PUB_CONTROL_TOPIC_NAME = "things/%s/control"
-        self.PUB_STATE_UPDATE_TOPIC_NAME = "$aws/things/%s/shadow/update"
-        self.SRC_KEY = "src"
-        self.SRC_VALUE = "anmq"
-        
-        _LOGGER.info("🔧 Bluestar MQTT Client created")
-    
-    async def connect(self) -> bool:
-        """Connect to MQTT broker."""
-        try:
-            self.client = mqtt_client.Client(client_id=self.client_id, callback_api_version=mqtt_client.CallbackAPIVersion.VERSION1)
-            
-            # Configure SSL/TLS - use thread-safe approach
-            import asyncio
-            loop = asyncio.get_event_loop()
-            context = await loop.run_in_executor(None, ssl.create_default_context)
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-            
-            self.client.tls_set_context(context)
-            
-            # Set up event handlers
-            self.client.on_connect = self._on_connect
-            self.client.on_disconnect = self._on_disconnect
-            self.client.on_error = self._on_error
-            
-            # Connect to broker
-            endpoint = self.credentials["endpoint"]
-            _LOGGER.info(f"🔌 Connecting to MQTT broker: {endpoint}")
-            
-            self.client.connect(endpoint, 443, 10)  # Reduced keepalive to 10 seconds
-            self.client.loop_start()
-            
-            # Wait for connection with shorter timeout
-            timeout = 10  # Reduced from 30 to 10 seconds
-            while not self.is_connected and timeout > 0:
-                await asyncio.sleep(0.5)  # Check more frequently
-                timeout -= 0.5
-            
-            if self.is_connected:
-                _LOGGER.info("✅ MQTT Connected successfully")
-                return True
-            else:
-                _LOGGER.warning("⚠️ MQTT connection timeout - continuing with HTTP API only")
-                # Clean up failed connection
-                try:
-                    self.client.loop_stop()
-                    self.client.disconnect()
-                except:
-                    pass
-                return False
-                
-        except Exception as error:
-            _LOGGER.error(f"❌ Failed to connect to MQTT: {error}")
-            return False
-    
-    def _on_connect(self, client, userdata, flags, rc):
-        """Handle MQTT connection."""
-        if rc == 0:
-            self.is_connected = True
-            _LOGGER.info("🔗 MQTT Connected successfully")
-        else:
-            _LOGGER.error(f"❌ MQTT Connection failed with code {rc}")
-            self.is_connected = False
-    
-    def _on_disconnect(self, client, userdata, rc):
-        """Handle MQTT disconnection."""
-        self.is_connected = False
-        _LOGGER.info("📴 MQTT Disconnected")
-    
-    def _on_error(self, client, userdata, error):
-        """Handle MQTT errors."""
-        _LOGGER.error(f"❌ MQTT Error: {error}")
-        self.is_connected = False
-    
-    def publish(self, device_id: str, control_payload: Dict[str, Any]) -> bool:
-        """Publish control command via MQTT."""
-        if not self.is_connected:
-            _LOGGER.error("❌ MQTT not connected")
-            return False
-        
-        try:
-            # Step 1: Add src key (EXACT from decompiled app)
-            control_payload[self.SRC_KEY] = self.SRC_VALUE
-            
-            # Step 2: Create desired object
-            desired_object = control_payload.copy()
-            
-            # Step 3: Create state object
-            state_object = {
-                "state": {
-                    "desired": desired_object
-                }
-            }
-            
-            # Step 4: Format topic
-            topic = self.PUB_STATE_UPDATE_TOPIC_NAME % device_id
-            
-            _LOGGER.info(f"📤 MQTT Publish: {json.dumps(state_object, indent=2)}")
-            _LOGGER.info(f"📤 Topic: {topic}")
-            
-            # Step 5: Publish with QOS0
-            result = self.client.publish(topic, json.dumps(state_object), qos=0)
-            
-            if result.rc == mqtt_client.MQTT_ERR_SUCCESS:
-                _LOGGER.info("✅ Successfully published via MQTT")
-                return True
-            else:
-                _LOGGER.error(f"❌ Failed to publish via MQTT: {result.rc}")
-                return False
-                
-        except Exception as error:
-            _LOGGER.error(f"❌ MQTT Publish Error: {error}")
-            return False
-    
-    def force_sync(self, device_id: str) -> bool:
-        """Send force sync command via MQTT."""
-        if not self.is_connected:
-            _LOGGER.error("❌ MQTT not connected")
-            return False
-        
-        try:
-            # Create force sync payload
-            force_sync_payload = {self.FORCE_FETCH_KEY_NAME: 1}
-            
-            # Format topic
-            topic = self.PUB_CONTROL_TOPIC_NAME % device_id
-            
-            _LOGGER.info(f"📤 MQTT Force Sync: {json.dumps(force_sync_payload, indent=2)}")
-            _LOGGER.info(f"📤 Topic: {topic}")
-            
-            # Publish with QOS0
-            result = self.client.publish(topic, json.dumps(force_sync_payload), qos=0)
-            
-            if result.rc == mqtt_client.MQTT_ERR_SUCCESS:
-                _LOGGER.info("✅ Successfully published force sync via MQTT")
-                return True
-            else:
-                _LOGGER.error(f"❌ Failed to publish force sync via MQTT: {result.rc}")
-                return False
-                
-        except Exception as error:
-            _LOGGER.error(f"❌ MQTT Force Sync Error: {error}")
-            return False
-    
-    def disconnect(self):
-        """Disconnect from MQTT broker."""
-        if self.client:
-            self.client.loop_stop()
-            self.client.disconnect()
-            self.is_connected = False
-            _LOGGER.info("🔌 MQTT Disconnected")
-
-
 class BluestarAPI:
     """Bluestar Smart AC API client with MQTT support."""
 
@@ -270,28 +368,80 @@ class BluestarAPI:
         password: str,
         base_url: str = DEFAULT_BASE_URL,
         session: Optional[aiohttp.ClientSession] = None,
+        mqtt_options: Optional[Dict[str, Any]] = None,
+        replay: Optional[BluestarReplayTransport] = None,
+        rate_limiter: Optional[BluestarRateLimiter] = None,
     ):
         self.phone = phone
         self.password = password
-        self.base_url = base_url
+        # Requests go to the healthiest of the known hosts for base_url
+        self.endpoints = BluestarEndpointPool(base_url or DEFAULT_BASE_URL)
+        self.timeouts = AdaptiveTimeouts()
+        # Normally the hub's, so the budgets hold across accounts
+        self.rate_limiter = rate_limiter or BluestarRateLimiter()
         self._session = session
+        # Set by close(); a closed client sends nothing and opens no session
+        self._closed = False
+        # Passed to BluestarMQTTClient (control_qos, inflight_window, puback_timeout)
+        self.mqtt_options = mqtt_options or {}
         self.session_token: Optional[str] = None
         self.credential_extractor = BluestarCredentialExtractor()
-        self.mqtt_client: Optional[BluestarMQTTClient] = None
+        self.mqtt_client: Optional["BluestarMQTTClient"] = None
+        self.devices_cache = BluestarDevicesCache()
+        # Set by async_restore_login: the next get_devices serves the snapshot
+        self._snapshot_pending = False
+        # Traffic capture (start_recording) and playback (replay) for offline testing
+        self.traffic: Optional[TrafficRecorder] = None
+        self.replay = replay
+
+    @property
+    def base_url(self) -> str:
+        """Return the base URL requests currently go to."""
+        return self.endpoints.current
 
     @property
     def session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session."""
+        if self._closed:
+            raise BluestarAPIError("API client is closed")
         if self._session is None:
             self._session = aiohttp.ClientSession()
         return self._session
 
     async def close(self):
-        """Close the aiohttp session."""
+        """Close the MQTT connection and the aiohttp session.
+
+        Safe to call more than once. The client cannot be used afterwards:
+        requests raise ``BluestarAPIError`` instead of opening a new session.
+        """
+        self._closed = True
+        await self.endpoints.async_stop()
+        mqtt_client, self.mqtt_client = self.mqtt_client, None
+        if mqtt_client:
+            await mqtt_client.async_disconnect()
+        session, self._session = self._session, None
+        if session and not session.closed:
+            await session.close()
+        self.session_token = None
+        await self.async_stop_recording()
+
+    def start_recording(self, path: str) -> None:
+        """Append all HTTP and MQTT traffic to ``path``, credentials redacted."""
+        if self.traffic is not None:
+            raise BluestarAPIError("Traffic is already being recorded")
+        self.traffic = TrafficRecorder(path)
         if self.mqtt_client:
-            self.mqtt_client.disconnect()
-        if self._session:
-            await self._session.close()
+            self.mqtt_client.traffic = self.traffic
+        _LOGGER.info(f"⏺️ Recording Bluestar traffic to {path}")
+
+    async def async_stop_recording(self) -> None:
+        """Stop recording and flush the recording file."""
+        traffic, self.traffic = self.traffic, None
+        if traffic is None:
+            return
+        if self.mqtt_client:
+            self.mqtt_client.traffic = None
+        await asyncio.get_running_loop().run_in_executor(None, traffic.close)
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -301,6 +451,97 @@ class BluestarAPI:
         """Async context manager exit."""
         await self.close()
 
+    @asynccontextmanager
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        endpoint: str,
+        priority: int = PRIORITY_USER,
+        trace: Optional[List[Tuple[str, int]]] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Send a request to the current host and record how it went.
+
+        ``endpoint`` names the API call (login, things, control, ...) whose
+        recent durations set the request's timeout. The request first takes
+        a token from the login, read (GET) or write budget of the shared
+        rate limiter, in ``priority`` order. ``(endpoint, status)`` is
+        appended to ``trace`` if given.
+
+        When replaying, the recorded response is returned instead; when
+        recording, the body is read here so it can be written out.
+        """
+        budget = "login" if endpoint == "login" else "read" if method == "GET" else "write"
+        waited = await self.rate_limiter.acquire(budget, priority)
+        with TRACER.span(
+            f"http.{endpoint}", method=method, path=path, rate_limit_wait=round(waited, 3)
+        ) as span:
+            async with self._send(method, path, endpoint, trace, **kwargs) as response:
+                if span is not None:
+                    span.attributes["status"] = response.status
+                yield response
+
+    @asynccontextmanager
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        endpoint: str,
+        trace: Optional[List[Tuple[str, int]]],
+        **kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Send a request (or replay its recorded response) without rate limiting."""
+        if self._closed:
+            raise BluestarAPIError("API client is closed")
+        if self.replay is not None:
+            response = await self.replay.async_http(method, path)
+            if trace is not None:
+                trace.append((endpoint, response.status))
+            yield response
+            return
+        self.endpoints.start_probing(lambda: self.session, self._acquire_probe_token)
+        adaptive = "timeout" not in kwargs
+        kwargs.setdefault("timeout", aiohttp.ClientTimeout(total=self.timeouts.timeout(endpoint)))
+        base_url = self.base_url
+        start = time.monotonic()
+        recorded = False
+        try:
+            async with self.session.request(method, f"{base_url}{path}", **kwargs) as response:
+                healthy = response.status < 500
+                if trace is not None:
+                    trace.append((endpoint, response.status))
+                self.endpoints.record(base_url, healthy, time.monotonic() - start)
+                recorded = True
+                traffic = self.traffic
+                if traffic is None:
+                    yield response
+                else:
+                    body = await response.read()
+                    traffic.record_http(
+                        method,
+                        path,
+                        kwargs.get("json"),
+                        response.status,
+                        response.headers,
+                        body,
+                        time.monotonic() - start,
+                    )
+                    yield RecordedResponse(response.status, response.headers, body)
+            if healthy:
+                # Whole request including the body, which the timeout also covers
+                self.timeouts.record(endpoint, time.monotonic() - start)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            if not recorded:
+                self.endpoints.record(base_url, False, time.monotonic() - start)
+            if adaptive and isinstance(error, asyncio.TimeoutError):
+                self.timeouts.record_timeout(endpoint)
+            raise
+
+    async def _acquire_probe_token(self) -> None:
+        """Endpoint probes spend the read budget, behind every other request."""
+        await self.rate_limiter.acquire("read", PRIORITY_BACKGROUND)
+
     def _get_auth_headers(self, session_token: Optional[str] = None) -> Dict[str, str]:
         """Get authentication headers (EXACTLY matching the Android app)."""
         token = session_token or self.session_token
@@ -313,8 +554,14 @@ class BluestarAPI:
             "X-APP-SESSION": token or "",
         }
 
-    async def login(self) -> Dict[str, Any]:
-        """Login to Bluestar API with retry logic and multiple phone formats."""
+    @TRACER.traced("login")
+    async def login(self, connect_mqtt: bool = True) -> Dict[str, Any]:
+        """Login to Bluestar API with retry logic and multiple phone formats.
+
+        With ``connect_mqtt=False`` (config flow validation) no MQTT client
+        is started; the returned login data can be handed to another client
+        through ``async_restore_login``.
+        """
         _LOGGER.info(f"🔐 Attempting login for phone: {self.phone}")
         
         # Use exact phone format that works with API
@@ -332,8 +579,10 @@ class BluestarAPI:
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    async with self.session.post(
-                        f"{self.base_url}{LOGIN_ENDPOINT}",
+                    async with self._request(
+                        "POST",
+                        LOGIN_ENDPOINT,
+                        "login",
                         headers={
                             "Content-Type": "application/json",
                             "X-APP-VER": "v4.11.4-133",
@@ -342,7 +591,6 @@ class BluestarAPI:
                             "User-Agent": "com.bluestarindia.bluesmart",
                         },
                         json=payload,
-                        timeout=aiohttp.ClientTimeout(total=30),
                     ) as response:
                         response_text = await response.text()
                         _LOGGER.info(f"API Response (attempt {attempt + 1}): {response.status} - {response_text}")
@@ -353,7 +601,8 @@ class BluestarAPI:
                                 self.session_token = data.get("session")
                                 
                                 # Initialize MQTT client with credentials
-                                await self._initialize_mqtt_client(data)
+                                if connect_mqtt:
+                                    await self._initialize_mqtt_client(data)
                                 
                                 _LOGGER.info("✅ Login successful")
                                 return data
@@ -392,9 +641,36 @@ class BluestarAPI:
         
         raise BluestarAPIError("Login failed with all phone number formats")
 
+    async def async_restore_login(
+        self, login_data: Dict[str, Any], devices: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Adopt a login (and optional /things snapshot) made by another client."""
+        self.session_token = login_data.get("session")
+        if not self.session_token:
+            raise BluestarAPIError("Login data has no session")
+        await self._initialize_mqtt_client(login_data)
+        if devices is not None:
+            self.devices_cache.seed(devices)
+            self._snapshot_pending = True
+
+    @TRACER.traced("mqtt.connect")
     async def _initialize_mqtt_client(self, login_data: Dict[str, Any]) -> bool:
         """Initialize MQTT client with credentials from login response."""
-        if not MQTT_AVAILABLE:
+        if not login_data.get("mi"):
+            _LOGGER.info("⚠️ No MQTT credentials in login response - using HTTP-only mode")
+            return False
+
+        if self.replay is not None:
+            # Recorded credentials are redacted; play the recorded messages back instead
+            listeners = self.mqtt_client._listeners if self.mqtt_client else {}
+            if self.mqtt_client:
+                await self.mqtt_client.async_disconnect()
+            self.mqtt_client = self.replay.create_mqtt_client()
+            self.mqtt_client._listeners = listeners
+            return await self.mqtt_client.connect()
+
+        mqtt = await _async_load_mqtt_module()
+        if mqtt is None:
             _LOGGER.warning("⚠️ MQTT not available - using HTTP-only mode")
             return False
             
@@ -402,12 +678,16 @@ class BluestarAPI:
             # Extract credentials from login response
             credentials = self.credential_extractor.extract_credentials(login_data)
             
-            # Disconnect existing client if any
+            # Disconnect existing client if any, keeping its subscriptions
+            listeners = {}
             if self.mqtt_client:
-                self.mqtt_client.disconnect()
+                listeners = self.mqtt_client._listeners
+                await self.mqtt_client.async_disconnect()
             
             # Create new MQTT client
-            self.mqtt_client = BluestarMQTTClient(credentials)
+            self.mqtt_client = mqtt.BluestarMQTTClient(credentials, **self.mqtt_options)
+            self.mqtt_client._listeners = listeners
+            self.mqtt_client.traffic = self.traffic
             
             # Connect to MQTT
             success = await self.mqtt_client.connect()
@@ -423,43 +703,79 @@ class BluestarAPI:
             _LOGGER.error(f"❌ Failed to initialize MQTT client: {error}")
             return False
 
-    async def get_devices(self) -> Dict[str, Any]:
-        """Get list of devices."""
+    @TRACER.traced("get_devices")
+    async def get_devices(self, priority: int = PRIORITY_USER) -> Dict[str, Any]:
+        """Get list of devices.
+
+        Polls pass ``PRIORITY_BACKGROUND`` so they queue behind user requests
+        when the read budget runs low.
+        """
         if not self.session_token:
             raise BluestarAPIError("Not authenticated. Call login() first.")
 
+        if self._snapshot_pending:
+            self._snapshot_pending = False
+            return self.devices_cache.data
+
         headers = self._get_auth_headers()
-        _LOGGER.info(f"Fetching devices with headers: {headers}")
+        headers.update(self.devices_cache.conditional_headers())
+        _LOGGER.debug(f"Fetching devices with headers: {headers}")
 
-        async with self.session.get(
-            f"{self.base_url}{DEVICES_ENDPOINT}", 
-            headers=headers,
-            timeout=aiohttp.ClientTimeout(total=30),
+        async with self._request(
+            "GET", DEVICES_ENDPOINT, "things", priority, headers=headers
         ) as response:
             if response.status == 401:
                 _LOGGER.warning("Session expired, attempting re-login")
                 await self.login()
                 headers = self._get_auth_headers()
-                async with self.session.get(
-                    f"{self.base_url}{DEVICES_ENDPOINT}", 
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=30),
+                async with self._request(
+                    "GET", DEVICES_ENDPOINT, "things", priority, headers=headers
                 ) as retry_response:
                     if not retry_response.ok:
                         raise BluestarAPIError(
                             f"Failed to fetch devices: {retry_response.status}"
                         )
-                    return await retry_response.json()
+                    return await self.devices_cache.async_store(retry_response)
+
+            if response.status == 304:
+                return self.devices_cache.data
 
             if not response.ok:
                 raise BluestarAPIError(f"Failed to fetch devices: {response.status}")
 
-            data = await response.json()
-            _LOGGER.info(f"Raw Bluestar response: {data}")
-            return data
+            return await self.devices_cache.async_store(response)
+
+    async def force_sync(self, device_id: str) -> bool:
+        """Ask a device to push its current state (MQTT, or HTTP fallback)."""
+        if not self.session_token:
+            raise BluestarAPIError("Not authenticated. Call login() first.")
+
+        if self.mqtt_client and self.mqtt_client.is_connected:
+            if await self.mqtt_client.async_force_sync(device_id):
+                return True
+
+        async with self._request(
+            "POST",
+            CONTROL_ENDPOINT.format(device_id=device_id),
+            "control",
+            headers=self._get_auth_headers(),
+            json={"fpsh": 1},
+        ) as response:
+            if not response.ok:
+                raise BluestarAPIError(f"Force sync failed: {response.status}", response.status)
+            _LOGGER.info("✅ Force sync via HTTP")
+            return True
 
-    async def control_device(self, device_id: str, control_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Control device using EXACT BLUESTAR CONTROL ALGORITHM."""
+    @TRACER.traced("control_device")
+    async def control_device(
+        self, device_id: str, control_data: Dict[str, Any], ts: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Control device using EXACT BLUESTAR CONTROL ALGORITHM.
+
+        ``ts`` is the command's epoch-ms timestamp; it defaults to now. When
+        no path got the command out, ``sent_at`` is None and ``errors`` holds
+        why each path failed, so callers can tell an outage from a refusal.
+        """
         if not self.session_token:
             raise BluestarAPIError("Not authenticated. Call login() first.")
 
@@ -492,31 +808,43 @@ class BluestarAPI:
             control_payload["display"] = control_data["display"]
 
         # Add timestamp and source (EXACT APK FORMAT)
-        control_payload["ts"] = int(asyncio.get_event_loop().time() * 1000)
+        control_payload["ts"] = ts if ts is not None else int(time.time() * 1000)
         control_payload["src"] = "anmq"
 
         _LOGGER.info(f"📤 Step 1: Sending direct control via MQTT: {json.dumps(control_payload, indent=2)}")
 
         # EXACT BLUESTAR CONTROL ALGORITHM - MQTT PRIMARY METHOD
         control_result = None
+        # Which control path got the command out, and when (for latency tracking)
+        control_path = None
+        sent_at = None
+        # (endpoint, status) of every HTTP call, for the flight recorder
+        http_trace: List[Tuple[str, int]] = []
+        # Why each control path failed; BluestarAPIError carries the HTTP status
+        errors: List[Exception] = []
         
         # Step 1: Try EXACT MQTT control (PRIMARY METHOD from decompiled app)
-        if MQTT_AVAILABLE and self.mqtt_client and self.mqtt_client.is_connected:
+        if self.mqtt_client and self.mqtt_client.is_connected:
             try:
                 _LOGGER.info(f"📤 Step 1: Sending EXACT MQTT control: {json.dumps(control_payload, indent=2)}")
                 
                 # Use EXACT publish method from decompiled app
-                success = self.mqtt_client.publish(device_id, control_payload)
+                with TRACER.span("mqtt.publish"):
+                    success = await self.mqtt_client.async_publish(device_id, control_payload)
                 
                 if success:
                     control_result = {"method": "EXACT_MQTT", "status": "success"}
+                    control_path = "mqtt"
+                    sent_at = time.monotonic()
                     _LOGGER.info("✅ EXACT MQTT control success")
                 else:
                     _LOGGER.warning("⚠️ EXACT MQTT control failed")
+                    errors.append(BluestarAPIError("MQTT publish failed"))
             except Exception as error:
                 _LOGGER.warning(f"⚠️ EXACT MQTT control failed: {error}")
+                errors.append(BluestarAPIError(f"MQTT publish failed: {error}"))
         else:
-            if not MQTT_AVAILABLE:
+            if self.mqtt_client is None:
                 _LOGGER.info("⚠️ MQTT not available, using HTTP API only")
             else:
                 _LOGGER.warning("⚠️ EXACT MQTT client not available, trying HTTP API fallback")
@@ -527,17 +855,15 @@ class BluestarAPI:
                 _LOGGER.info(f"📤 Step 2: Sending control via HTTP API (EXACT MODE CONTROL): {json.dumps(control_payload, indent=2)}")
                 
                 # EXACT MODE CONTROL MECHANISM from decompiled app
-                # Get current device state to determine the mode
-                device_response = await self.session.get(f"{self.base_url}{DEVICES_ENDPOINT}", headers=headers)
-                
-                if not device_response.ok:
-                    raise BluestarAPIError("Failed to fetch device state")
-                
-                device_data = await device_response.json()
-                current_state = device_data.get("states", {}).get(device_id)
-                
+                # Get current device state to determine the mode: the last
+                # polled state, fetched (conditionally) only if there is none
+                current_state = self.devices_cache.states.get(device_id)
                 if not current_state:
-                    raise BluestarAPIError("Device not found")
+                    await self.get_devices()
+                    current_state = self.devices_cache.states.get(device_id)
+
+                if not current_state:
+                    raise BluestarAPIError("Device not found", 404)
 
                 # Determine current mode (EXACT from decompiled app)
                 current_mode = current_state.get("state", {}).get("mode", 2)
@@ -584,16 +910,28 @@ class BluestarAPI:
 
                 _LOGGER.info(f"📤 EXACT MODE CONTROL STRUCTURE: {json.dumps(preferences_payload, indent=2)}")
 
-                preferences_response = await self.session.post(
-                    f"{self.base_url}{PREFERENCES_ENDPOINT.format(device_id=device_id)}",
+                async with self._request(
+                    "POST",
+                    PREFERENCES_ENDPOINT.format(device_id=device_id),
+                    "preferences",
+                    trace=http_trace,
                     headers=headers,
-                    json=preferences_payload
-                )
+                    json=preferences_payload,
+                ) as preferences_response:
+                    if preferences_response.ok:
+                        control_result = await preferences_response.json()
+                        control_path = "preferences"
+                        sent_at = time.monotonic()
+                        _LOGGER.info(f"✅ EXACT MODE CONTROL success: {control_result}")
+                    else:
+                        errors.append(
+                            BluestarAPIError(
+                                f"Preferences control failed: {preferences_response.status}",
+                                preferences_response.status,
+                            )
+                        )
 
-                if preferences_response.ok:
-                    control_result = await preferences_response.json()
-                    _LOGGER.info(f"✅ EXACT MODE CONTROL success: {control_result}")
-                else:
+                if control_path is None:
                     _LOGGER.warning("⚠️ EXACT MODE CONTROL failed, trying direct MQTT structure")
                     
                     # Fallback to direct MQTT structure
@@ -603,19 +941,30 @@ class BluestarAPI:
                         }
                     }
                     
-                    state_response = await self.session.post(
-                        f"{self.base_url}{STATE_ENDPOINT.format(device_id=device_id)}",
+                    async with self._request(
+                        "POST",
+                        STATE_ENDPOINT.format(device_id=device_id),
+                        "state",
+                        trace=http_trace,
                         headers=headers,
-                        json=mqtt_style_payload
-                    )
-
-                    if state_response.ok:
-                        control_result = await state_response.json()
-                        _LOGGER.info(f"✅ Direct MQTT structure success: {control_result}")
-                    else:
-                        _LOGGER.warning("⚠️ All control methods failed")
+                        json=mqtt_style_payload,
+                    ) as state_response:
+                        if state_response.ok:
+                            control_result = await state_response.json()
+                            control_path = "state"
+                            sent_at = time.monotonic()
+                            _LOGGER.info(f"✅ Direct MQTT structure success: {control_result}")
+                        else:
+                            _LOGGER.warning("⚠️ All control methods failed")
+                            errors.append(
+                                BluestarAPIError(
+                                    f"State control failed: {state_response.status}",
+                                    state_response.status,
+                                )
+                            )
             except Exception as error:
                 _LOGGER.warning(f"⚠️ EXACT MODE CONTROL failed: {error}")
+                errors.append(error)
 
         # Step 3: Force sync if all methods fail
         if not control_result:
@@ -623,28 +972,32 @@ class BluestarAPI:
                 _LOGGER.info("📤 Step 3: Sending force sync")
                 force_sync_payload = {"fpsh": 1}
                 
-                if MQTT_AVAILABLE and self.mqtt_client and self.mqtt_client.is_connected:
-                    success = self.mqtt_client.force_sync(device_id)
+                if self.mqtt_client and self.mqtt_client.is_connected:
+                    with TRACER.span("mqtt.force_sync"):
+                        success = await self.mqtt_client.async_force_sync(device_id)
                     if success:
                         _LOGGER.info("✅ Force sync via EXACT MQTT")
+                        control_path = "force_sync"
                 else:
-                    force_sync_response = await self.session.post(
-                        f"{self.base_url}{CONTROL_ENDPOINT.format(device_id=device_id)}",
+                    async with self._request(
+                        "POST",
+                        CONTROL_ENDPOINT.format(device_id=device_id),
+                        "control",
+                        trace=http_trace,
                         headers=headers,
-                        json=force_sync_payload
-                    )
-                    
-                    if force_sync_response.ok:
-                        _LOGGER.info("✅ Force sync via HTTP")
-                    else:
-                        _LOGGER.warning("⚠️ Force sync failed")
+                        json=force_sync_payload,
+                    ) as force_sync_response:
+                        if force_sync_response.ok:
+                            _LOGGER.info("✅ Force sync via HTTP")
+                            control_path = "force_sync"
+                        else:
+                            _LOGGER.warning("⚠️ Force sync failed")
             except Exception as error:
                 _LOGGER.warning(f"⚠️ Force sync failed: {error}")
 
-        # Get updated device state
-        updated_device_response = await self.session.get(f"{self.base_url}{DEVICES_ENDPOINT}", headers=headers)
-        updated_device_data = await updated_device_response.json()
-        updated_state = updated_device_data.get("states", {}).get(device_id, {})
+        # Last known device state; the command's effect arrives with the next
+        # MQTT report or poll, so no extra /things fetch here
+        updated_state = self.devices_cache.states.get(device_id, {})
         
         state = {
             "power": updated_state.get("state", {}).get("pow") == 1,
@@ -655,17 +1008,23 @@ class BluestarAPI:
             "swing": updated_state.get("state", {}).get("vswing") != 0,
             "display": updated_state.get("state", {}).get("display") != 0,
             "connected": updated_state.get("connected", False),
-            "timestamp": int(asyncio.get_event_loop().time() * 1000),
+            "timestamp": updated_state.get("timestamp", control_payload["ts"]),
             "rssi": updated_state.get("state", {}).get("rssi", -45),
             "error": updated_state.get("state", {}).get("err", 0),
             "source": updated_state.get("state", {}).get("src", "unknown")
         }
 
+        set_span_attributes(device_id=device_id, path=control_path or "none")
         return {
             "message": "Control command sent successfully",
             "deviceId": device_id,
             "controlData": control_data,
             "state": state,
             "method": "EXACT_BLUESTAR_CONTROL",
-            "api": control_result
+            "api": control_result,
+            "path": control_path,
+            "sent_at": sent_at,
+            "ts": control_payload["ts"],
+            "http": http_trace,
+            "errors": errors,
         }
\ No newline at end of file
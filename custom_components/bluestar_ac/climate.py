@@ -1,4 +1,5 @@
 """Climate platform for Bluestar Smart AC integration."""
+from __future__ import annotations
 
 import logging
 from typing import Any
@@ -20,6 +21,9 @@ from .const import (
     FAN_MODE_TO_BLUESTAR,
     HVAC_MODE_TO_BLUESTAR,
     DOMAIN,
+    MAX_TEMP,
+    MIN_TEMP,
+    TEMP_STEP,
 )
 from .coordinator import BluestarDataUpdateCoordinator
 
@@ -70,9 +74,18 @@ async def async_setup_entry(
 class BluestarClimateEntity(CoordinatorEntity, ClimateEntity):
     """Representation of a Bluestar AC climate entity."""
 
-    _attr_hvac_modes = [HVACMode.OFF, HVACMode.COOL, HVACMode.HEAT, HVACMode.AUTO]
+    _attr_hvac_modes = [
+        HVACMode.OFF,
+        HVACMode.COOL,
+        HVACMode.DRY,
+        HVACMode.FAN_ONLY,
+        HVACMode.AUTO,
+    ]
     _attr_fan_modes = ["low", "medium", "high", "auto"]
     _attr_temperature_unit = UnitOfTemperature.CELSIUS
+    _attr_min_temp = MIN_TEMP
+    _attr_max_temp = MAX_TEMP
+    _attr_target_temperature_step = TEMP_STEP
     _attr_supported_features = (
         ClimateEntityFeature.TARGET_TEMPERATURE
         | ClimateEntityFeature.FAN_MODE
@@ -98,6 +111,11 @@ class BluestarClimateEntity(CoordinatorEntity, ClimateEntity):
         """Get device data from coordinator."""
         return self.coordinator.get_device(self.device_id) or {}
 
+    @property
+    def device_state(self) -> dict:
+        """Get device state from coordinator."""
+        return self.coordinator.get_device_state(self.device_id) or {}
+
     @property
     def device_name(self) -> str:
         """Get device name."""
@@ -106,29 +124,31 @@ class BluestarClimateEntity(CoordinatorEntity, ClimateEntity):
     @property
     def current_temperature(self) -> float | None:
         """Return the current temperature."""
-        return self.device_data.get("current_temp")
+        return _to_float(self.device_state.get("current_temp"))
 
     @property
     def target_temperature(self) -> float | None:
         """Return the target temperature."""
-        return self.device_data.get("target_temp")
+        return _to_float(self.device_state.get("temperature"))
 
     @property
     def hvac_mode(self) -> HVACMode:
         """Return the current HVAC mode."""
-        mode = self.device_data.get("mode")
+        if not self.is_on:
+            return HVACMode.OFF
+        mode = self.device_state.get("mode")
         return BLUESTAR_TO_HVAC_MODE.get(mode, HVACMode.OFF)
 
     @property
     def fan_mode(self) -> str | None:
         """Return the current fan mode."""
-        fan_mode = self.device_data.get("fan_mode")
+        fan_mode = self.device_state.get("fan_speed")
         return BLUESTAR_TO_FAN_MODE.get(fan_mode, "auto")
 
     @property
     def is_on(self) -> bool:
         """Return True if the AC is on."""
-        return self.device_data.get("power", False)
+        return self.device_state.get("power", False)
 
     async def async_set_temperature(self, **kwargs: Any) -> None:
         """Set the target temperature."""
@@ -139,8 +159,12 @@ class BluestarClimateEntity(CoordinatorEntity, ClimateEntity):
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
         """Set the HVAC mode."""
         bluestar_mode = HVAC_MODE_TO_BLUESTAR.get(hvac_mode)
-        if bluestar_mode:
-            await self.coordinator.set_mode(self.device_id, bluestar_mode)
+        if not bluestar_mode:
+            return
+        if "mode" in bluestar_mode:
+            await self.coordinator.set_mode(self.device_id, bluestar_mode["mode"])
+        else:
+            await self.coordinator.set_power(self.device_id, bluestar_mode["pow"] == 1)
 
     async def async_set_fan_mode(self, fan_mode: str) -> None:
         """Set the fan mode."""
@@ -154,4 +178,12 @@ class BluestarClimateEntity(CoordinatorEntity, ClimateEntity):
 
     async def async_turn_off(self) -> None:
         """Turn the AC off."""
-        await self.coordinator.set_power(self.device_id, False)
\ No newline at end of file
+        await self.coordinator.set_power(self.device_id, False)
+
+
+def _to_float(value: Any) -> float | None:
+    """Convert a Bluestar temperature string to float."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
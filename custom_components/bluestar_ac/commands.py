@@ -0,0 +1,615 @@
+"""Typed control commands for Bluestar Smart AC integration."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+import aiohttp
+
+from homeassistant.core import callback
+
+from .const import (
+    BLUESTAR_TO_FAN_MODE,
+    BLUESTAR_TO_HVAC_MODE,
+    MAX_TEMP,
+    MIN_TEMP,
+    PRIORITY_USER,
+    STATE_DISPLAY,
+    STATE_FAN_SPEED,
+    STATE_HORIZONTAL_SWING,
+    STATE_MODE,
+    STATE_POWER,
+    STATE_TEMP,
+    STATE_VERTICAL_SWING,
+    SWING_VALUE_TO_LABEL,
+    TEMP_STEP,
+)
+
+from .api import BluestarAPIError
+from .latency import CLOCK_SKEW_TOLERANCE, CommandLatencyTracker
+from .sequences import BluestarCommandSequences
+from .state import timestamp_ms
+from .tracing import TRACER
+
+if TYPE_CHECKING:
+    from .coordinator import BluestarDataUpdateCoordinator
+    from .outbox import BluestarOutbox
+
+_LOGGER = logging.getLogger(__name__)
+
+# How long a sent command counts as the device's state before a report confirms it
+COMMAND_PENDING_TTL = 15  # seconds
+
+# Commands (and polls) in flight at once across every pipeline sharing a limiter
+MAX_CONCURRENT_COMMANDS = 4
+
+# Upper bound on how long a caller waits for a command, queueing included
+COMMAND_DEADLINE = 20  # seconds
+
+
+class BluestarCommandError(ValueError):
+    """Exception raised for control commands that fail validation."""
+
+
+class BluestarCommand:
+    """Base class for one control intent sent to an AC."""
+
+    def validate(self) -> None:
+        """Raise BluestarCommandError if the command cannot be sent."""
+
+    def to_control_data(self) -> Dict[str, Any]:
+        """Return the Bluestar control fields for this command."""
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class PowerCommand(BluestarCommand):
+    """Turn the AC on or off."""
+
+    on: bool
+
+    def to_control_data(self) -> Dict[str, Any]:
+        return {STATE_POWER: 1 if self.on else 0}
+
+
+@dataclass(frozen=True)
+class ModeCommand(BluestarCommand):
+    """Select the Bluestar operating mode (see BLUESTAR_TO_HVAC_MODE)."""
+
+    mode: int
+
+    def validate(self) -> None:
+        if self.mode not in BLUESTAR_TO_HVAC_MODE:
+            raise BluestarCommandError(f"Unsupported mode: {self.mode}")
+
+    def to_control_data(self) -> Dict[str, Any]:
+        return {STATE_MODE: self.mode}
+
+
+@dataclass(frozen=True)
+class SetpointCommand(BluestarCommand):
+    """Set the target temperature in °C."""
+
+    temperature: float
+
+    def validate(self) -> None:
+        if not MIN_TEMP <= self.temperature <= MAX_TEMP:
+            raise BluestarCommandError(
+                f"Temperature {self.temperature} outside {MIN_TEMP}-{MAX_TEMP}"
+            )
+        steps = (self.temperature - MIN_TEMP) / TEMP_STEP
+        if abs(steps - round(steps)) > 1e-6:
+            raise BluestarCommandError(
+                f"Temperature {self.temperature} is not a multiple of {TEMP_STEP}"
+            )
+
+    def to_control_data(self) -> Dict[str, Any]:
+        return {STATE_TEMP: f"{self.temperature:.1f}"}
+
+
+@dataclass(frozen=True)
+class FanCommand(BluestarCommand):
+    """Set the Bluestar fan speed (see BLUESTAR_TO_FAN_MODE)."""
+
+    speed: int
+
+    def validate(self) -> None:
+        if self.speed not in BLUESTAR_TO_FAN_MODE:
+            raise BluestarCommandError(f"Unsupported fan speed: {self.speed}")
+
+    def to_control_data(self) -> Dict[str, Any]:
+        return {STATE_FAN_SPEED: self.speed}
+
+
+@dataclass(frozen=True)
+class SwingCommand(BluestarCommand):
+    """Set vertical and/or horizontal swing (see SWING_OPTIONS)."""
+
+    vertical: Optional[int] = None
+    horizontal: Optional[int] = None
+
+    def validate(self) -> None:
+        if self.vertical is None and self.horizontal is None:
+            raise BluestarCommandError("Swing command without a direction")
+        for value in (self.vertical, self.horizontal):
+            if value is not None and value not in SWING_VALUE_TO_LABEL:
+                raise BluestarCommandError(f"Unsupported swing value: {value}")
+
+    def to_control_data(self) -> Dict[str, Any]:
+        control_data = {}
+        if self.vertical is not None:
+            control_data[STATE_VERTICAL_SWING] = self.vertical
+        if self.horizontal is not None:
+            control_data[STATE_HORIZONTAL_SWING] = self.horizontal
+        return control_data
+
+
+@dataclass(frozen=True)
+class DisplayCommand(BluestarCommand):
+    """Turn the AC display on or off."""
+
+    on: bool
+
+    def to_control_data(self) -> Dict[str, Any]:
+        return {STATE_DISPLAY: 1 if self.on else 0}
+
+
+def normalize_control_value(key: str, value: Any) -> Any:
+    """Normalize a control/state field so sent and reported values compare equal."""
+    if isinstance(value, dict) and "value" in value:
+        value = value["value"]
+    try:
+        if key == STATE_TEMP:
+            return float(value)
+        if key == STATE_DISPLAY:
+            return int(value) != 0
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class PriorityLimiter:
+    """Concurrency cap whose waiters are admitted lowest priority value first."""
+
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def active(self) -> int:
+        """Return the number of slots in use."""
+        return self._active
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_USER) -> AsyncIterator[None]:
+        """Hold one slot for the duration of the block."""
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int) -> None:
+        if self._active < self._limit and not self._waiters:
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed to us just before we were cancelled
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        # Hand the slot straight to the best waiter that is still waiting
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+
+class BluestarCommandPipeline:
+    """The single path every control command takes from an entity to the API.
+
+    Commands are validated, merged into one control payload per call, queued
+    per device, reduced to the fields that would actually change the device,
+    sent through ``BluestarAPI.control_device`` and then applied
+    optimistically to the coordinator's state.
+    """
+
+    def __init__(
+        self,
+        coordinator: "BluestarDataUpdateCoordinator",
+        deadline: float = COMMAND_DEADLINE,
+        outbox: Optional["BluestarOutbox"] = None,
+        limiter: Optional[PriorityLimiter] = None,
+        sequences: Optional[BluestarCommandSequences] = None,
+    ):
+        self.coordinator = coordinator
+        self.deadline = deadline
+        # Holds commands that could not reach the cloud; flushed on recovery
+        self.outbox = outbox
+        self._flush_task: Optional[asyncio.Task] = None
+        # device_id -> field -> (normalized value, monotonic expiry, epoch-ms
+        # send time) for commands sent but not yet confirmed by a state report
+        self._pending: Dict[str, Dict[str, Tuple[Any, float, int]]] = {}
+        # Per-device sequence numbers; persisted when set up from an entry
+        self.sequences = sequences or BluestarCommandSequences()
+        self.sent_count = 0
+        self.suppressed_count = 0
+        # Normally the hub's, shared by every config entry
+        self.limiter = limiter or PriorityLimiter(MAX_CONCURRENT_COMMANDS)
+        self.latency = CommandLatencyTracker()
+        self._queues: Dict[str, asyncio.PriorityQueue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._sequence = itertools.count()
+
+    async def async_send(
+        self,
+        device_id: str,
+        *commands: BluestarCommand,
+        force: bool = False,
+        priority: int = PRIORITY_USER,
+    ) -> Dict[str, Any]:
+        """Validate and send one or more commands to a device as a single update."""
+        control_data: Dict[str, Any] = {}
+        for command in commands:
+            command.validate()
+            control_data.update(command.to_control_data())
+        return await self.async_send_control_data(
+            device_id, control_data, force=force, priority=priority
+        )
+
+    def last_sequence(self, device_id: str) -> int:
+        """Return the sequence number of the last command sent to a device."""
+        return self.sequences.last(device_id)
+
+    def _changed_fields(self, device_id: str, control_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the fields that differ from the pending or confirmed state."""
+        now = time.monotonic()
+        pending = self._pending.get(device_id, {})
+        confirmed = self.coordinator.states.get(device_id, {}).get("state", {})
+
+        changed = {}
+        for key, value in control_data.items():
+            wanted = normalize_control_value(key, value)
+            if key in pending and pending[key][1] > now:
+                current = pending[key][0]
+            elif key in confirmed:
+                current = normalize_control_value(key, confirmed[key])
+            else:
+                changed[key] = value
+                continue
+            if current != wanted:
+                changed[key] = value
+        return changed
+
+    @callback
+    def async_observe_state(
+        self,
+        device_id: str,
+        reported: Dict[str, Any],
+        source: str,
+        reported_ts: Optional[float] = None,
+    ) -> None:
+        """Feed a reported device state (poll or push) to the latency tracker."""
+        if not self.latency.pending_count(device_id):
+            return
+        self.latency.observe(
+            device_id,
+            {key: normalize_control_value(key, value) for key, value in reported.items()},
+            source,
+            reported_ts=reported_ts,
+        )
+
+    @callback
+    def async_confirm(self, device_id: str) -> None:
+        """Drop pending fields that the confirmed state now matches (or that expired).
+
+        A report older than the command (by the cloud's epoch-ms timestamp)
+        is a stale echo and does not confirm it.
+        """
+        pending = self._pending.get(device_id)
+        if not pending:
+            return
+
+        now = time.monotonic()
+        document = self.coordinator.states.get(device_id, {})
+        confirmed = document.get("state", {})
+        reported_ts = timestamp_ms(document)
+        for key, (value, expires, sent_ts) in list(pending.items()):
+            fresh = reported_ts is None or reported_ts + CLOCK_SKEW_TOLERANCE >= sent_ts
+            if expires <= now or (
+                fresh
+                and key in confirmed
+                and normalize_control_value(key, confirmed[key]) == value
+            ):
+                del pending[key]
+        if not pending:
+            del self._pending[device_id]
+
+    def pending_control_data(self, device_id: str) -> Dict[str, Any]:
+        """Return the unexpired sent-but-unconfirmed fields of a device."""
+        now = time.monotonic()
+        return {
+            key: value
+            for key, (value, expires, _) in self._pending.get(device_id, {}).items()
+            if expires > now
+        }
+
+    async def async_send_control_data(
+        self,
+        device_id: str,
+        control_data: Dict[str, Any],
+        force: bool = False,
+        priority: int = PRIORITY_USER,
+    ) -> Dict[str, Any]:
+        """Send already-built control fields to a device.
+
+        Commands to one device are executed in order by that device's queue;
+        different devices run in parallel up to the limiter's cap.
+        Fields that already match the device's pending or confirmed state are
+        dropped, and a command that changes nothing is not sent at all unless
+        ``force`` is set.
+        """
+        return await self._async_enqueue(
+            device_id, priority, lambda: self._async_execute(device_id, control_data, force)
+        )
+
+    async def async_force_sync(self, device_id: str, priority: int = PRIORITY_USER) -> bool:
+        """Ask a device to push its current state."""
+        return await self._async_enqueue(
+            device_id, priority, lambda: self._async_force_sync(device_id)
+        )
+
+    async def _async_enqueue(
+        self, device_id: str, priority: int, job: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Queue a job for a device and wait for its result, up to the deadline.
+
+        On timeout the caller gets a BluestarAPIError; a job still queued is
+        dropped, one already running finishes in the background.
+        """
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.setdefault(device_id, asyncio.PriorityQueue())
+        queue.put_nowait((priority, next(self._sequence), job, future))
+
+        if device_id not in self._workers:
+            self._workers[device_id] = self.coordinator.hass.async_create_task(
+                self._async_worker(device_id)
+            )
+        try:
+            return await asyncio.wait_for(future, self.deadline)
+        except asyncio.TimeoutError as err:
+            raise BluestarAPIError(
+                f"Command to {device_id} did not complete within {self.deadline}s"
+            ) from err
+
+    async def _async_worker(self, device_id: str) -> None:
+        """Run a device's queued jobs one at a time, then exit when it is empty."""
+        queue = self._queues[device_id]
+        try:
+            while not queue.empty():
+                priority, _, job, future = queue.get_nowait()
+                if future.done():
+                    # Caller gave up while the job was queued
+                    continue
+                try:
+                    with TRACER.span("command", root=True, device_id=device_id, priority=priority):
+                        async with self.limiter.slot(priority):
+                            result = await job()
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as err:  # pylint: disable=broad-except
+                    if not future.done():
+                        future.set_exception(err)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self._workers.pop(device_id, None)
+
+    @callback
+    def async_schedule_flush(self) -> None:
+        """Send the commands queued during an outage, now that the cloud answers."""
+        if not self.outbox or (self._flush_task and not self._flush_task.done()):
+            return
+        self._flush_task = self.coordinator.hass.async_create_task(self._async_flush())
+
+    async def _async_flush(self) -> None:
+        """Send every device's coalesced queued command, all in one batch."""
+        batch = self.outbox.async_take_all()
+        if not batch:
+            return
+        _LOGGER.info("Sending commands queued while offline to %d devices", len(batch))
+
+        def _job(device_id: str, control_data: Dict[str, Any], expires: float):
+            return lambda: self._async_execute(device_id, control_data, False, expires)
+
+        # Same priority as user commands so a newer command queued after the
+        # flush is still applied last
+        results = await asyncio.gather(
+            *(
+                self._async_enqueue(device_id, PRIORITY_USER, _job(device_id, control_data, expires))
+                for device_id, (control_data, expires) in batch.items()
+            ),
+            return_exceptions=True,
+        )
+        for device_id, result in zip(batch, results):
+            if isinstance(result, Exception):
+                _LOGGER.warning("Queued command for %s failed: %s", device_id, result)
+
+    @staticmethod
+    def _is_outage(err: Exception) -> bool:
+        """Return True if an error means the cloud is unreachable, not that it refused."""
+        if isinstance(err, BluestarAPIError):
+            return err.status_code is None or err.status_code >= 500
+        return isinstance(err, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    def _queue_offline(
+        self, device_id: str, control_data: Dict[str, Any], expires: Optional[float]
+    ) -> Optional[Dict[str, Any]]:
+        """Put an undeliverable command in the outbox and return the result for the caller."""
+        if self.outbox is None or not self.outbox.async_add(device_id, control_data, expires):
+            return None
+        _LOGGER.warning("Cloud unreachable, queued command %s for %s", control_data, device_id)
+        self.coordinator.recorder.record(device_id, "queued", path="outbox", detail=control_data)
+        return {
+            "message": "Cloud unreachable, command queued",
+            "deviceId": device_id,
+            "controlData": control_data,
+            "queued": True,
+        }
+
+    async def async_shutdown(self) -> None:
+        """Cancel the device workers and every queued command."""
+        if self._flush_task:
+            self._flush_task.cancel()
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        for queue in self._queues.values():
+            while not queue.empty():
+                _, _, _, future = queue.get_nowait()
+                future.cancel()
+        self._queues.clear()
+
+    async def _async_execute(
+        self,
+        device_id: str,
+        control_data: Dict[str, Any],
+        force: bool,
+        outbox_expires: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Diff and send one queued command.
+
+        If the cloud is unreachable the command goes to the outbox (keeping
+        ``outbox_expires`` when it already came from there).
+        """
+        if not force:
+            changed = self._changed_fields(device_id, control_data)
+            if not changed:
+                self.suppressed_count += 1
+                self.coordinator.recorder.record(device_id, "suppressed", detail=control_data)
+                _LOGGER.debug("P2 suppressed no-op command %s for %s", control_data, device_id)
+                return {
+                    "message": "Device already in requested state",
+                    "deviceId": device_id,
+                    "controlData": control_data,
+                    "suppressed": True,
+                }
+            control_data = changed
+
+        api = self.coordinator.api
+        start = time.monotonic()
+
+        # Epoch-ms timestamp and per-device sequence number, comparable with
+        # the cloud's report timestamps and across restarts
+        seq = self.sequences.async_next(device_id)
+        ts = int(time.time() * 1000)
+        try:
+            # Ensure we're logged in before making requests
+            if not api.session_token:
+                await api.login()
+            result = await api.control_device(device_id, control_data, ts=ts)
+        except (BluestarAPIError, aiohttp.ClientError, asyncio.TimeoutError) as err:
+            self.coordinator.recorder.record(
+                device_id,
+                "command",
+                seq=seq,
+                status=[("error", getattr(err, "status_code", None) or 0)],
+                latency=time.monotonic() - start,
+                detail={**control_data, "error": str(err)},
+            )
+            queued = self._is_outage(err) and self._queue_offline(
+                device_id, control_data, outbox_expires
+            )
+            if not queued:
+                raise
+            return queued
+
+        self.coordinator.recorder.record(
+            device_id,
+            "command",
+            seq=seq,
+            path=result.get("path"),
+            status=result.get("http"),
+            latency=time.monotonic() - start,
+            detail=control_data,
+        )
+
+        if result.get("sent_at") is None:
+            # Every control path failed: a refusal (4xx) is raised, only an
+            # outage (transport error, timeout, 5xx) goes to the outbox
+            refusal = next(
+                (error for error in result.get("errors", []) if not self._is_outage(error)),
+                None,
+            )
+            if isinstance(refusal, BluestarAPIError):
+                raise refusal
+            if refusal is not None:
+                raise BluestarAPIError(f"Control failed for {device_id}: {refusal}") from refusal
+            queued = self._queue_offline(device_id, control_data, outbox_expires)
+            if queued:
+                return queued
+            # Nothing went out and nothing was queued: no pending or optimistic state
+            raise BluestarAPIError(f"Every control path failed for {device_id}")
+        elif self.outbox:
+            self.outbox.async_discard(device_id, control_data)
+        result["seq"] = seq
+        self.sent_count += 1
+
+        expires = time.monotonic() + COMMAND_PENDING_TTL
+        pending = self._pending.setdefault(device_id, {})
+        normalized = {}
+        for key, value in control_data.items():
+            normalized[key] = normalize_control_value(key, value)
+            pending[key] = (normalized[key], expires, ts)
+
+        self.latency.record_sent(
+            device_id, normalized, result["path"], result["sent_at"], seq=seq, ts=ts
+        )
+
+        # Update local state immediately for better UX
+        self.coordinator.async_apply_control_data(device_id, control_data, timestamp=ts)
+
+        _LOGGER.debug(
+            "P1 command #%d %s for %s done in %.3fs via %s",
+            seq, control_data, device_id, time.monotonic() - start,
+            (result.get("api") or {}).get("method", "http"),
+        )
+        return result
+
+    async def _async_force_sync(self, device_id: str) -> bool:
+        """Send one queued force sync."""
+        api = self.coordinator.api
+        if not api.session_token:
+            await api.login()
+        return await api.force_sync(device_id)
@@ -6,16 +6,23 @@ from typing import Any, Dict, Optional
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 
-from .api import BluestarAPI, BluestarAPIError
 from .const import (
     CONF_BASE_URL,
+    CONF_MQTT_PUSH,
     CONF_PASSWORD,
     CONF_PHONE,
+    CONF_RSSI_DEADBAND,
+    CONF_RUNTIME_STATISTICS,
+    CONF_SENSOR_MIN_INTERVAL,
+    CONF_TRACE_EXPORT,
+    DATA_HUB,
     DEFAULT_BASE_URL,
+    DEFAULT_RSSI_DEADBAND,
+    DEFAULT_SENSOR_MIN_INTERVAL,
     DOMAIN,
 )
 
@@ -39,13 +46,23 @@ class InvalidAuth(HomeAssistantError):
 
 
 async def validate_input(hass: HomeAssistant, data: Dict[str, Any]) -> Dict[str, Any]:
-    """Validate the user input allows us to connect."""
+    """Validate the user input allows us to connect.
+
+    Only the HTTP login and ``/things`` are checked; the login and device
+    snapshot are returned so the flow can hand them to the hub once the entry
+    is known to be new.
+    """
     _LOGGER.debug("CF1 validate_input() start")
+    # Imported here so merely showing the form does not load the API client
+    from .api import BluestarAPI, BluestarAPIError
     
+    # Share the running entries' request budgets, if there are any
+    hub = hass.data.get(DOMAIN, {}).get(DATA_HUB)
     api = BluestarAPI(
         phone=data[CONF_PHONE],
         password=data[CONF_PASSWORD],
         base_url=data[CONF_BASE_URL],
+        rate_limiter=hub.rate_limiter if hub else None,
     )
     _LOGGER.debug("CF2 API client created")
 
@@ -54,7 +71,7 @@ async def validate_input(hass: HomeAssistant, data: Dict[str, Any]) -> Dict[str,
         async with api as api_client:
             _LOGGER.info("Attempting to connect to Bluestar API...")
             _LOGGER.debug("CF4 calling login()")
-            await api_client.login()
+            login_data = await api_client.login(connect_mqtt=False)
             _LOGGER.info("Login successful, fetching devices...")
             _LOGGER.debug("CF5 calling get_devices()")
             devices_data = await api_client.get_devices()
@@ -74,6 +91,8 @@ async def validate_input(hass: HomeAssistant, data: Dict[str, Any]) -> Dict[str,
             return {
                 "title": f"Bluestar Smart AC ({len(devices)} devices) - {connection_method}",
                 "devices": devices,
+                "login_data": login_data,
+                "devices_data": devices_data,
             }
     except BluestarAPIError as err:
         _LOGGER.error(f"CF9 Bluestar API error: {err}")
@@ -104,17 +123,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors: Dict[str, str] = {}
 
         if user_input is not None:
+            # Check if already configured before logging in
+            await self.async_set_unique_id(user_input[CONF_PHONE])
+            self._abort_if_unique_id_configured()
+
             try:
                 info = await validate_input(self.hass, user_input)
-                
-                # Check if already configured
-                await self.async_set_unique_id(user_input[CONF_PHONE])
-                self._abort_if_unique_id_configured()
-                
-                return self.async_create_entry(
-                    title=info["title"],
-                    data=user_input,
-                )
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except InvalidAuth:
@@ -122,6 +136,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
+            else:
+                self._stash_login(user_input, info)
+                return self.async_create_entry(
+                    title=info["title"],
+                    data=user_input,
+                )
 
         return self.async_show_form(
             step_id="user",
@@ -129,6 +149,29 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    @callback
+    def _stash_login(self, user_input: Dict[str, Any], info: Dict[str, Any]) -> None:
+        """Hand the validated login to the hub so setting up the entry reuses it."""
+        from .hub import BluestarHub
+
+        self.hass.data.setdefault(DOMAIN, {})
+        if DATA_HUB not in self.hass.data[DOMAIN]:
+            self.hass.data[DOMAIN][DATA_HUB] = BluestarHub(self.hass)
+        self.hass.data[DOMAIN][DATA_HUB].async_stash_login(
+            user_input[CONF_PHONE],
+            user_input[CONF_BASE_URL],
+            info["login_data"],
+            info["devices_data"],
+        )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_import(self, import_data: Dict[str, Any]) -> FlowResult:
         """Handle import from configuration.yaml."""
         return await self.async_step_user(import_data)
@@ -145,17 +188,47 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         self, user_input: Optional[Dict[str, Any]] = None
     ) -> FlowResult:
         """Manage the options."""
-        if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+        from .tracing import valid_trace_target
 
+        errors: Dict[str, str] = {}
+        if user_input is not None:
+            trace_export = user_input.get(CONF_TRACE_EXPORT, "").strip()
+            if trace_export and not valid_trace_target(trace_export):
+                errors[CONF_TRACE_EXPORT] = "invalid_trace_export"
+            else:
+                user_input[CONF_TRACE_EXPORT] = trace_export
+                return self.async_create_entry(title="", data=user_input)
+
+        options = {**self.config_entry.options, **(user_input or {})}
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(
                 {
                     vol.Optional(
                         CONF_BASE_URL,
-                        default=self.config_entry.options.get(CONF_BASE_URL, DEFAULT_BASE_URL),
+                        default=options.get(CONF_BASE_URL, DEFAULT_BASE_URL),
                     ): str,
+                    vol.Optional(
+                        CONF_MQTT_PUSH,
+                        default=options.get(CONF_MQTT_PUSH, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_TRACE_EXPORT,
+                        default=options.get(CONF_TRACE_EXPORT, ""),
+                    ): str,
+                    vol.Optional(
+                        CONF_RSSI_DEADBAND,
+                        default=options.get(CONF_RSSI_DEADBAND, DEFAULT_RSSI_DEADBAND),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=30)),
+                    vol.Optional(
+                        CONF_SENSOR_MIN_INTERVAL,
+                        default=options.get(CONF_SENSOR_MIN_INTERVAL, DEFAULT_SENSOR_MIN_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                    vol.Optional(
+                        CONF_RUNTIME_STATISTICS,
+                        default=options.get(CONF_RUNTIME_STATISTICS, False),
+                    ): bool,
                 }
             ),
+            errors=errors,
         )
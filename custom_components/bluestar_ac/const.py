@@ -8,6 +8,30 @@ CONF_MQTT_GATEWAY_URL = "mqtt_gateway_url"
 CONF_PHONE = "phone"
 CONF_PASSWORD = "password"
 CONF_BASE_URL = "base_url"
+# Option: subscribe to AWS IoT shadow update documents for push state
+CONF_MQTT_PUSH = "mqtt_push"
+# Option: export trace spans to an OTLP/HTTP collector URL or a JSON-lines file
+# in /config/bluestar_ac_traces
+CONF_TRACE_EXPORT = "trace_export"
+# Options: diagnostic sensors skip changes smaller than the deadband and
+# write at most once per minimum interval
+CONF_RSSI_DEADBAND = "rssi_deadband"
+CONF_SENSOR_MIN_INTERVAL = "sensor_min_interval"
+DEFAULT_RSSI_DEADBAND = 3  # dBm
+DEFAULT_SENSOR_MIN_INTERVAL = 60  # seconds
+# Option: import per-device runtime totals into long-term statistics
+CONF_RUNTIME_STATISTICS = "runtime_statistics"
+
+# hass.data[DOMAIN] key of the shared BluestarHub (entry ids are the other keys)
+DATA_HUB = "hub"
+
+# Services
+SERVICE_PROFILE = "profile"
+DEFAULT_PROFILE_SECONDS = 60
+
+# Request priorities (command queues and rate limiting); lower runs first
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 10
 
 # Default values
 DEFAULT_BASE_URL = "https://n3on22cp53.execute-api.ap-south-1.amazonaws.com/prod"
@@ -15,6 +39,11 @@ DEFAULT_SCAN_INTERVAL = 5  # seconds
 
 # Bluestar API endpoints
 BLUESTAR_BASE_URL = "https://n3on22cp53.execute-api.ap-south-1.amazonaws.com/prod"
+# Known hosts for the same API (AWS API Gateway and the classic host)
+BLUESTAR_BASE_URLS = (
+    BLUESTAR_BASE_URL,
+    "https://api.bluestarindia.com/prod",
+)
 LOGIN_ENDPOINT = "/auth/login"
 DEVICES_ENDPOINT = "/things"
 CONTROL_ENDPOINT = "/things/{device_id}/control"
@@ -89,6 +118,7 @@ MQTT_SRC_VALUE = "anmq"
 MQTT_FORCE_SYNC_KEY = "fpsh"
 MQTT_CONTROL_TOPIC = "things/{device_id}/control"
 MQTT_SHADOW_UPDATE_TOPIC = "$aws/things/{device_id}/shadow/update"
+MQTT_SHADOW_DOCUMENTS_TOPIC = "$aws/things/{device_id}/shadow/update/documents"
 
 # Device state keys
 STATE_POWER = "pow"
@@ -104,6 +134,22 @@ STATE_ERROR = "err"
 STATE_SOURCE = "src"
 STATE_CONNECTED = "connected"
 
+# Fields kept from each /things state document; everything else is dropped
+DEVICE_STATE_FIELDS = (
+    STATE_POWER,
+    STATE_MODE,
+    STATE_TEMP,
+    STATE_CURRENT_TEMP,
+    STATE_FAN_SPEED,
+    STATE_VERTICAL_SWING,
+    STATE_HORIZONTAL_SWING,
+    STATE_DISPLAY,
+    STATE_RSSI,
+    STATE_ERROR,
+    STATE_SOURCE,
+)
+DEVICE_STATE_META_FIELDS = (STATE_CONNECTED, "timestamp", "version")
+
 # Error messages
 ERROR_LOGIN_FAILED = "Login failed"
 ERROR_DEVICE_NOT_FOUND = "Device not found"
@@ -1,19 +1,63 @@
 """Data update coordinator for Bluestar Smart AC integration."""
 
-import asyncio
 import logging
+import time
 from datetime import timedelta
-from typing import Any, Dict, List, Optional
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Set
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .api import BluestarAPI, BluestarAPIError
-from .const import DEFAULT_SCAN_INTERVAL, DOMAIN
+from .commands import (
+    BluestarCommand,
+    BluestarCommandPipeline,
+    DisplayCommand,
+    FanCommand,
+    ModeCommand,
+    PowerCommand,
+    PriorityLimiter,
+    SetpointCommand,
+    SwingCommand,
+)
+from .const import (
+    DEFAULT_SCAN_INTERVAL,
+    DEVICE_STATE_FIELDS,
+    DOMAIN,
+    MQTT_SHADOW_DOCUMENTS_TOPIC,
+    PRIORITY_BACKGROUND,
+)
+from .fleet import BluestarFleetAggregates
+from .outbox import BluestarOutbox
+from .recorder import BluestarFlightRecorder
+from .runtime import BluestarRuntimeTracker
+from .sequences import BluestarCommandSequences
+from .state import BluestarStateStore, timestamp_ms
+from .tracing import TRACER
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _apply_control_fields(device_state: Dict[str, Any], control_data: Dict[str, Any]) -> None:
+    """Apply Bluestar control fields to a processed device state."""
+    for key, value in control_data.items():
+        if key == "pow":
+            device_state["power"] = value == 1
+        elif key == "mode":
+            device_state["mode"] = value
+        elif key == "stemp":
+            device_state["temperature"] = str(value)
+        elif key == "fspd":
+            device_state["fan_speed"] = value
+        elif key == "vswing":
+            device_state["vertical_swing"] = value
+        elif key == "hswing":
+            device_state["horizontal_swing"] = value
+        elif key == "display":
+            device_state["display"] = value != 0
+
+
 class BluestarDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching data from the Bluestar API."""
 
@@ -21,23 +65,58 @@ class BluestarDataUpdateCoordinator(DataUpdateCoordinator):
         self,
         hass: HomeAssistant,
         api: BluestarAPI,
-        scan_interval: int = DEFAULT_SCAN_INTERVAL,
+        scan_interval: Optional[int] = DEFAULT_SCAN_INTERVAL,
+        outbox: Optional[BluestarOutbox] = None,
+        runtime: Optional[BluestarRuntimeTracker] = None,
+        limiter: Optional[PriorityLimiter] = None,
+        sequences: Optional[BluestarCommandSequences] = None,
     ):
-        """Initialize the coordinator."""
+        """Initialize the coordinator.
+
+        Pass ``scan_interval=None`` when polling is driven externally, e.g. by
+        the shared ``BluestarHub`` poll loop, an ``outbox`` to keep
+        commands sent while the cloud is unreachable, a ``runtime``
+        tracker to account device on-time from the state stream, the
+        hub's shared command ``limiter`` and the entry's persisted command
+        ``sequences``.
+        """
         self.api = api
         self.devices: Dict[str, Any] = {}
-        self.states: Dict[str, Any] = {}
+        self.store = BluestarStateStore()
+        self.recorder = BluestarFlightRecorder()
+        self.runtime = runtime
+        # Aggregates over all devices, updated from each device's state changes
+        self.fleet = BluestarFleetAggregates()
+        # Per-device fields derived from (rarely changing) device metadata
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._metadata_version: Optional[int] = None
+        self._state_version: Optional[int] = None
+        self._processed: Dict[str, Dict[str, Any]] = {}
+        self._optimistic: Set[str] = set()
+        self._poll_unchanged = False
+        self._push_enabled = False
+        self._push_unsubscribers: Dict[str, Callable[[], None]] = {}
+        self.commands = BluestarCommandPipeline(
+            self, outbox=outbox, limiter=limiter, sequences=sequences
+        )
 
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=scan_interval),
+            update_interval=timedelta(seconds=scan_interval) if scan_interval else None,
         )
 
+    @property
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        """Return the reported state documents, keyed by device id."""
+        return self.store.states
+
+    @TRACER.traced("coordinator.update", root=True)
     async def _async_update_data(self) -> Dict[str, Any]:
         """Update data via library."""
         _LOGGER.debug("C1 coordinator _async_update_data() start")
+        self._poll_unchanged = False
         try:
             # Ensure we're logged in before making requests
             if not self.api.session_token:
@@ -46,48 +125,72 @@ class BluestarDataUpdateCoordinator(DataUpdateCoordinator):
             
             _LOGGER.debug("C3 fetching devices from API")
             # Get devices and states
-            data = await self.api.get_devices()
+            # Polls share the command pipeline's concurrency cap, behind user commands
+            async with self.commands.limiter.slot(PRIORITY_BACKGROUND):
+                data = await self.api.get_devices(priority=PRIORITY_BACKGROUND)
             
             _LOGGER.debug("C4 processing device data")
-            # Extract devices and states
-            self.devices = {device["thing_id"]: device for device in data.get("things", [])}
-            self.states = data.get("states", {})
-            
-            # Process device data for easier access
-            processed_devices = {}
-            for device_id, device in self.devices.items():
-                state = self.states.get(device_id, {})
-                device_state = state.get("state", {})
-                
-                processed_devices[device_id] = {
-                    "id": device_id,
-                    "name": device.get("user_config", {}).get("name", "AC"),
-                    "type": "ac",
-                    "state": {
-                        "power": device_state.get("pow", 0) == 1,
-                        "mode": device_state.get("mode", 2),
-                        "temperature": device_state.get("stemp", "24"),
-                        "current_temp": device_state.get("ctemp", "27.5"),
-                        "fan_speed": device_state.get("fspd", 2),
-                        "vertical_swing": device_state.get("vswing", 0),
-                        "horizontal_swing": device_state.get("hswing", 0),
-                        "display": device_state.get("display", 0) != 0,
-                        "connected": state.get("connected", False),
-                        "rssi": device_state.get("rssi", -45),
-                        "error": device_state.get("err", 0),
-                        "source": device_state.get("src", "unknown"),
-                        "timestamp": state.get("timestamp", 0),
-                    },
-                    "raw_device": device,
-                    "raw_state": state,
+            # Rebuild metadata only when the things list actually changed
+            cache = self.api.devices_cache
+            metadata_changed = cache.metadata_version != self._metadata_version
+            if metadata_changed:
+                self.devices = {device["thing_id"]: device for device in data.get("things", [])}
+                self._metadata = {
+                    device_id: {
+                        "id": device_id,
+                        "name": device.get("user_config", {}).get("name", "AC"),
+                        "type": "ac",
+                    }
+                    for device_id, device in self.devices.items()
                 }
-            
-            _LOGGER.debug("C5 coordinator got %d devices: %s", len(processed_devices), str(list(processed_devices.keys()))[:200])
-            
-            return {
-                "devices": processed_devices,
-                "raw_data": data,
-            }
+                self._metadata_version = cache.metadata_version
+                self.store.prune(self.devices)
+                self.recorder.prune(self.devices)
+                if self._push_enabled:
+                    self.async_enable_push()
+
+            # Merge reported states through the store; stale and duplicate
+            # documents (e.g. a poll racing an MQTT push) are dropped here
+            changed = set()
+            if cache.state_version != self._state_version or metadata_changed:
+                states = data.get("states", {})
+                for device_id in self.devices:
+                    if device_id in states and self._reduce(device_id, states[device_id], "poll"):
+                        changed.add(device_id)
+                self._state_version = cache.state_version
+
+            for device_id in changed:
+                self.commands.async_observe_state(
+                    device_id,
+                    self.states[device_id].get("state", {}),
+                    "poll",
+                    reported_ts=timestamp_ms(self.states[device_id]),
+                )
+            # Commands whose device state never changed are only caught here
+            self.commands.latency.expire()
+            # Devices showing optimistic state are rebuilt until it is confirmed or expires
+            rebuild = set(self.devices) if metadata_changed else changed | self._optimistic
+            for device_id in rebuild:
+                self.commands.async_confirm(device_id)
+                self._processed[device_id] = self._build_device(device_id)
+                self.fleet.update(device_id, self._processed[device_id]["state"])
+            for device_id in list(self._processed):
+                if device_id not in self.devices:
+                    del self._processed[device_id]
+                    self.fleet.remove(device_id)
+
+            # Nothing new: skip notifying every entity for this poll
+            self._poll_unchanged = not rebuild and self.last_update_success and self.data is not None
+
+            _LOGGER.debug(
+                "C5 coordinator got %d devices (%d changed): %s",
+                len(self._processed), len(rebuild), str(list(self._processed.keys()))[:200],
+            )
+
+            # The cloud answered: send whatever was queued during an outage
+            self.commands.async_schedule_flush()
+
+            return {"devices": self._processed}
 
         except BluestarAPIError as err:
             _LOGGER.exception("C6 coordinator BluestarAPIError: %s", err)
@@ -96,53 +199,209 @@ class BluestarDataUpdateCoordinator(DataUpdateCoordinator):
             _LOGGER.exception("C7 coordinator unexpected error: %s", err)
             raise UpdateFailed(f"Unexpected error: {err}")
 
-    async def control_device(self, device_id: str, control_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Control a device."""
+    def _reduce(
+        self, device_id: str, document: Dict[str, Any], source: str, partial: bool = False
+    ) -> bool:
+        """Merge a state document through the store, recording what happened to it."""
+        stale = self.store.dropped_stale
+        if self.store.reduce(device_id, document, partial=partial):
+            self.recorder.record(
+                device_id,
+                "state",
+                path=source,
+                version=document.get("version"),
+                detail=document.get("state"),
+            )
+            if self.runtime is not None:
+                self.runtime.async_observe(
+                    device_id, self.states[device_id], self._metadata[device_id]["name"]
+                )
+            return True
+        if self.store.dropped_stale != stale:
+            self.recorder.record(device_id, "stale", path=source, version=document.get("version"))
+        return False
+
+    def _build_device(self, device_id: str) -> Dict[str, Any]:
+        """Build a device's processed entry from its metadata and reported state."""
+        state = self.states.get(device_id, {})
+        device_state = state.get("state", {})
+
+        processed = {
+            **self._metadata[device_id],
+            "state": {
+                "power": device_state.get("pow", 0) == 1,
+                "mode": device_state.get("mode", 2),
+                "temperature": device_state.get("stemp", "24"),
+                "current_temp": device_state.get("ctemp", "27.5"),
+                "fan_speed": device_state.get("fspd", 2),
+                "vertical_swing": device_state.get("vswing", 0),
+                "horizontal_swing": device_state.get("hswing", 0),
+                "display": device_state.get("display", 0) != 0,
+                "connected": state.get("connected", False),
+                "rssi": device_state.get("rssi", -45),
+                "error": device_state.get("err", 0),
+                "source": device_state.get("src", "unknown"),
+                "timestamp": state.get("timestamp", 0),
+            },
+        }
+
+        # Keep showing commands that were sent but not reported back yet
+        pending = self.commands.pending_control_data(device_id)
+        if pending:
+            _apply_control_fields(processed["state"], pending)
+            self._optimistic.add(device_id)
+        else:
+            self._optimistic.discard(device_id)
+        return processed
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify entities, unless the poll that just finished changed nothing."""
+        if self._poll_unchanged:
+            self._poll_unchanged = False
+            return
+        super().async_update_listeners()
+
+    async def async_shutdown(self) -> None:
+        """Stop push updates and queued commands before the entry unloads."""
+        self.async_disable_push()
+        await self.commands.async_shutdown()
+        if self.runtime is not None:
+            await self.runtime.async_shutdown()
+        # DataUpdateCoordinator.async_shutdown exists from Home Assistant 2023.2
+        shutdown = getattr(super(), "async_shutdown", None)
+        if shutdown is not None:
+            await shutdown()
+
+    @callback
+    def async_enable_push(self) -> None:
+        """Subscribe to shadow update documents so state changes arrive by MQTT."""
+        self._push_enabled = True
+        client = self.api.mqtt_client
+        if client is None:
+            _LOGGER.debug("C8 MQTT not available, state stays poll-only")
+            return
+        for device_id in self.devices:
+            if device_id not in self._push_unsubscribers:
+                self._push_unsubscribers[device_id] = client.subscribe(
+                    MQTT_SHADOW_DOCUMENTS_TOPIC.format(device_id=device_id),
+                    partial(self._async_handle_shadow_documents, device_id),
+                )
+
+    @callback
+    def async_disable_push(self) -> None:
+        """Drop all shadow document subscriptions."""
+        self._push_enabled = False
+        for unsubscribe in self._push_unsubscribers.values():
+            unsubscribe()
+        self._push_unsubscribers.clear()
+
+    @callback
+    def _async_handle_shadow_documents(self, device_id: str, topic: str, payload: Any) -> None:
+        """Merge a pushed shadow document into the device state."""
+        current = payload.get("current") if isinstance(payload, dict) else None
+        if not isinstance(current, dict) or device_id not in self._metadata:
+            return
+
+        reported = current.get("state", {}).get("reported", {})
+        document: Dict[str, Any] = {
+            "state": {key: reported[key] for key in DEVICE_STATE_FIELDS if key in reported}
+        }
+        if isinstance(current.get("version"), int):
+            document["version"] = current["version"]
+        if isinstance(payload.get("timestamp"), (int, float)):
+            # Shadow documents carry epoch seconds; polled states use ms
+            document["timestamp"] = int(payload["timestamp"] * 1000)
+
+        if not self._reduce(device_id, document, "mqtt", partial=True):
+            return
+
+        self.commands.async_observe_state(
+            device_id,
+            self.states[device_id]["state"],
+            "mqtt",
+            reported_ts=document.get("timestamp"),
+        )
+        self.commands.async_confirm(device_id)
+        self._processed[device_id] = self._build_device(device_id)
+        self.fleet.update(device_id, self._processed[device_id]["state"])
+        self._poll_unchanged = False
+        self.async_update_listeners()
+
+    async def control_device(
+        self, device_id: str, control_data: Dict[str, Any], force: bool = False
+    ) -> Dict[str, Any]:
+        """Control a device with raw Bluestar control fields."""
         try:
-            # Ensure we're logged in before making requests
-            if not self.api.session_token:
-                await self.api.login()
-            
-            result = await self.api.control_device(device_id, control_data)
-            
-            # Update local state immediately for better UX
-            if device_id in self.data["devices"]:
-                device_data = self.data["devices"][device_id]
-                device_state = device_data["state"]
-                
-                # Update state with control data
-                for key, value in control_data.items():
-                    if key == "pow":
-                        device_state["power"] = value == 1
-                    elif key == "mode":
-                        device_state["mode"] = value
-                    elif key == "stemp":
-                        device_state["temperature"] = str(value)
-                    elif key == "fspd":
-                        device_state["fan_speed"] = value
-                    elif key == "vswing":
-                        device_state["vertical_swing"] = value
-                    elif key == "hswing":
-                        device_state["horizontal_swing"] = value
-                    elif key == "display":
-                        device_state["display"] = value != 0
-                
-                device_state["timestamp"] = int(asyncio.get_event_loop().time() * 1000)
-            
-            return result
+            return await self.commands.async_send_control_data(device_id, control_data, force=force)
+        except BluestarAPIError as err:
+            _LOGGER.error(f"Control failed for device {device_id}: {err}")
+            raise
 
+    async def async_send_commands(
+        self, device_id: str, *commands: BluestarCommand, force: bool = False
+    ) -> Dict[str, Any]:
+        """Send typed commands to a device through the command pipeline.
+
+        Commands that would not change the device are suppressed unless
+        ``force`` is set.
+        """
+        try:
+            return await self.commands.async_send(device_id, *commands, force=force)
         except BluestarAPIError as err:
             _LOGGER.error(f"Control failed for device {device_id}: {err}")
             raise
 
-    async def force_sync_device(self, device_id: str) -> Dict[str, Any]:
+    async def set_power(self, device_id: str, on: bool) -> Dict[str, Any]:
+        """Turn a device on or off."""
+        return await self.async_send_commands(device_id, PowerCommand(on))
+
+    async def set_mode(self, device_id: str, mode: int) -> Dict[str, Any]:
+        """Switch a device on in the given Bluestar mode."""
+        return await self.async_send_commands(device_id, PowerCommand(True), ModeCommand(mode))
+
+    async def set_temperature(self, device_id: str, temperature: float) -> Dict[str, Any]:
+        """Set a device's target temperature."""
+        return await self.async_send_commands(device_id, SetpointCommand(float(temperature)))
+
+    async def set_fan_mode(self, device_id: str, speed: int) -> Dict[str, Any]:
+        """Set a device's Bluestar fan speed."""
+        return await self.async_send_commands(device_id, FanCommand(speed))
+
+    async def set_swing(
+        self, device_id: str, vertical: Optional[int] = None, horizontal: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Set a device's vertical and/or horizontal swing."""
+        return await self.async_send_commands(device_id, SwingCommand(vertical, horizontal))
+
+    async def set_display(self, device_id: str, on: bool) -> Dict[str, Any]:
+        """Turn a device's display on or off."""
+        return await self.async_send_commands(device_id, DisplayCommand(on))
+
+    @callback
+    def async_apply_control_data(
+        self, device_id: str, control_data: Dict[str, Any], timestamp: Optional[int] = None
+    ) -> None:
+        """Apply sent control fields to the local state and notify entities.
+
+        ``timestamp`` is the command's epoch-ms timestamp; it defaults to now.
+        """
+        if not self.data or device_id not in self.data["devices"]:
+            return
+
+        device_state = self.data["devices"][device_id]["state"]
+        _apply_control_fields(device_state, control_data)
+        self._optimistic.add(device_id)
+        self.fleet.update(device_id, device_state)
+
+        device_state["timestamp"] = timestamp if timestamp is not None else int(time.time() * 1000)
+        self._poll_unchanged = False
+        self.async_update_listeners()
+
+    async def force_sync_device(self, device_id: str) -> bool:
         """Force sync a device."""
         try:
-            # Ensure we're logged in before making requests
-            if not self.api.session_token:
-                await self.api.login()
-            
-            return self.api.force_sync(device_id)
+            return await self.commands.async_force_sync(device_id)
         except BluestarAPIError as err:
             _LOGGER.error(f"Force sync failed for device {device_id}: {err}")
             raise
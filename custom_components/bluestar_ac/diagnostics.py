@@ -0,0 +1,57 @@
+"""Diagnostics support for Bluestar Smart AC integration."""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PASSWORD, CONF_PHONE, DOMAIN
+from .coordinator import BluestarDataUpdateCoordinator
+
+TO_REDACT = {
+    CONF_PASSWORD,
+    CONF_PHONE,
+    "auth_id",
+    "session",
+    "session_token",
+    "mi",
+    "X-APP-SESSION",
+    "access_key",
+    "secret_key",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: BluestarDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    api = coordinator.api
+    commands = coordinator.commands
+
+    return async_redact_data(
+        {
+            "entry": {"data": entry.data, "options": entry.options},
+            "mqtt_connected": bool(api.mqtt_client and api.mqtt_client.is_connected),
+            "endpoints": api.endpoints.as_dict(),
+            "timeouts": api.timeouts.as_dict(),
+            "rate_limits": api.rate_limiter.as_dict(),
+            "commands": {
+                "sent": commands.sent_count,
+                "suppressed": commands.suppressed_count,
+                "outbox": commands.outbox.as_dict() if commands.outbox else {},
+                "latency": commands.latency.as_dict(),
+            },
+            "state_store": {
+                "dropped_stale": coordinator.store.dropped_stale,
+                "dropped_duplicate": coordinator.store.dropped_duplicate,
+            },
+            "flight_recorder": coordinator.recorder.as_dict(),
+            "runtime": coordinator.runtime.as_dict() if coordinator.runtime else {},
+            "fleet": coordinator.fleet.as_dict(),
+            "devices": coordinator.data.get("devices", {}) if coordinator.data else {},
+        },
+        TO_REDACT,
+    )
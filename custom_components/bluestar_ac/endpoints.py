@@ -0,0 +1,204 @@
+"""API endpoint pool for Bluestar Smart AC integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from .const import BLUESTAR_BASE_URLS, DEVICES_ENDPOINT
+
+_LOGGER = logging.getLogger(__name__)
+
+EWMA_ALPHA = 0.2
+PROBE_INTERVAL = 60  # seconds
+PROBE_TIMEOUT = 5  # seconds
+# An endpoint whose smoothed error rate reaches this is avoided
+DEGRADED_ERROR_RATE = 0.5
+
+
+class EndpointHealth:
+    """Smoothed latency and error rate of one base URL."""
+
+    __slots__ = ("url", "latency", "error_rate", "requests", "failures")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def record(self, success: bool, latency: float) -> None:
+        """Fold one request or probe result into the averages."""
+        self.requests += 1
+        if not success:
+            self.failures += 1
+        self.error_rate += EWMA_ALPHA * ((0.0 if success else 1.0) - self.error_rate)
+        if success:
+            self.latency = (
+                latency
+                if self.latency is None
+                else self.latency + EWMA_ALPHA * (latency - self.latency)
+            )
+
+    @property
+    def degraded(self) -> bool:
+        """Return True if the endpoint is failing too often to be used."""
+        return self.error_rate >= DEGRADED_ERROR_RATE
+
+    @property
+    def score(self) -> float:
+        """Return a lower-is-better ranking of latency weighted by errors."""
+        if self.latency is None:
+            return float("inf")
+        return self.latency * (1 + 4 * self.error_rate)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a summary for diagnostics."""
+        return {
+            "latency": self.latency,
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "degraded": self.degraded,
+        }
+
+
+class BluestarEndpointPool:
+    """Pick the base URL requests go to, and move off it when it degrades.
+
+    Requests stick to the current endpoint while it stays healthy, so a
+    login session keeps talking to the host that issued it. Every request
+    result (and a periodic background probe of all candidates) updates the
+    endpoint's EWMA latency and error rate; once the current endpoint is
+    degraded, the healthiest alternative takes over.
+    """
+
+    def __init__(self, primary: str, candidates: Optional[Iterable[str]] = None):
+        primary = primary.rstrip("/")
+        if candidates is None:
+            # Only fan out to the known hosts when one of them is configured
+            known = tuple(url.rstrip("/") for url in BLUESTAR_BASE_URLS)
+            candidates = known if primary in known else ()
+
+        self._endpoints: Dict[str, EndpointHealth] = {primary: EndpointHealth(primary)}
+        for url in candidates:
+            url = url.rstrip("/")
+            self._endpoints.setdefault(url, EndpointHealth(url))
+        self._current = primary
+        self._probe_task: Optional[asyncio.Task] = None
+        self._stopped = False
+
+    @property
+    def current(self) -> str:
+        """Return the base URL requests should use."""
+        return self._current
+
+    @property
+    def urls(self) -> List[str]:
+        """Return every candidate base URL."""
+        return list(self._endpoints)
+
+    def record(self, url: str, success: bool, latency: float) -> None:
+        """Record a request result and fail over if the current endpoint degraded."""
+        endpoint = self._endpoints.get(url)
+        if endpoint is None:
+            return
+        endpoint.record(success, latency)
+        if url == self._current and endpoint.degraded:
+            self._select()
+
+    def _select(self) -> None:
+        """Switch to the best endpoint that is not degraded."""
+        healthy = [endpoint for endpoint in self._endpoints.values() if not endpoint.degraded]
+        if not healthy:
+            return
+        best = min(healthy, key=lambda endpoint: endpoint.score)
+        if best.url != self._current:
+            _LOGGER.warning(
+                "Bluestar API endpoint %s degraded, switching to %s", self._current, best.url
+            )
+            self._current = best.url
+
+    async def async_probe(
+        self,
+        session: aiohttp.ClientSession,
+        acquire_token: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> None:
+        """Probe every candidate once.
+
+        Any HTTP answer below 500 (the unauthenticated probe gets a 401/403)
+        means the host is reachable. ``acquire_token`` is awaited before each
+        probe so probes count against the client's rate limits.
+        """
+        await asyncio.gather(
+            *(self._async_probe_one(session, url, acquire_token) for url in self._endpoints)
+        )
+        if self._endpoints[self._current].degraded:
+            self._select()
+
+    async def _async_probe_one(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        acquire_token: Optional[Callable[[], Awaitable[Any]]],
+    ) -> None:
+        if acquire_token is not None:
+            await acquire_token()
+        start = time.monotonic()
+        try:
+            async with session.get(
+                f"{url}{DEVICES_ENDPOINT}",
+                timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT),
+            ) as response:
+                success = response.status < 500
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            success = False
+        self._endpoints[url].record(success, time.monotonic() - start)
+
+    def start_probing(
+        self,
+        session_factory: Callable[[], aiohttp.ClientSession],
+        acquire_token: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> None:
+        """Probe the candidates in the background, if there is more than one.
+
+        Raises ``RuntimeError`` once the pool was stopped.
+        """
+        if self._stopped:
+            raise RuntimeError("Endpoint pool is stopped")
+        if len(self._endpoints) < 2 or (self._probe_task and not self._probe_task.done()):
+            return
+        self._probe_task = asyncio.get_running_loop().create_task(
+            self._async_probe_loop(session_factory, acquire_token)
+        )
+
+    async def _async_probe_loop(
+        self,
+        session_factory: Callable[[], aiohttp.ClientSession],
+        acquire_token: Optional[Callable[[], Awaitable[Any]]],
+    ) -> None:
+        while True:
+            try:
+                await self.async_probe(session_factory(), acquire_token)
+            except Exception as error:  # pylint: disable=broad-except
+                _LOGGER.debug("Endpoint probe failed: %s", error)
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    async def async_stop(self) -> None:
+        """Stop background probing for good."""
+        self._stopped = True
+        task, self._probe_task = self._probe_task, None
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the current endpoint and per-endpoint health for diagnostics."""
+        return {
+            "current": self._current,
+            "endpoints": {url: endpoint.as_dict() for url, endpoint in self._endpoints.items()},
+        }
@@ -0,0 +1,95 @@
+"""Fleet-wide aggregates for Bluestar Smart AC integration."""
+from __future__ import annotations
+
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class _Contribution(NamedTuple):
+    """What one device currently adds to the aggregates."""
+
+    on: bool
+    temperature: Optional[float]
+    error: bool
+    disconnected: bool
+
+
+class BluestarFleetAggregates:
+    """Running counts and sums over every device of a config entry.
+
+    Each device's previous contribution is kept, so a state update only
+    subtracts the old one and adds the new one: O(1) per update, without
+    rescanning the fleet. Disconnected units count as neither on nor in
+    the temperature average, since their last report may be stale.
+    """
+
+    def __init__(self):
+        self._contributions: Dict[str, _Contribution] = {}
+        self.on = 0
+        self.errors = 0
+        self.disconnected = 0
+        self._temperature_sum = 0.0
+        self._temperature_count = 0
+
+    def __len__(self) -> int:
+        return len(self._contributions)
+
+    @staticmethod
+    def _contribution(state: Dict[str, Any]) -> _Contribution:
+        connected = bool(state.get("connected", False))
+        temperature = None
+        if connected:
+            try:
+                temperature = float(state.get("current_temp"))
+            except (TypeError, ValueError):
+                pass
+        return _Contribution(
+            on=connected and bool(state.get("power")),
+            temperature=temperature,
+            error=bool(state.get("error")),
+            disconnected=not connected,
+        )
+
+    def _apply(self, contribution: _Contribution, sign: int) -> None:
+        self.on += sign * contribution.on
+        self.errors += sign * contribution.error
+        self.disconnected += sign * contribution.disconnected
+        if contribution.temperature is not None:
+            self._temperature_sum += sign * contribution.temperature
+            self._temperature_count += sign
+            if not self._temperature_count:
+                # Reset rather than carry float rounding error forward
+                self._temperature_sum = 0.0
+
+    def update(self, device_id: str, state: Dict[str, Any]) -> None:
+        """Replace a device's contribution with one from its processed state."""
+        contribution = self._contribution(state)
+        previous = self._contributions.get(device_id)
+        if previous == contribution:
+            return
+        if previous is not None:
+            self._apply(previous, -1)
+        self._apply(contribution, 1)
+        self._contributions[device_id] = contribution
+
+    def remove(self, device_id: str) -> None:
+        """Drop a device that left the account."""
+        previous = self._contributions.pop(device_id, None)
+        if previous is not None:
+            self._apply(previous, -1)
+
+    @property
+    def average_temperature(self) -> Optional[float]:
+        """Return the average room temperature of connected units."""
+        if not self._temperature_count:
+            return None
+        return round(self._temperature_sum / self._temperature_count, 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the aggregates for diagnostics."""
+        return {
+            "devices": len(self),
+            "on": self.on,
+            "average_temperature": self.average_temperature,
+            "errors": self.errors,
+            "disconnected": self.disconnected,
+        }
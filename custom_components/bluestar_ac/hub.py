@@ -0,0 +1,210 @@
+"""Domain-level hub for Bluestar Smart AC integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .api import BluestarAPI, BluestarRateLimiter
+from .commands import MAX_CONCURRENT_COMMANDS, PriorityLimiter
+from .const import DEFAULT_SCAN_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+# How long a config flow's login stays available to the entry it creates
+VALIDATED_LOGIN_TTL = 120  # seconds
+
+
+class BluestarHubAccount:
+    """One logged-in Bluestar account shared by every config entry using it."""
+
+    def __init__(self, key: str, api: BluestarAPI):
+        self.key = key
+        self.api = api
+        self.entry_ids: Set[str] = set()
+        self.lock = asyncio.Lock()
+
+
+class BluestarHub:
+    """Share API sessions, MQTT connections and the poll loop across config entries.
+
+    Config entries for the same phone number (and base URL) reuse a single
+    ``BluestarAPI`` - and therefore a single login, HTTP session and MQTT
+    connection. Coordinators are polled round-robin from one timer so that
+    accounts are spread evenly over the scan interval instead of all hitting
+    ``/things`` on the same tick. Commands and polls of every entry share
+    one concurrency ``limiter``, and every account's requests share one
+    ``rate_limiter``; both live and die with the hub, not the module.
+    """
+
+    def __init__(self, hass: HomeAssistant, scan_interval: int = DEFAULT_SCAN_INTERVAL):
+        self.hass = hass
+        self.scan_interval = scan_interval
+        self._accounts: Dict[str, BluestarHubAccount] = {}
+        self._coordinators: List[Any] = []
+        self._polling: Set[int] = set()
+        self._cursor = 0
+        self._unsub_poll: Optional[Callable[[], None]] = None
+        self.limiter = PriorityLimiter(MAX_CONCURRENT_COMMANDS)
+        self.rate_limiter = BluestarRateLimiter()
+        # account key -> (expiry, login data, /things snapshot) from config flows
+        self._validated: Dict[str, Tuple[float, Dict[str, Any], Dict[str, Any]]] = {}
+
+    @staticmethod
+    def account_key(phone: str, base_url: Optional[str]) -> str:
+        """Return the key identifying a shareable account session."""
+        return f"{phone.strip()}@{(base_url or '').rstrip('/')}"
+
+    @callback
+    def async_stash_login(
+        self,
+        phone: str,
+        base_url: Optional[str],
+        login_data: Dict[str, Any],
+        devices: Dict[str, Any],
+    ) -> None:
+        """Keep a config flow's login so setting up the new entry can reuse it."""
+        self._validated[self.account_key(phone, base_url)] = (
+            time.monotonic() + VALIDATED_LOGIN_TTL,
+            login_data,
+            devices,
+        )
+
+    def _pop_validated(self, key: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Return and forget a stashed login for an account, if still fresh."""
+        validated = self._validated.pop(key, None)
+        if validated is None or validated[0] <= time.monotonic():
+            return None
+        return validated[1], validated[2]
+
+    async def async_acquire_api(
+        self,
+        entry_id: str,
+        phone: str,
+        password: str,
+        base_url: Optional[str],
+        api_factory: Callable[..., BluestarAPI] = BluestarAPI,
+    ) -> BluestarAPI:
+        """Return a logged-in API client for an account, creating it if needed."""
+        key = self.account_key(phone, base_url)
+        account = self._accounts.get(key)
+        if account is None:
+            _LOGGER.debug("H1 creating shared API session for %s", phone)
+            account = BluestarHubAccount(
+                key,
+                api_factory(
+                    phone=phone,
+                    password=password,
+                    base_url=base_url,
+                    rate_limiter=self.rate_limiter,
+                ),
+            )
+            self._accounts[key] = account
+        else:
+            _LOGGER.debug("H2 reusing shared API session for %s", phone)
+
+        try:
+            async with account.lock:
+                if not account.api.session_token:
+                    validated = self._pop_validated(key)
+                    if validated is not None:
+                        _LOGGER.debug("H6 reusing config flow login for %s", phone)
+                        await account.api.async_restore_login(*validated)
+                    else:
+                        await account.api.login()
+        except Exception:
+            if not account.entry_ids and self._accounts.get(key) is account:
+                self._accounts.pop(key)
+                await account.api.close()
+            raise
+
+        account.entry_ids.add(entry_id)
+        return account.api
+
+    async def async_release_api(self, entry_id: str) -> None:
+        """Drop an entry's reference to its account, closing it when unused."""
+        for key, account in list(self._accounts.items()):
+            if entry_id not in account.entry_ids:
+                continue
+            account.entry_ids.discard(entry_id)
+            if not account.entry_ids:
+                _LOGGER.debug("H3 closing shared API session %s", key)
+                self._accounts.pop(key)
+                await account.api.close()
+
+    @callback
+    def async_add_coordinator(self, coordinator: Any) -> None:
+        """Add a coordinator to the shared, staggered poll loop."""
+        if coordinator not in self._coordinators:
+            self._coordinators.append(coordinator)
+            self._async_reschedule()
+
+    @callback
+    def async_remove_coordinator(self, coordinator: Any) -> None:
+        """Remove a coordinator from the shared poll loop."""
+        if coordinator in self._coordinators:
+            self._coordinators.remove(coordinator)
+            self._polling.discard(id(coordinator))
+            self._async_reschedule()
+
+    @property
+    def is_idle(self) -> bool:
+        """Return True when no accounts or coordinators are registered."""
+        return not self._accounts and not self._coordinators
+
+    @callback
+    def _async_reschedule(self) -> None:
+        """Spread one poll per coordinator evenly over the scan interval."""
+        if self._unsub_poll:
+            self._unsub_poll()
+            self._unsub_poll = None
+
+        if not self._coordinators:
+            return
+
+        slot = self.scan_interval / len(self._coordinators)
+        _LOGGER.debug(
+            "H4 polling %d coordinators every %.2fs each (slot %.2fs)",
+            len(self._coordinators), self.scan_interval, slot,
+        )
+        self._unsub_poll = async_track_time_interval(
+            self.hass, self._async_poll_next, timedelta(seconds=slot)
+        )
+
+    @callback
+    def _async_poll_next(self, now: datetime) -> None:
+        """Refresh the next coordinator in round-robin order."""
+        if not self._coordinators:
+            return
+
+        coordinator = self._coordinators[self._cursor % len(self._coordinators)]
+        self._cursor += 1
+
+        # Skip a slot rather than stacking refreshes behind a slow account
+        if id(coordinator) in self._polling:
+            _LOGGER.debug("H5 previous refresh still running, skipping slot")
+            return
+
+        self._polling.add(id(coordinator))
+        self.hass.async_create_task(self._async_refresh(coordinator))
+
+    async def _async_refresh(self, coordinator: Any) -> None:
+        """Run one coordinator refresh and clear its in-flight marker."""
+        try:
+            await coordinator.async_refresh()
+        finally:
+            self._polling.discard(id(coordinator))
+
+    async def async_shutdown(self) -> None:
+        """Stop polling and close every shared session."""
+        self._coordinators.clear()
+        self._async_reschedule()
+        for account in list(self._accounts.values()):
+            await account.api.close()
+        self._accounts.clear()
+        self.rate_limiter.close()
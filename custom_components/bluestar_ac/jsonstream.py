@@ -0,0 +1,197 @@
+"""Incremental JSON parsing of /things responses for Bluestar Smart AC integration."""
+import codecs
+import json
+import re
+from typing import List, Optional, Tuple
+
+# Top-level keys whose members are emitted one element at a time
+STREAMED_SECTIONS = ("things", "states")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_SEPARATORS = re.compile(r"[ \t\n\r,]*")
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRING_TAIL = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR = re.compile(r'[^,}\]\s]*')
+
+# Parser states
+_START = 0
+_KEY = 1
+_SKIP_VALUE = 2
+_SECTION = 3
+_DONE = 4
+
+
+def _string_end(text: str, pos: int) -> Optional[int]:
+    """Return the index after the string starting at ``pos``, or None if truncated."""
+    match = _STRING_TAIL.match(text, pos + 1)
+    return match.end() if match else None
+
+
+def _value_end(text: str, pos: int) -> Optional[int]:
+    """Return the index after the JSON value starting at ``pos``, or None if truncated.
+
+    Values are delimited, not decoded: containers are matched bracket by
+    bracket while skipping over string contents.
+    """
+    char = text[pos]
+    if char == '"':
+        return _string_end(text, pos)
+
+    if char not in "{[":
+        end = _SCALAR.match(text, pos).end()
+        # A scalar is only complete once the following delimiter has arrived
+        return end if end < len(text) else None
+
+    depth = 0
+    while True:
+        match = _STRUCTURAL.search(text, pos)
+        if match is None:
+            return None
+        char = match.group()
+        pos = match.end()
+        if char == '"':
+            pos = _string_end(text, pos - 1)
+            if pos is None:
+                return None
+        elif char in "{[":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos
+
+
+class ThingsStreamParser:
+    """Push parser that walks a ``/things`` body chunk by chunk.
+
+    ``feed`` returns ``(section, key, raw)`` tuples for every complete member
+    of ``things`` (key is None) and ``states`` (key is the thing id). ``raw``
+    is the member's undecoded JSON text, so callers can hash it and skip
+    decoding unchanged members. Only the current, incomplete member is kept
+    buffered, so memory does not grow with the size of the fleet.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = _START
+        self._section: Optional[str] = None
+        self._section_close = ""
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, Optional[str], str]]:
+        """Consume a chunk of the body and return the members it completed."""
+        self._buffer = self._buffer[self._pos:] + self._decoder.decode(chunk)
+        self._pos = 0
+        members: List[Tuple[str, Optional[str], str]] = []
+        while self._step(members):
+            pass
+        return members
+
+    def close(self) -> None:
+        """Check that the whole document has been consumed.
+
+        Raises ValueError (like ``json.loads``) for truncated or malformed bodies.
+        """
+        self._buffer = self._buffer[self._pos:] + self._decoder.decode(b"", final=True)
+        self._pos = 0
+        if self._state != _DONE:
+            raise ValueError("Truncated or invalid /things response")
+
+    def _skip(self, pattern: "re.Pattern") -> Optional[str]:
+        """Skip characters matching pattern and return the next one, if buffered."""
+        self._pos = pattern.match(self._buffer, self._pos).end()
+        return self._buffer[self._pos] if self._pos < len(self._buffer) else None
+
+    def _read_key(self) -> Optional[str]:
+        """Read an object key and its colon, or return None if not yet buffered."""
+        end = _string_end(self._buffer, self._pos)
+        if end is None:
+            return None
+        colon = _WHITESPACE.match(self._buffer, end).end()
+        if colon >= len(self._buffer):
+            return None
+        if self._buffer[colon] != ":":
+            raise ValueError("Invalid /things response: expected ':'")
+        key = json.loads(self._buffer[self._pos:end])
+        self._pos = colon + 1
+        return key
+
+    def _step(self, members: List[Tuple[str, Optional[str], str]]) -> bool:
+        """Advance the state machine by one token; False when more input is needed."""
+        if self._state == _START:
+            char = self._skip(_WHITESPACE)
+            if char is None:
+                return False
+            if char != "{":
+                raise ValueError("Invalid /things response: expected an object")
+            self._pos += 1
+            self._state = _KEY
+            return True
+
+        if self._state == _KEY:
+            char = self._skip(_SEPARATORS)
+            if char is None:
+                return False
+            if char == "}":
+                self._pos += 1
+                self._state = _DONE
+                return True
+            start = self._pos
+            key = self._read_key()
+            if key is None:
+                return False
+            char = self._skip(_WHITESPACE)
+            if char is None:
+                # Re-read the key once the value starts arriving
+                self._pos = start
+                return False
+            if key in STREAMED_SECTIONS and char in "[{":
+                self._section = key
+                self._section_close = "]" if char == "[" else "}"
+                self._pos += 1
+                self._state = _SECTION
+            else:
+                self._state = _SKIP_VALUE
+            return True
+
+        if self._state == _SKIP_VALUE:
+            char = self._skip(_WHITESPACE)
+            if char is None:
+                return False
+            end = _value_end(self._buffer, self._pos)
+            if end is None:
+                return False
+            self._pos = end
+            self._state = _KEY
+            return True
+
+        if self._state == _SECTION:
+            char = self._skip(_SEPARATORS)
+            if char is None:
+                return False
+            if char == self._section_close:
+                self._pos += 1
+                self._state = _KEY
+                return True
+
+            start = self._pos
+            key = None
+            if self._section_close == "}":
+                key = self._read_key()
+                if key is None:
+                    return False
+                if self._skip(_WHITESPACE) is None:
+                    self._pos = start
+                    return False
+            end = _value_end(self._buffer, self._pos)
+            if end is None:
+                self._pos = start
+                return False
+            members.append((self._section, key, self._buffer[self._pos:end]))
+            self._pos = end
+            return True
+
+        # _DONE: ignore trailing whitespace
+        self._pos = len(self._buffer)
+        return False
@@ -0,0 +1,251 @@
+"""Command-to-applied latency tracking for Bluestar Smart AC integration."""
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+# A command whose fields are not reported within this time is flagged
+COMMAND_APPLY_TIMEOUT = 60  # seconds
+LATENCY_SAMPLES = 100
+# Allowed difference between our clock and the cloud's report timestamps
+CLOCK_SKEW_TOLERANCE = 2000  # ms
+
+# Adaptive HTTP timeouts: p99 of recent request durations times a factor,
+# clamped; the ceiling applies until enough samples are collected
+TIMEOUT_SAMPLES = 200
+TIMEOUT_MIN_SAMPLES = 20
+TIMEOUT_MULTIPLIER = 3.0
+TIMEOUT_FLOOR = 3.0  # seconds
+TIMEOUT_CEILING = 30.0  # seconds
+
+
+class _OutstandingCommand:
+    """A sent command waiting for a state report that shows it applied."""
+
+    __slots__ = ("fields", "path", "sent_at", "seq", "ts")
+
+    def __init__(
+        self,
+        fields: Dict[str, Any],
+        path: str,
+        sent_at: float,
+        seq: Optional[int] = None,
+        ts: Optional[int] = None,
+    ):
+        self.fields = fields
+        self.path = path
+        self.sent_at = sent_at
+        self.seq = seq
+        self.ts = ts
+
+
+class LatencyStats:
+    """Rolling publish-to-applied latencies for one device and control path."""
+
+    def __init__(self):
+        self.samples: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.applied = 0
+        self.timed_out = 0
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Return a percentile of the recent samples, in seconds."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a summary for diagnostics."""
+        return {
+            "applied": self.applied,
+            "timed_out": self.timed_out,
+            "last": self.samples[-1] if self.samples else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": max(self.samples) if self.samples else None,
+        }
+
+
+class CommandLatencyTracker:
+    """Correlate outgoing commands with later reported device state.
+
+    Each sent command is remembered with its (normalized) fields, the path it
+    took and when it was sent. Every state report - from a poll or an MQTT
+    push - is matched against the outstanding commands of that device; a
+    command counts as applied once all of its fields are reported, and as
+    timed out if that does not happen within ``COMMAND_APPLY_TIMEOUT``
+    (checked by ``expire`` on every poll).
+    """
+
+    def __init__(self, timeout: float = COMMAND_APPLY_TIMEOUT):
+        self.timeout = timeout
+        self._outstanding: Dict[str, List[_OutstandingCommand]] = {}
+        self.stats: Dict[Tuple[str, str], LatencyStats] = {}
+
+    def record_sent(
+        self,
+        device_id: str,
+        fields: Dict[str, Any],
+        path: str,
+        sent_at: Optional[float] = None,
+        seq: Optional[int] = None,
+        ts: Optional[int] = None,
+    ) -> None:
+        """Remember a command that was handed to the cloud.
+
+        ``seq`` is the pipeline's per-device sequence number and ``ts`` the
+        command's epoch-ms timestamp.
+        """
+        if not fields:
+            return
+        outstanding = self._outstanding.setdefault(device_id, [])
+
+        # A newer command for the same field supersedes the older one
+        for command in list(outstanding):
+            for key in fields:
+                command.fields.pop(key, None)
+            if not command.fields:
+                outstanding.remove(command)
+
+        outstanding.append(
+            _OutstandingCommand(
+                dict(fields),
+                path,
+                sent_at if sent_at is not None else time.monotonic(),
+                seq,
+                ts,
+            )
+        )
+
+    def observe(
+        self,
+        device_id: str,
+        reported: Dict[str, Any],
+        source: str,
+        observed_at: Optional[float] = None,
+        reported_ts: Optional[float] = None,
+    ) -> None:
+        """Match a (normalized) state report against the device's outstanding commands.
+
+        A report whose epoch-ms ``reported_ts`` predates a command is an
+        echo of the older state and cannot confirm that command.
+        """
+        outstanding = self._outstanding.get(device_id)
+        if not outstanding:
+            return
+
+        now = observed_at if observed_at is not None else time.monotonic()
+        for command in list(outstanding):
+            stats = self.stats.setdefault((device_id, command.path), LatencyStats())
+            stale = (
+                reported_ts is not None
+                and command.ts is not None
+                and reported_ts + CLOCK_SKEW_TOLERANCE < command.ts
+            )
+            if not stale and all(reported.get(key) == value for key, value in command.fields.items()):
+                latency = max(0.0, now - command.sent_at)
+                stats.samples.append(latency)
+                stats.applied += 1
+                outstanding.remove(command)
+                _LOGGER.debug(
+                    "L1 %s applied #%s %s via %s in %.2fs (seen by %s)",
+                    device_id, command.seq, command.fields, command.path, latency, source,
+                )
+            elif now - command.sent_at > self.timeout:
+                self._time_out(device_id, command)
+                outstanding.remove(command)
+
+        if not outstanding:
+            del self._outstanding[device_id]
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Flag every outstanding command older than the timeout; return how many.
+
+        ``observe`` only runs for devices whose state changed, so a command
+        the device never applied (leaving its state untouched) is caught here.
+        """
+        now = now if now is not None else time.monotonic()
+        expired = 0
+        for device_id, outstanding in list(self._outstanding.items()):
+            for command in list(outstanding):
+                if now - command.sent_at > self.timeout:
+                    self._time_out(device_id, command)
+                    outstanding.remove(command)
+                    expired += 1
+            if not outstanding:
+                del self._outstanding[device_id]
+        return expired
+
+    def _time_out(self, device_id: str, command: _OutstandingCommand) -> None:
+        self.stats.setdefault((device_id, command.path), LatencyStats()).timed_out += 1
+        _LOGGER.warning(
+            "Command %s to %s via %s not applied after %ds",
+            command.fields, device_id, command.path, self.timeout,
+        )
+
+    def pending_count(self, device_id: Optional[str] = None) -> int:
+        """Return the number of commands still waiting to be applied."""
+        if device_id is not None:
+            return len(self._outstanding.get(device_id, ()))
+        return sum(len(commands) for commands in self._outstanding.values())
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return per-device, per-path latency summaries for diagnostics."""
+        summary: Dict[str, Any] = {}
+        for (device_id, path), stats in self.stats.items():
+            summary.setdefault(device_id, {})[path] = stats.as_dict()
+        return summary
+
+
+class AdaptiveTimeouts:
+    """Per-endpoint request timeouts derived from recent request durations.
+
+    Each endpoint (login, things, control, ...) keeps a rolling window of
+    successful request durations; its timeout is ``p99 * multiplier``,
+    clamped to ``[floor, ceiling]``. A slow host therefore fails fast once
+    its normal latency is known, instead of holding callers for the full
+    ceiling. A request that timed out is sampled at the timeout it hit, so
+    repeated timeouts widen the timeout again instead of never being seen.
+    """
+
+    def __init__(
+        self,
+        multiplier: float = TIMEOUT_MULTIPLIER,
+        floor: float = TIMEOUT_FLOOR,
+        ceiling: float = TIMEOUT_CEILING,
+    ):
+        self.multiplier = multiplier
+        self.floor = floor
+        self.ceiling = ceiling
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, endpoint: str, duration: float) -> None:
+        """Add the duration of a successful request."""
+        samples = self._samples.get(endpoint)
+        if samples is None:
+            samples = self._samples[endpoint] = deque(maxlen=TIMEOUT_SAMPLES)
+        samples.append(duration)
+
+    def record_timeout(self, endpoint: str) -> None:
+        """Count a request that hit its timeout as having taken that long."""
+        self.record(endpoint, self.timeout(endpoint))
+
+    def timeout(self, endpoint: str) -> float:
+        """Return the timeout, in seconds, for the next request to an endpoint."""
+        samples = self._samples.get(endpoint)
+        if not samples or len(samples) < TIMEOUT_MIN_SAMPLES:
+            return self.ceiling
+        ordered = sorted(samples)
+        p99 = ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+        return min(self.ceiling, max(self.floor, p99 * self.multiplier))
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return per-endpoint sample counts and current timeouts for diagnostics."""
+        return {
+            endpoint: {"samples": len(samples), "timeout": self.timeout(endpoint)}
+            for endpoint, samples in self._samples.items()
+        }
@@ -0,0 +1,394 @@
+"""MQTT transport for Bluestar Smart AC integration.
+
+Imported lazily by ``api.py`` only once a login returns MQTT (``mi``)
+credentials, so loading the integration does not pay for paho-mqtt and ssl.
+"""
+import asyncio
+import json
+import logging
+import socket
+import ssl
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import paho.mqtt.client as mqtt_client
+
+_LOGGER = logging.getLogger(__name__)
+
+MQTT_PORT = 443
+MQTT_KEEPALIVE = 10  # seconds
+MQTT_CONNECT_TIMEOUT = 10  # seconds
+BROKER_DNS_TTL = 300  # seconds
+
+# Control messages use QoS1 so a silently dropped publish falls back to HTTP
+MQTT_CONTROL_QOS = 1
+MQTT_INFLIGHT_WINDOW = 10
+MQTT_PUBACK_TIMEOUT = 3  # seconds
+
+# Shared across every MQTT client (and reconnect) in this process
+_SSL_CONTEXT: Optional[ssl.SSLContext] = None
+_SSL_CONTEXT_LOCK = asyncio.Lock()
+_BROKER_ADDRESSES: Dict[Tuple[str, int], Tuple[float, List[Tuple[Any, ...]]]] = {}
+_TLS_SESSIONS: Dict[str, ssl.SSLSession] = {}
+
+
+def _create_no_verify_ssl_context() -> ssl.SSLContext:
+    """Create the TLS context used for the broker (no certificate verification).
+
+    Verification is disabled anyway, so the CA bundle is never loaded.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+async def async_get_ssl_context() -> ssl.SSLContext:
+    """Return the process-wide TLS context for the MQTT broker."""
+    global _SSL_CONTEXT
+    if _SSL_CONTEXT is not None:
+        return _SSL_CONTEXT
+
+    async with _SSL_CONTEXT_LOCK:
+        if _SSL_CONTEXT is None:
+            try:
+                # Home Assistant builds and caches this once at startup
+                from homeassistant.util.ssl import get_default_no_verify_context
+
+                _SSL_CONTEXT = get_default_no_verify_context()
+            except ImportError:
+                loop = asyncio.get_running_loop()
+                _SSL_CONTEXT = await loop.run_in_executor(None, _create_no_verify_ssl_context)
+    return _SSL_CONTEXT
+
+
+async def async_resolve_broker(host: str, port: int = MQTT_PORT) -> List[Tuple[Any, ...]]:
+    """Resolve the broker address without blocking the event loop, with caching."""
+    key = (host, port)
+    cached = _BROKER_ADDRESSES.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except OSError as error:
+        if cached:
+            _LOGGER.warning(f"⚠️ Broker DNS lookup failed, using stale address: {error}")
+            return cached[1]
+        raise
+
+    addresses = [info[4] for info in infos]
+    _BROKER_ADDRESSES[key] = (time.monotonic() + BROKER_DNS_TTL, addresses)
+    return addresses
+
+
+class _SessionReusingSSLContext:
+    """Wrap an SSLContext so reconnects resume the previous TLS session."""
+
+    def __init__(self, context: ssl.SSLContext, session_key: str):
+        self._context = context
+        self._session_key = session_key
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._context, name)
+
+    def wrap_socket(self, sock, *args, **kwargs):
+        session = _TLS_SESSIONS.get(self._session_key)
+        if session is not None:
+            kwargs.setdefault("session", session)
+        try:
+            return self._context.wrap_socket(sock, *args, **kwargs)
+        except ValueError:
+            # Session does not belong to this context/server any more
+            _TLS_SESSIONS.pop(self._session_key, None)
+            kwargs.pop("session", None)
+            return self._context.wrap_socket(sock, *args, **kwargs)
+
+
+class _BluestarPahoClient(mqtt_client.Client):
+    """paho client that connects to pre-resolved broker addresses."""
+
+    resolved_addresses: List[Tuple[Any, ...]] = []
+
+    def _create_socket_connection(self):
+        for address in self.resolved_addresses:
+            try:
+                return socket.create_connection(address[:2], timeout=MQTT_CONNECT_TIMEOUT)
+            except OSError:
+                continue
+        # Nothing cached (or all stale) - let paho resolve the hostname
+        return super()._create_socket_connection()
+
+
+class BluestarMQTTClient:
+    """MQTT client for Bluestar Smart AC control."""
+    
+    def __init__(
+        self,
+        credentials: Dict[str, str],
+        control_qos: int = MQTT_CONTROL_QOS,
+        inflight_window: int = MQTT_INFLIGHT_WINDOW,
+        puback_timeout: float = MQTT_PUBACK_TIMEOUT,
+    ):
+        self.credentials = credentials
+        self.control_qos = control_qos
+        self.inflight_window = inflight_window
+        self.puback_timeout = puback_timeout
+        self.client = None
+        self.is_connected = False
+        self.client_id = f"u-{credentials['session_id']}"
+        
+        # EXACT CONSTANTS FROM DECOMPILED APP
+        self.FORCE_FETCH_KEY_NAME = "fpsh"
+        self.PUB_CONTROL_TOPIC_NAME = "things/%s/control"
+        self.PUB_STATE_UPDATE_TOPIC_NAME = "$aws/things/%s/shadow/update"
+        self.SRC_KEY = "src"
+        self.SRC_VALUE = "anmq"
+
+        # Topic -> listeners; one broker subscription per topic however many
+        # entries or entities are interested in it
+        self._listeners: Dict[str, List[Callable[[str, Any], None]]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connected_event: Optional[asyncio.Event] = None
+        # mid -> future resolved by the PUBACK; bounded by the in-flight window
+        self._inflight: Dict[int, asyncio.Future] = {}
+        self._inflight_window = asyncio.Semaphore(inflight_window)
+        # TrafficRecorder set by BluestarAPI while recording
+        self.traffic = None
+        
+        _LOGGER.info("🔧 Bluestar MQTT Client created")
+    
+    async def connect(self) -> bool:
+        """Connect to MQTT broker."""
+        try:
+            self.client = _BluestarPahoClient(client_id=self.client_id, callback_api_version=mqtt_client.CallbackAPIVersion.VERSION1)
+            self._loop = asyncio.get_running_loop()
+            self._connected_event = asyncio.Event()
+            endpoint = self.credentials["endpoint"]
+
+            # Cached TLS context + resumed TLS session and pre-resolved broker
+            # address, so reconnects skip the CA load, DNS and full handshake
+            context = await async_get_ssl_context()
+            self.client.tls_set_context(_SessionReusingSSLContext(context, endpoint))
+            try:
+                self.client.resolved_addresses = await async_resolve_broker(endpoint, MQTT_PORT)
+            except OSError as error:
+                _LOGGER.warning(f"⚠️ Broker DNS pre-resolution failed: {error}")
+            
+            # Set up event handlers
+            self.client.on_connect = self._on_connect
+            self.client.on_disconnect = self._on_disconnect
+            self.client.on_error = self._on_error
+            self.client.on_message = self._on_message
+            self.client.on_publish = self._on_publish
+            self.client.max_inflight_messages_set(self.inflight_window)
+            
+            # Connect to broker from paho's network thread so the TCP connect
+            # and TLS handshake never block the event loop
+            _LOGGER.info(f"🔌 Connecting to MQTT broker: {endpoint}")
+            
+            self.client.connect_async(endpoint, MQTT_PORT, MQTT_KEEPALIVE)
+            self.client.loop_start()
+            
+            # Wait for CONNACK
+            try:
+                await asyncio.wait_for(self._connected_event.wait(), MQTT_CONNECT_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            
+            if self.is_connected:
+                _LOGGER.info("✅ MQTT Connected successfully")
+                return True
+            else:
+                _LOGGER.warning("⚠️ MQTT connection timeout - continuing with HTTP API only")
+                # Clean up failed connection
+                try:
+                    await self.async_disconnect()
+                except Exception:  # pylint: disable=broad-except
+                    pass
+                return False
+                
+        except Exception as error:
+            _LOGGER.error(f"❌ Failed to connect to MQTT: {error}")
+            return False
+    
+    def _on_connect(self, client, userdata, flags, rc):
+        """Handle MQTT connection."""
+        if rc == 0:
+            self.is_connected = True
+            _LOGGER.info("🔗 MQTT Connected successfully")
+            # Keep the TLS session so the next reconnect can resume it
+            sock = client.socket()
+            session = getattr(sock, "session", None)
+            if session is not None:
+                _TLS_SESSIONS[self.credentials["endpoint"]] = session
+            if self._loop is not None and self._connected_event is not None:
+                self._loop.call_soon_threadsafe(self._connected_event.set)
+            # Restore subscriptions after a (re)connect; the event loop may
+            # add or drop topics meanwhile, so iterate over a snapshot
+            for topic in list(self._listeners):
+                client.subscribe(topic, qos=0)
+        else:
+            _LOGGER.error(f"❌ MQTT Connection failed with code {rc}")
+            self.is_connected = False
+    
+    def _on_disconnect(self, client, userdata, rc):
+        """Handle MQTT disconnection."""
+        self.is_connected = False
+        _LOGGER.info("📴 MQTT Disconnected")
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._fail_inflight)
+    
+    def _on_error(self, client, userdata, error):
+        """Handle MQTT errors."""
+        _LOGGER.error(f"❌ MQTT Error: {error}")
+        self.is_connected = False
+    
+    def _on_message(self, client, userdata, message):
+        """Fan an incoming message out to every listener of its topic."""
+        listeners = self._listeners.get(message.topic)
+        if not listeners or self._loop is None:
+            return
+
+        try:
+            payload = json.loads(message.payload)
+        except ValueError:
+            _LOGGER.debug(f"Ignoring non-JSON MQTT message on {message.topic}")
+            return
+        if self.traffic is not None:
+            self.traffic.record_mqtt("recv", message.topic, payload)
+
+        # paho calls us from its network thread; listeners run on the event loop
+        for listener in list(listeners):
+            self._loop.call_soon_threadsafe(listener, message.topic, payload)
+
+    def subscribe(self, topic: str, listener: Callable[[str, Any], None]) -> Callable[[], None]:
+        """Register a listener for a topic and return a callable that removes it.
+
+        The broker subscription is shared: it is made for the first listener
+        of a topic and dropped with the last one.
+        """
+        listeners = self._listeners.setdefault(topic, [])
+        if not listeners and self.client and self.is_connected:
+            self.client.subscribe(topic, qos=0)
+        listeners.append(listener)
+
+        def _unsubscribe() -> None:
+            if listener in listeners:
+                listeners.remove(listener)
+            if not listeners and self._listeners.get(topic) is listeners:
+                del self._listeners[topic]
+                if self.client and self.is_connected:
+                    self.client.unsubscribe(topic)
+
+        return _unsubscribe
+
+    async def async_publish(self, device_id: str, control_payload: Dict[str, Any]) -> bool:
+        """Publish control command via MQTT.
+
+        With QoS1 (the default for control) this only returns True once the
+        broker has acknowledged the message.
+        """
+        # Step 1: Add src key (EXACT from decompiled app)
+        control_payload[self.SRC_KEY] = self.SRC_VALUE
+        
+        # Step 2: Create desired object
+        desired_object = control_payload.copy()
+        
+        # Step 3: Create state object
+        state_object = {
+            "state": {
+                "desired": desired_object
+            }
+        }
+        
+        # Step 4: Format topic
+        topic = self.PUB_STATE_UPDATE_TOPIC_NAME % device_id
+        
+        _LOGGER.info(f"📤 MQTT Publish: {json.dumps(state_object, indent=2)}")
+        _LOGGER.info(f"📤 Topic: {topic}")
+        
+        # Step 5: Publish with the control QoS
+        if await self._async_publish(topic, json.dumps(state_object), self.control_qos):
+            _LOGGER.info("✅ Successfully published via MQTT")
+            return True
+        return False
+    
+    async def async_force_sync(self, device_id: str) -> bool:
+        """Send force sync command via MQTT."""
+        # Create force sync payload
+        force_sync_payload = {self.FORCE_FETCH_KEY_NAME: 1}
+        
+        # Format topic
+        topic = self.PUB_CONTROL_TOPIC_NAME % device_id
+        
+        _LOGGER.info(f"📤 MQTT Force Sync: {json.dumps(force_sync_payload, indent=2)}")
+        _LOGGER.info(f"📤 Topic: {topic}")
+        
+        if await self._async_publish(topic, json.dumps(force_sync_payload), self.control_qos):
+            _LOGGER.info("✅ Successfully published force sync via MQTT")
+            return True
+        return False
+
+    async def _async_publish(self, topic: str, payload: str, qos: int) -> bool:
+        """Publish a message; for QoS1 wait (bounded) for its PUBACK."""
+        async with self._inflight_window:
+            if not self.is_connected:
+                _LOGGER.error("❌ MQTT not connected")
+                return False
+
+            try:
+                result = self.client.publish(topic, payload, qos=qos)
+            except Exception as error:
+                _LOGGER.error(f"❌ MQTT Publish Error: {error}")
+                return False
+
+            if result.rc != mqtt_client.MQTT_ERR_SUCCESS:
+                _LOGGER.error(f"❌ Failed to publish via MQTT: {result.rc}")
+                return False
+            if self.traffic is not None:
+                self.traffic.record_mqtt("pub", topic, payload)
+            if qos == 0:
+                return True
+
+            # on_publish resolves this from paho's thread via call_soon_threadsafe,
+            # which always runs after we have registered the future
+            future = self._loop.create_future()
+            self._inflight[result.mid] = future
+            try:
+                return await asyncio.wait_for(future, self.puback_timeout)
+            except asyncio.TimeoutError:
+                _LOGGER.warning(f"⚠️ No PUBACK for message {result.mid} within {self.puback_timeout}s")
+                return False
+            finally:
+                self._inflight.pop(result.mid, None)
+
+    def _on_publish(self, client, userdata, mid):
+        """Handle the broker's acknowledgement of a QoS1 message."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._resolve_inflight, mid, True)
+
+    def _resolve_inflight(self, mid: int, delivered: bool) -> None:
+        future = self._inflight.get(mid)
+        if future is not None and not future.done():
+            future.set_result(delivered)
+
+    def _fail_inflight(self) -> None:
+        """Fail every unacknowledged publish so callers can fall back to HTTP."""
+        for mid in list(self._inflight):
+            self._resolve_inflight(mid, False)
+    
+    def disconnect(self):
+        """Disconnect from MQTT broker and join paho's network thread."""
+        client, self.client = self.client, None
+        if client:
+            # Disconnect first so the network thread flushes DISCONNECT and exits
+            client.disconnect()
+            client.loop_stop()
+            self.is_connected = False
+            _LOGGER.info("🔌 MQTT Disconnected")
+
+    async def async_disconnect(self) -> None:
+        """Disconnect without blocking the event loop while the thread is joined."""
+        await asyncio.get_running_loop().run_in_executor(None, self.disconnect)
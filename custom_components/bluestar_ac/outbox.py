@@ -0,0 +1,113 @@
+"""Offline command outbox for Bluestar Smart AC integration."""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Queued commands older than this are dropped instead of being sent late
+OUTBOX_TTL = 600  # seconds
+OUTBOX_MAX_DEVICES = 64
+SAVE_DELAY = 1  # seconds
+
+
+class BluestarOutbox:
+    """Commands held back while the Bluestar cloud is unreachable.
+
+    Commands are coalesced per device into the latest desired value of each
+    field, so an outage costs one update per device on recovery however many
+    automations fired meanwhile. Each field expires ``OUTBOX_TTL`` after it
+    was queued. The outbox is saved to a ``Store`` and survives restarts,
+    which is also why expiry uses wall-clock time.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, ttl: float = OUTBOX_TTL):
+        self.ttl = ttl
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.outbox.{entry_id}")
+        # device_id -> field -> (value, epoch expiry)
+        self._commands: Dict[str, Dict[str, Tuple[Any, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    async def async_load(self) -> None:
+        """Restore commands queued before a restart, minus expired ones."""
+        data = await self._store.async_load() or {}
+        now = time.time()
+        for device_id, fields in data.get("commands", {}).items():
+            kept = {
+                key: (value, expires)
+                for key, (value, expires) in fields.items()
+                if expires > now
+            }
+            if kept:
+                self._commands[device_id] = kept
+        if self._commands:
+            _LOGGER.info("Restored queued commands for %d devices", len(self._commands))
+
+    @callback
+    def async_add(
+        self, device_id: str, control_data: Dict[str, Any], expires: Optional[float] = None
+    ) -> bool:
+        """Queue control fields for a device; return False if the outbox is full."""
+        if device_id not in self._commands and len(self._commands) >= OUTBOX_MAX_DEVICES:
+            return False
+        expires = expires if expires is not None else time.time() + self.ttl
+        fields = self._commands.setdefault(device_id, {})
+        for key, value in control_data.items():
+            fields[key] = (value, expires)
+        self._async_schedule_save()
+        return True
+
+    @callback
+    def async_discard(self, device_id: str, keys: Iterable[str]) -> None:
+        """Forget queued fields that a newer, delivered command superseded."""
+        fields = self._commands.get(device_id)
+        if not fields:
+            return
+        for key in keys:
+            fields.pop(key, None)
+        if not fields:
+            del self._commands[device_id]
+        self._async_schedule_save()
+
+    @callback
+    def async_take_all(self) -> Dict[str, Tuple[Dict[str, Any], float]]:
+        """Empty the outbox, returning each device's unexpired fields and their expiry."""
+        now = time.time()
+        batch = {}
+        for device_id, fields in self._commands.items():
+            live = {key: entry for key, entry in fields.items() if entry[1] > now}
+            if live:
+                batch[device_id] = (
+                    {key: value for key, (value, _) in live.items()},
+                    min(expires for _, expires in live.values()),
+                )
+        self._commands.clear()
+        self._async_schedule_save()
+        return batch
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        return {
+            "commands": {
+                device_id: {key: list(entry) for key, entry in fields.items()}
+                for device_id, fields in self._commands.items()
+            }
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the queued fields per device for diagnostics."""
+        return {device_id: sorted(fields) for device_id, fields in self._commands.items()}
@@ -0,0 +1,104 @@
+"""Per-device flight recorder for Bluestar Smart AC integration."""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Events kept per device; older ones are overwritten
+RECORDER_SIZE = 64
+
+
+class _Event:
+    """One preallocated slot of a device's ring buffer, reused in place."""
+
+    __slots__ = ("time", "kind", "seq", "path", "status", "latency", "version", "detail")
+
+    def __init__(self):
+        self.time = 0.0
+        self.kind: Optional[str] = None
+        self.seq: Optional[int] = None
+        self.path: Optional[str] = None
+        self.status: Optional[Tuple[Tuple[str, int], ...]] = None
+        self.latency: Optional[float] = None
+        self.version: Optional[int] = None
+        self.detail: Any = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "time": self.time,
+            "kind": self.kind,
+            "seq": self.seq,
+            "path": self.path,
+            "status": [list(status) for status in self.status] if self.status else None,
+            "latency": self.latency,
+            "version": self.version,
+            "detail": self.detail,
+        }
+
+
+class DeviceRecorder:
+    """Fixed-size ring buffer of a device's recent commands and state reports.
+
+    All slots are allocated up front and overwritten in place, so memory
+    stays constant no matter how long Home Assistant runs.
+    """
+
+    def __init__(self, size: int = RECORDER_SIZE):
+        self._slots = [_Event() for _ in range(size)]
+        self._next = 0
+        self._count = 0
+
+    def record(
+        self,
+        kind: str,
+        seq: Optional[int] = None,
+        path: Optional[str] = None,
+        status: Optional[List[Tuple[str, int]]] = None,
+        latency: Optional[float] = None,
+        version: Optional[int] = None,
+        detail: Any = None,
+    ) -> None:
+        """Record an event, overwriting the oldest one when full."""
+        event = self._slots[self._next]
+        event.time = time.time()
+        event.kind = kind
+        event.seq = seq
+        event.path = path
+        event.status = tuple(status) if status else None
+        event.latency = latency
+        event.version = version
+        event.detail = detail
+        self._next = (self._next + 1) % len(self._slots)
+        self._count = min(self._count + 1, len(self._slots))
+
+    def events(self) -> List[Dict[str, Any]]:
+        """Return the recorded events, oldest first."""
+        size = len(self._slots)
+        start = (self._next - self._count) % size
+        return [self._slots[(start + index) % size].as_dict() for index in range(self._count)]
+
+
+class BluestarFlightRecorder:
+    """One ring buffer per device, for postmortems through diagnostics."""
+
+    def __init__(self, size: int = RECORDER_SIZE):
+        self.size = size
+        self._devices: Dict[str, DeviceRecorder] = {}
+
+    def record(self, device_id: str, kind: str, **fields: Any) -> None:
+        """Record an event for a device."""
+        recorder = self._devices.get(device_id)
+        if recorder is None:
+            recorder = self._devices[device_id] = DeviceRecorder(self.size)
+        recorder.record(kind, **fields)
+
+    def prune(self, device_ids: Iterable[str]) -> None:
+        """Drop the buffers of devices that left the account."""
+        keep = set(device_ids)
+        for device_id in list(self._devices):
+            if device_id not in keep:
+                del self._devices[device_id]
+
+    def as_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Return every device's events for diagnostics."""
+        return {device_id: recorder.events() for device_id, recorder in self._devices.items()}
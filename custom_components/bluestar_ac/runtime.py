@@ -0,0 +1,233 @@
+"""Runtime accounting for Bluestar Smart AC integration."""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+
+from .const import BLUESTAR_TO_HVAC_MODE, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 30  # seconds
+# Running devices are checkpointed (and their sensors updated) this often
+RUNTIME_UPDATE_INTERVAL = 60  # seconds
+# Longer gaps between observations (HA suspended, clock jumps) are not counted
+MAX_ACCRUAL_GAP = 900  # seconds
+
+RUNTIME_TOTAL = "total"
+RUNTIME_COMPRESSOR = "compressor"
+# Modes in which the compressor runs
+COMPRESSOR_MODES = ("cool", "dry", "auto")
+RUNTIME_KEYS = (RUNTIME_TOTAL, RUNTIME_COMPRESSOR, *BLUESTAR_TO_HVAC_MODE.values())
+# Totals imported into long-term statistics
+STATISTICS_KEYS = (RUNTIME_TOTAL, RUNTIME_COMPRESSOR)
+
+
+class _DeviceRuntime:
+    """On-time totals of one device and what it is doing now."""
+
+    __slots__ = ("totals", "mode", "since", "name")
+
+    def __init__(self, totals: Optional[Dict[str, float]] = None):
+        self.totals: Dict[str, float] = dict.fromkeys(RUNTIME_KEYS, 0.0)
+        self.totals.update(totals or {})
+        # Mode while running, None while off; since = time of last accrual
+        self.mode: Optional[str] = None
+        self.since: Optional[float] = None
+        self.name: Optional[str] = None
+
+    def accrue(self, now: float) -> None:
+        """Add the time since the last accrual to the running mode."""
+        if self.mode is not None and self.since is not None:
+            elapsed = now - self.since
+            if 0 < elapsed <= MAX_ACCRUAL_GAP:
+                self.totals[RUNTIME_TOTAL] += elapsed
+                if self.mode in COMPRESSOR_MODES:
+                    self.totals[RUNTIME_COMPRESSOR] += elapsed
+                if self.mode in self.totals:
+                    self.totals[self.mode] += elapsed
+        self.since = now
+
+    def seconds(self, key: str, now: float) -> float:
+        """Return a total including the current, not yet accrued, run."""
+        total = self.totals.get(key, 0.0)
+        if self.mode is None or self.since is None:
+            return total
+        elapsed = now - self.since
+        if not 0 < elapsed <= MAX_ACCRUAL_GAP:
+            return total
+        if key == RUNTIME_TOTAL or key == self.mode or (
+            key == RUNTIME_COMPRESSOR and self.mode in COMPRESSOR_MODES
+        ):
+            return total + elapsed
+        return total
+
+
+class BluestarRuntimeTracker:
+    """Integrate each device's on-time, overall and per mode, from its state stream.
+
+    Every accepted state document costs O(1): the time since the device's
+    previous observation is added to the mode it was running in. Running
+    devices are also checkpointed every ``RUNTIME_UPDATE_INTERVAL`` so
+    their sensors advance during long runs; listeners are called on those
+    checkpoints and when a device turns on, off or changes mode. Totals are saved to a ``Store``
+    and, if ``statistics`` is set, imported hourly as external long-term
+    statistics.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, statistics: bool = False):
+        self.hass = hass
+        self.statistics = statistics
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.runtime.{entry_id}")
+        self._devices: Dict[str, _DeviceRuntime] = {}
+        self._exported_hour: Optional[float] = None
+        # (device_id or None for every device, callback)
+        self._listeners: List[Tuple[Optional[str], Callable[[], None]]] = []
+        self._unsub_interval: Optional[Callable[[], None]] = None
+
+    async def async_load(self) -> None:
+        """Restore saved totals and start the periodic checkpoint."""
+        data = await self._store.async_load() or {}
+        for device_id, totals in data.get("devices", {}).items():
+            self._devices[device_id] = _DeviceRuntime(totals)
+        self._exported_hour = data.get("exported_hour")
+        self._unsub_interval = async_track_time_interval(
+            self.hass, self._async_tick, timedelta(seconds=RUNTIME_UPDATE_INTERVAL)
+        )
+
+    @callback
+    def async_observe(
+        self, device_id: str, document: Dict[str, Any], name: Optional[str] = None
+    ) -> None:
+        """Account for a device's new reported state document."""
+        device = self._devices.get(device_id)
+        if device is None:
+            device = self._devices[device_id] = _DeviceRuntime()
+        if name:
+            device.name = name
+        device.accrue(time.time())
+
+        state = document.get("state", {})
+        mode = state.get("mode")
+        previous = device.mode
+        if state.get("pow") == 1 and document.get("connected", True):
+            device.mode = BLUESTAR_TO_HVAC_MODE.get(mode, "other") if isinstance(mode, int) else "other"
+        else:
+            device.mode = None
+        self._async_schedule_save()
+        if device.mode != previous:
+            self._async_notify(device_id)
+
+    def hours(self, device_id: str, key: str) -> float:
+        """Return a device's runtime total in hours."""
+        device = self._devices.get(device_id)
+        if device is None:
+            return 0.0
+        return round(device.seconds(key, time.time()) / 3600, 3)
+
+    @callback
+    def async_add_listener(
+        self, update_callback: Callable[[], None], device_id: Optional[str] = None
+    ) -> Callable[[], None]:
+        """Call ``update_callback`` after each checkpoint and on transitions; return a remover.
+
+        With ``device_id``, only that device's transitions call it.
+        """
+        listener = (device_id, update_callback)
+        self._listeners.append(listener)
+
+        def _remove() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _remove
+
+    @callback
+    def _async_notify(self, device_id: Optional[str] = None) -> None:
+        """Call the listeners of a device's transition, or every listener."""
+        for listener_device_id, update_callback in list(self._listeners):
+            if device_id is None or listener_device_id in (None, device_id):
+                update_callback()
+
+    @callback
+    def _async_tick(self, _now: Any = None) -> None:
+        now = time.time()
+        running = False
+        for device in self._devices.values():
+            if device.mode is not None:
+                device.accrue(now)
+                running = True
+        if running:
+            self._async_schedule_save()
+            self._async_notify()
+
+        hour = now // 3600 * 3600
+        if self._exported_hour is None:
+            self._exported_hour = hour
+        elif hour > self._exported_hour:
+            if self.statistics:
+                self._async_export_statistics(hour - 3600)
+            self._exported_hour = hour
+            self._async_schedule_save()
+
+    @callback
+    def _async_export_statistics(self, hour_start: float) -> None:
+        """Import each device's totals, as of now, for the hour that just ended."""
+        if "recorder" not in self.hass.config.components:
+            return
+        # pylint: disable=import-outside-toplevel
+        from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        start = datetime.fromtimestamp(hour_start, tz=timezone.utc)
+        for device_id, device in self._devices.items():
+            for key in STATISTICS_KEYS:
+                hours = round(device.totals[key] / 3600, 3)
+                async_add_external_statistics(
+                    self.hass,
+                    StatisticMetaData(
+                        has_mean=False,
+                        has_sum=True,
+                        name=f"{device.name or device_id} {key} runtime",
+                        source=DOMAIN,
+                        statistic_id=f"{DOMAIN}:{slugify(device_id)}_{key}_runtime",
+                        unit_of_measurement="h",
+                    ),
+                    [StatisticData(start=start, state=hours, sum=hours)],
+                )
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        return {
+            "devices": {device_id: device.totals for device_id, device in self._devices.items()},
+            "exported_hour": self._exported_hour,
+        }
+
+    async def async_shutdown(self) -> None:
+        """Checkpoint running devices and save the totals now."""
+        if self._unsub_interval:
+            self._unsub_interval()
+            self._unsub_interval = None
+        now = time.time()
+        for device in self._devices.values():
+            device.accrue(now)
+        await self._store.async_save(self._data_to_save())
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Return every device's totals in hours for diagnostics."""
+        return {
+            device_id: {key: self.hours(device_id, key) for key in device.totals}
+            for device_id, device in self._devices.items()
+        }
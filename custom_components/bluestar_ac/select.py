@@ -78,8 +78,7 @@ class BluestarVerticalSwingSelectEntity(CoordinatorEntity, SelectEntity):
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
         value = SWING_LABEL_TO_VALUE.get(option, 0)
-        control_data = {"vswing": value}
-        await self.coordinator.control_device(self.device_id, control_data)
+        await self.coordinator.set_swing(self.device_id, vertical=value)
 
 
 class BluestarHorizontalSwingSelectEntity(CoordinatorEntity, SelectEntity):
@@ -122,8 +121,7 @@ class BluestarHorizontalSwingSelectEntity(CoordinatorEntity, SelectEntity):
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
         value = SWING_LABEL_TO_VALUE.get(option, 0)
-        control_data = {"hswing": value}
-        await self.coordinator.control_device(self.device_id, control_data)
+        await self.coordinator.set_swing(self.device_id, horizontal=value)
 
 
 
@@ -1,19 +1,47 @@
 """Sensor platform for Bluestar Smart AC integration."""
 
 import logging
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
 
-from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
+from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import UnitOfTemperature, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import (
+    CONF_RSSI_DEADBAND,
+    CONF_SENSOR_MIN_INTERVAL,
+    DEFAULT_RSSI_DEADBAND,
+    DEFAULT_SENSOR_MIN_INTERVAL,
+    DOMAIN,
+)
 from .coordinator import BluestarDataUpdateCoordinator
+from .fleet import BluestarFleetAggregates
+from .runtime import RUNTIME_COMPRESSOR, RUNTIME_KEYS, RUNTIME_TOTAL
 
 _LOGGER = logging.getLogger(__name__)
 
+# Fleet sensor key -> (name, device class, unit, value)
+FLEET_SENSORS: Dict[
+    str,
+    Tuple[str, Optional[SensorDeviceClass], Optional[str], Callable[[BluestarFleetAggregates], Any]],
+] = {
+    "on": ("ACs On", None, None, lambda fleet: fleet.on),
+    "average_temperature": (
+        "Average Room Temperature",
+        SensorDeviceClass.TEMPERATURE,
+        UnitOfTemperature.CELSIUS,
+        lambda fleet: fleet.average_temperature,
+    ),
+    "errors": ("Units With Errors", None, None, lambda fleet: fleet.errors),
+    "disconnected": ("Units Disconnected", None, None, lambda fleet: fleet.disconnected),
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -22,33 +50,59 @@ async def async_setup_entry(
 ) -> None:
     """Set up Bluestar Smart AC sensor entities."""
     coordinator: BluestarDataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    deadband = config_entry.options.get(CONF_RSSI_DEADBAND, DEFAULT_RSSI_DEADBAND)
+    min_interval = config_entry.options.get(CONF_SENSOR_MIN_INTERVAL, DEFAULT_SENSOR_MIN_INTERVAL)
 
     entities = []
     for device_id in coordinator.get_all_devices():
         entities.extend([
-            BluestarRSSISensorEntity(coordinator, device_id),
+            BluestarRSSISensorEntity(coordinator, device_id, deadband, min_interval),
             BluestarErrorSensorEntity(coordinator, device_id),
         ])
+        if coordinator.runtime is not None:
+            entities.extend(
+                BluestarRuntimeSensorEntity(coordinator, device_id, key) for key in RUNTIME_KEYS
+            )
+    entities.extend(
+        BluestarFleetSensorEntity(coordinator, config_entry.entry_id, key) for key in FLEET_SENSORS
+    )
 
     async_add_entities(entities)
 
 
-class BluestarRSSISensorEntity(CoordinatorEntity, SensorEntity):
-    """Representation of a Bluestar Smart AC RSSI sensor entity."""
+class BluestarDiagnosticSensorEntity(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor that only writes state for meaningful changes.
 
-    _attr_device_class = SensorDeviceClass.SIGNAL_STRENGTH
-    _attr_native_unit_of_measurement = "dBm"
+    Coordinator updates that leave the value within ``deadband`` of the last
+    written one are ignored, and value changes are written at most once per
+    ``min_interval`` (a change inside the interval is written when it ends).
+    Availability changes are always written immediately.
+    """
 
-    def __init__(self, coordinator: BluestarDataUpdateCoordinator, device_id: str) -> None:
-        """Initialize the RSSI sensor entity."""
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: BluestarDataUpdateCoordinator,
+        device_id: str,
+        name_suffix: str,
+        deadband: float = 0,
+        min_interval: float = 0,
+    ) -> None:
+        """Initialize the diagnostic sensor entity."""
         super().__init__(coordinator)
         self.device_id = device_id
-        self._attr_unique_id = f"{device_id}_rssi"
-        
+        self._deadband = deadband
+        self._min_interval = min_interval
+        self._last_write = 0.0
+        self._cancel_deferred: Optional[Callable[[], None]] = None
+        self._attr_native_value = self._read_value()
+        self._attr_available = self._read_available()
+
         # Set device info
         device = coordinator.get_device(device_id)
         if device:
-            self._attr_name = f"{device['name']} RSSI"
+            self._attr_name = f"{device['name']} {name_suffix}"
             self._attr_device_info = {
                 "identifiers": {(DOMAIN, device_id)},
                 "name": device["name"],
@@ -56,34 +110,152 @@ class BluestarRSSISensorEntity(CoordinatorEntity, SensorEntity):
                 "model": "Smart AC",
             }
 
+    def _read_value(self) -> Any:
+        """Return the current value from the coordinator."""
+        raise NotImplementedError
+
+    def _read_available(self) -> bool:
+        state = self.coordinator.get_device_state(self.device_id)
+        return state is not None and state.get("connected", False)
+
     @property
-    def native_value(self) -> Optional[int]:
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self._attr_available
+
+    def _is_significant(self, value: Any) -> bool:
+        current = self._attr_native_value
+        if value == current:
+            return False
+        if value is None or current is None or not self._deadband:
+            return True
+        try:
+            return abs(value - current) >= self._deadband
+        except TypeError:
+            return True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the new state only if it changed enough and not too recently."""
+        value = self._read_value()
+        available = self._read_available()
+        if available == self._attr_available:
+            if not self._is_significant(value):
+                return
+            wait = self._last_write + self._min_interval - time.monotonic()
+            if wait > 0:
+                if self._cancel_deferred is None:
+                    self._cancel_deferred = async_call_later(
+                        self.hass, wait, self._async_deferred_write
+                    )
+                return
+        self._async_write(value, available)
+
+    @callback
+    def _async_deferred_write(self, _now: Any) -> None:
+        self._cancel_deferred = None
+        value = self._read_value()
+        available = self._read_available()
+        if available != self._attr_available or self._is_significant(value):
+            self._async_write(value, available)
+
+    @callback
+    def _async_write(self, value: Any, available: bool) -> None:
+        if self._cancel_deferred:
+            self._cancel_deferred()
+            self._cancel_deferred = None
+        self._attr_native_value = value
+        self._attr_available = available
+        self._last_write = time.monotonic()
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel a pending deferred write."""
+        if self._cancel_deferred:
+            self._cancel_deferred()
+            self._cancel_deferred = None
+        await super().async_will_remove_from_hass()
+
+
+class BluestarRSSISensorEntity(BluestarDiagnosticSensorEntity):
+    """Representation of a Bluestar Smart AC RSSI sensor entity."""
+
+    _attr_device_class = SensorDeviceClass.SIGNAL_STRENGTH
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = "dBm"
+
+    def __init__(
+        self,
+        coordinator: BluestarDataUpdateCoordinator,
+        device_id: str,
+        deadband: float = DEFAULT_RSSI_DEADBAND,
+        min_interval: float = DEFAULT_SENSOR_MIN_INTERVAL,
+    ) -> None:
+        """Initialize the RSSI sensor entity."""
+        super().__init__(coordinator, device_id, "RSSI", deadband, min_interval)
+        self._attr_unique_id = f"{device_id}_rssi"
+
+    def _read_value(self) -> Optional[int]:
         """Return the RSSI value."""
         state = self.coordinator.get_device_state(self.device_id)
         if state:
             return state.get("rssi", -45)
         return -45
 
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        state = self.coordinator.get_device_state(self.device_id)
-        return state is not None and state.get("connected", False)
 
+class BluestarErrorSensorEntity(BluestarDiagnosticSensorEntity):
+    """Representation of a Bluestar Smart AC error sensor entity.
 
-class BluestarErrorSensorEntity(CoordinatorEntity, SensorEntity):
-    """Representation of a Bluestar Smart AC error sensor entity."""
+    Error codes are not throttled: every change is written, repeats are not.
+    """
 
     def __init__(self, coordinator: BluestarDataUpdateCoordinator, device_id: str) -> None:
         """Initialize the error sensor entity."""
-        super().__init__(coordinator)
-        self.device_id = device_id
+        super().__init__(coordinator, device_id, "Error Code")
         self._attr_unique_id = f"{device_id}_error"
-        
+
+    def _read_value(self) -> Optional[int]:
+        """Return the error code."""
+        state = self.coordinator.get_device_state(self.device_id)
+        if state:
+            return state.get("error", 0)
+        return 0
+
+
+class BluestarRuntimeSensorEntity(SensorEntity):
+    """Hours a Bluestar Smart AC has run: in total, with the compressor, or in one mode.
+
+    Values come from the coordinator's runtime tracker. The sensor does not
+    follow coordinator updates: it is written only on the tracker's
+    checkpoints and when the device turns on, off or changes mode, and only
+    if the value moved. Per-mode sensors are disabled by default.
+    """
+
+    _attr_should_poll = False
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = UnitOfTime.HOURS
+
+    def __init__(
+        self, coordinator: BluestarDataUpdateCoordinator, device_id: str, key: str
+    ) -> None:
+        """Initialize the runtime sensor entity."""
+        self.coordinator = coordinator
+        self.device_id = device_id
+        self._key = key
+        self._attr_unique_id = f"{device_id}_runtime_{key}"
+        self._attr_entity_registry_enabled_default = key in (RUNTIME_TOTAL, RUNTIME_COMPRESSOR)
+        self._attr_native_value = coordinator.runtime.hours(device_id, key)
+
         # Set device info
         device = coordinator.get_device(device_id)
         if device:
-            self._attr_name = f"{device['name']} Error Code"
+            label = {
+                RUNTIME_TOTAL: "Runtime",
+                RUNTIME_COMPRESSOR: "Compressor Runtime",
+            }.get(key, f"{key.replace('_', ' ').title()} Runtime")
+            self._attr_name = f"{device['name']} {label}"
             self._attr_device_info = {
                 "identifiers": {(DOMAIN, device_id)},
                 "name": device["name"],
@@ -91,19 +263,55 @@ class BluestarErrorSensorEntity(CoordinatorEntity, SensorEntity):
                 "model": "Smart AC",
             }
 
-    @property
-    def native_value(self) -> Optional[int]:
-        """Return the error code."""
-        state = self.coordinator.get_device_state(self.device_id)
-        if state:
-            return state.get("error", 0)
-        return 0
+    async def async_added_to_hass(self) -> None:
+        """Refresh on the runtime tracker's checkpoints and this device's transitions."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.runtime.async_add_listener(
+                self._handle_runtime_update, self.device_id
+            )
+        )
 
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        state = self.coordinator.get_device_state(self.device_id)
-        return state is not None and state.get("connected", False)
+    @callback
+    def _handle_runtime_update(self) -> None:
+        """Write the state only when the total moved."""
+        value = self.coordinator.runtime.hours(self.device_id, self._key)
+        if value != self._attr_native_value:
+            self._attr_native_value = value
+            self.async_write_ha_state()
 
 
+class BluestarFleetSensorEntity(CoordinatorEntity, SensorEntity):
+    """Aggregate over every AC of a config entry, on a hub device.
+
+    Reads the coordinator's incrementally maintained fleet aggregates and
+    writes state only when the aggregate changed.
+    """
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self, coordinator: BluestarDataUpdateCoordinator, entry_id: str, key: str
+    ) -> None:
+        """Initialize the fleet sensor entity."""
+        super().__init__(coordinator)
+        name, device_class, unit, self._value = FLEET_SENSORS[key]
+        self._attr_unique_id = f"{entry_id}_fleet_{key}"
+        self._attr_name = f"Bluestar {name}"
+        self._attr_device_class = device_class
+        self._attr_native_unit_of_measurement = unit
+        self._attr_native_value = self._value(coordinator.fleet)
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, f"{entry_id}_fleet")},
+            "name": "Bluestar Fleet",
+            "manufacturer": "Bluestar",
+            "model": "Smart AC Fleet",
+        }
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the aggregate changed."""
+        value = self._value(self.coordinator.fleet)
+        if value != self._attr_native_value:
+            self._attr_native_value = value
+            self.async_write_ha_state()
@@ -0,0 +1,53 @@
+"""Command sequence numbers for Bluestar Smart AC integration."""
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 1  # seconds
+
+
+class BluestarCommandSequences:
+    """Per-device command sequence numbers that keep increasing across restarts.
+
+    The last number given to each device is saved to a ``Store`` (written at
+    the latest when Home Assistant stops), so a reload or restart continues
+    where it left off. Without ``hass`` the numbers live in memory only.
+    """
+
+    def __init__(self, hass: Optional[HomeAssistant] = None, entry_id: Optional[str] = None):
+        self._store: Optional[Store] = (
+            Store(hass, STORAGE_VERSION, f"{DOMAIN}.sequences.{entry_id}")
+            if hass is not None
+            else None
+        )
+        self._last: Dict[str, int] = {}
+
+    async def async_load(self) -> None:
+        """Restore the last sequence number of every device."""
+        if self._store is None:
+            return
+        data = await self._store.async_load() or {}
+        for device_id, seq in data.get("devices", {}).items():
+            self._last[device_id] = max(self._last.get(device_id, 0), int(seq))
+
+    def last(self, device_id: str) -> int:
+        """Return the sequence number of the last command sent to a device."""
+        return self._last.get(device_id, 0)
+
+    @callback
+    def async_next(self, device_id: str) -> int:
+        """Return the next sequence number for a device and remember it."""
+        seq = self._last[device_id] = self._last.get(device_id, 0) + 1
+        if self._store is not None:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return seq
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        return {"devices": dict(self._last)}
@@ -0,0 +1,104 @@
+"""Services for Bluestar Smart AC integration."""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import io
+import logging
+import pstats
+import time
+from types import ModuleType
+from typing import Optional
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DEFAULT_PROFILE_SECONDS, DOMAIN, SERVICE_PROFILE
+
+_LOGGER = logging.getLogger(__name__)
+
+# Functions listed per section of the text summary
+PROFILE_TOP_FUNCTIONS = 40
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional("seconds", default=DEFAULT_PROFILE_SECONDS): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=3600)
+        ),
+    }
+)
+
+_profile_lock = asyncio.Lock()
+
+
+def _import_yappi() -> Optional[ModuleType]:
+    try:
+        return importlib.import_module("yappi")
+    except ImportError:
+        return None
+
+
+def _write_summary(prof_path: str, summary_path: str, seconds: float) -> None:
+    """Write the top functions overall and within the integration (blocking)."""
+    output = io.StringIO()
+    output.write(f"Bluestar Smart AC profile: yappi, {seconds:g}s\n\n")
+    stats = pstats.Stats(prof_path, stream=output)
+    stats.sort_stats("cumulative")
+    output.write("=== Top functions by cumulative time ===\n")
+    stats.print_stats(PROFILE_TOP_FUNCTIONS)
+    output.write(f"=== {DOMAIN} functions by cumulative time ===\n")
+    stats.print_stats(DOMAIN, PROFILE_TOP_FUNCTIONS)
+    with open(summary_path, "w", encoding="utf-8") as file:
+        file.write(output.getvalue())
+
+
+async def _async_profile(hass: HomeAssistant, seconds: float) -> None:
+    """Profile Home Assistant for ``seconds`` and write the results under /config.
+
+    Requires yappi: it covers every thread, including paho's network
+    thread where MQTT messages are received, and attributes time to
+    coroutines across awaits. cProfile only sees the thread it runs on, so
+    without yappi the service refuses rather than silently missing paho.
+    """
+    yappi = await hass.async_add_executor_job(_import_yappi)
+    if yappi is None:
+        _LOGGER.error(
+            "The Bluestar profile service needs yappi to cover the MQTT thread; "
+            "install it with 'pip install yappi' and try again"
+        )
+        raise HomeAssistantError("Profiling requires the yappi package")
+
+    base = hass.config.path(f"{DOMAIN}_profile.{int(time.time())}")
+    prof_path, summary_path = f"{base}.prof", f"{base}.txt"
+
+    yappi.set_clock_type("wall")
+    yappi.start(builtins=False, profile_threads=True)
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        yappi.stop()
+    stats = yappi.get_func_stats()
+    yappi.clear_stats()
+    await hass.async_add_executor_job(stats.save, prof_path, "pstat")
+
+    await hass.async_add_executor_job(_write_summary, prof_path, summary_path, seconds)
+    _LOGGER.warning("Bluestar profile written to %s and %s", prof_path, summary_path)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+    if hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        return
+
+    async def _async_handle_profile(call: ServiceCall) -> None:
+        if _profile_lock.locked():
+            _LOGGER.warning("A Bluestar profile is already running")
+            return
+        async with _profile_lock:
+            await _async_profile(hass, call.data["seconds"])
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, _async_handle_profile, schema=PROFILE_SCHEMA
+    )
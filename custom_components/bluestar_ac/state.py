@@ -0,0 +1,85 @@
+"""Per-device shadow state store for Bluestar Smart AC integration."""
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def timestamp_ms(document: Dict[str, Any]) -> Optional[float]:
+    """Return a document's timestamp in ms (AWS shadow documents use seconds)."""
+    timestamp = document.get("timestamp")
+    if not isinstance(timestamp, (int, float)) or isinstance(timestamp, bool):
+        return None
+    return timestamp * 1000 if timestamp < 100_000_000_000 else timestamp
+
+
+def _compare(incoming: Dict[str, Any], current: Dict[str, Any]) -> int:
+    """Order two shadow documents: 1 newer, -1 older, 0 same or unknown.
+
+    The shadow ``version`` wins when both documents carry one; otherwise the
+    (unit-normalized) ``timestamp`` is used.
+    """
+    new_version, old_version = incoming.get("version"), current.get("version")
+    if isinstance(new_version, int) and isinstance(old_version, int):
+        return (new_version > old_version) - (new_version < old_version)
+
+    new_ts, old_ts = timestamp_ms(incoming), timestamp_ms(current)
+    if new_ts is not None and old_ts is not None:
+        return (new_ts > old_ts) - (new_ts < old_ts)
+    return 0
+
+
+class BluestarStateStore:
+    """Reported device state, merged monotonically from polls and MQTT pushes.
+
+    Every document goes through ``reduce``: documents older than the stored
+    one are dropped as stale, identical ones as duplicates, and only
+    accepted changes are reported back so callers can skip reprocessing and
+    entity notifications for everything else.
+    """
+
+    def __init__(self):
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self.dropped_stale = 0
+        self.dropped_duplicate = 0
+
+    def reduce(self, device_id: str, document: Dict[str, Any], partial: bool = False) -> bool:
+        """Merge a state document for a device; return True if the state changed.
+
+        ``partial`` documents (MQTT pushes) only update the fields they carry;
+        full documents (polls) replace the reported state.
+        """
+        current = self.states.get(device_id)
+        if current is not None:
+            order = _compare(document, current)
+            if order < 0:
+                self.dropped_stale += 1
+                _LOGGER.debug(
+                    "S1 dropped stale state for %s (version %s < %s)",
+                    device_id, document.get("version"), current.get("version"),
+                )
+                return False
+
+        if partial and current is not None:
+            merged = dict(current)
+            merged.update((key, value) for key, value in document.items() if key != "state")
+            merged["state"] = {**current.get("state", {}), **document.get("state", {})}
+        else:
+            merged = dict(document)
+            merged["state"] = dict(document.get("state", {}))
+
+        if merged == current:
+            self.dropped_duplicate += 1
+            return False
+
+        self.states[device_id] = merged
+        return True
+
+    def prune(self, device_ids: Iterable[str]) -> None:
+        """Forget devices that are no longer part of the account."""
+        keep = set(device_ids)
+        for device_id in list(self.states):
+            if device_id not in keep:
+                del self.states[device_id]
@@ -66,13 +66,11 @@ class BluestarDisplaySwitchEntity(CoordinatorEntity, SwitchEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the switch on."""
-        control_data = {"display": 1}
-        await self.coordinator.control_device(self.device_id, control_data)
+        await self.coordinator.set_display(self.device_id, True)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the switch off."""
-        control_data = {"display": 0}
-        await self.coordinator.control_device(self.device_id, control_data)
+        await self.coordinator.set_display(self.device_id, False)
 
 
 
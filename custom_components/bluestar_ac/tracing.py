@@ -0,0 +1,278 @@
+"""Trace spans for Bluestar Smart AC integration.
+
+Spans follow the OpenTelemetry model (trace id, span id, parent, start and
+end time, attributes, error status) without depending on the OpenTelemetry
+SDK. They are only created while an exporter is configured; otherwise
+``span()`` costs a single attribute check.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import posixpath
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+
+import aiohttp
+
+from .traffic import JsonLinesWriter
+
+_LOGGER = logging.getLogger(__name__)
+
+OTLP_EXPORT_INTERVAL = 5  # seconds
+OTLP_MAX_QUEUED_SPANS = 2048
+SERVICE_NAME = "bluestar_ac"
+# Trace files are only ever written below this directory of the config dir
+TRACE_DIR = "bluestar_ac_traces"
+
+_T = TypeVar("_T")
+
+_CURRENT_SPAN: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "bluestar_ac_span", default=None
+)
+
+
+class Span:
+    """One timed operation; nested spans share the trace id of their parent."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end", "attributes", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.time_ns()
+        self.end: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": round((self.end - self.start) / 1e6, 3) if self.end else None,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class JsonLinesSpanExporter:
+    """Write finished spans to a JSON-lines file."""
+
+    def __init__(self, path: str):
+        self._writer = JsonLinesWriter(path)
+
+    def export(self, span: Span) -> None:
+        self._writer.write(span.as_dict())
+
+    async def async_shutdown(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._writer.close)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPSpanExporter:
+    """Send finished spans in batches to an OTLP/HTTP (JSON) collector.
+
+    ``url`` is the collector's traces endpoint, e.g.
+    ``http://localhost:4318/v1/traces``. Spans that cannot be delivered are
+    dropped rather than retried.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._spans: List[Span] = []
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def export(self, span: Span) -> None:
+        if len(self._spans) >= OTLP_MAX_QUEUED_SPANS:
+            del self._spans[0]
+        self._spans.append(span)
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._async_export_loop())
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [{"key": "service.name", "value": _otlp_value(SERVICE_NAME)}]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [
+                                {
+                                    "traceId": span.trace_id,
+                                    "spanId": span.span_id,
+                                    "parentSpanId": span.parent_id or "",
+                                    "name": span.name,
+                                    "kind": 1,
+                                    "startTimeUnixNano": str(span.start),
+                                    "endTimeUnixNano": str(span.end),
+                                    "attributes": [
+                                        {"key": key, "value": _otlp_value(value)}
+                                        for key, value in span.attributes.items()
+                                    ],
+                                    "status": (
+                                        {"code": 2, "message": span.error}
+                                        if span.error
+                                        else {"code": 1}
+                                    ),
+                                }
+                                for span in spans
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    async def _async_flush(self) -> None:
+        spans, self._spans = self._spans, []
+        if not spans:
+            return
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        try:
+            async with self._session.post(
+                self.url,
+                json=self._payload(spans),
+                timeout=aiohttp.ClientTimeout(total=OTLP_EXPORT_INTERVAL),
+            ) as response:
+                if response.status >= 400:
+                    _LOGGER.debug("OTLP collector rejected %d spans: %s", len(spans), response.status)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            _LOGGER.debug("Could not export %d spans: %s", len(spans), error)
+
+    async def _async_export_loop(self) -> None:
+        while True:
+            await asyncio.sleep(OTLP_EXPORT_INTERVAL)
+            await self._async_flush()
+
+    async def async_shutdown(self) -> None:
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self._async_flush()
+        session, self._session = self._session, None
+        if session:
+            await session.close()
+
+
+def valid_trace_target(target: str) -> bool:
+    """Return whether a trace target is a collector URL or a safe relative file name."""
+    if target.startswith(("http://", "https://")):
+        return True
+    if not target or "\\" in target or ":" in target:
+        return False
+    if posixpath.isabs(target):
+        return False
+    return all(part not in ("", ".", "..") for part in target.split("/"))
+
+
+def create_exporter(target: str, config_path: Callable[..., str]):
+    """Return the exporter for a trace target: a collector URL or a file name.
+
+    File names are relative to ``TRACE_DIR`` in the config directory; any
+    other path raises ``ValueError``.
+    """
+    if target.startswith(("http://", "https://")):
+        return OTLPSpanExporter(target)
+    if not valid_trace_target(target):
+        raise ValueError(f"Invalid trace export file name: {target!r}")
+    return JsonLinesSpanExporter(config_path(TRACE_DIR, target))
+
+
+class BluestarTracer:
+    """Create spans and hand finished ones to the configured exporter."""
+
+    def __init__(self):
+        self._exporter = None
+        self._owner: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._exporter is not None
+
+    async def async_configure(self, exporter, owner: str) -> None:
+        """Start exporting spans on behalf of ``owner`` (a config entry id)."""
+        await self.async_release(self._owner)
+        self._exporter = exporter
+        self._owner = owner
+
+    async def async_release(self, owner: Optional[str]) -> None:
+        """Stop exporting if ``owner`` configured the current exporter."""
+        if owner is None or owner != self._owner:
+            return
+        exporter, self._exporter, self._owner = self._exporter, None, None
+        await exporter.async_shutdown()
+
+    @contextmanager
+    def span(self, name: str, root: bool = False, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Time the enclosed block as a child of the current span.
+
+        ``root`` starts a new trace instead; long-lived tasks inherit the
+        span that was current when they were created, which is rarely the
+        parent of the work they do later.
+        """
+        exporter = self._exporter
+        if exporter is None:
+            yield None
+            return
+        span = Span(name, None if root else _CURRENT_SPAN.get(), attributes)
+        token = _CURRENT_SPAN.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.error = f"{type(error).__name__}: {error}"
+            raise
+        finally:
+            _CURRENT_SPAN.reset(token)
+            span.end = time.time_ns()
+            exporter.export(span)
+
+    def traced(
+        self, name: str, root: bool = False
+    ) -> Callable[[Callable[..., Awaitable[_T]]], Callable[..., Awaitable[_T]]]:
+        """Decorate a coroutine function so each call runs in a span."""
+
+        def decorator(func: Callable[..., Awaitable[_T]]) -> Callable[..., Awaitable[_T]]:
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> _T:
+                with self.span(name, root):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """Add attributes to the current span, if there is one."""
+    span = _CURRENT_SPAN.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+# Shared by every entry: one process, one trace stream
+TRACER = BluestarTracer()
@@ -0,0 +1,276 @@
+"""Traffic recording and replay for Bluestar Smart AC integration.
+
+A recording is a JSON-lines file with one compact entry per HTTP exchange
+or MQTT message, timed relative to the start of the recording::
+
+    {"t":0.41,"k":"http","m":"GET","p":"/things","s":200,"d":0.38,"h":{...},"b":"..."}
+    {"t":2.03,"k":"pub","topic":"things/abc/control","payload":{...}}
+    {"t":3.11,"k":"recv","topic":"$aws/things/abc/shadow/update/documents","payload":{...}}
+
+Credentials and session tokens are redacted before anything is written.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import aiohttp
+
+REDACTED = "**REDACTED**"
+REDACT_KEYS = {"password", "auth_id", "session", "mi", "X-APP-SESSION"}
+# Response headers worth keeping (conditional requests depend on them)
+RECORDED_HEADERS = ("ETag", "Last-Modified", "Content-Type")
+
+
+def redact(value: Any) -> Any:
+    """Return a copy of a JSON value with credential fields replaced."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in REDACT_KEYS else redact(item) for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def _redact_body(body: bytes) -> str:
+    """Return a response body as text, redacted when it is JSON."""
+    text = body.decode("utf-8", errors="replace")
+    try:
+        return json.dumps(redact(json.loads(text)), separators=(",", ":"))
+    except ValueError:
+        return text
+
+
+class RecordedResponse:
+    """The parts of ``aiohttp.ClientResponse`` the API client uses, over a buffered body."""
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self._body = body
+        self.content = self
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self) -> str:
+        return self._body.decode("utf-8", errors="replace")
+
+    async def json(self) -> Any:
+        return json.loads(self._body)
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        for start in range(0, len(self._body), size):
+            yield self._body[start:start + size]
+
+
+class JsonLinesWriter:
+    """Append JSON objects to a file, one per line, from a background thread.
+
+    ``write`` may be called from the event loop or paho's network thread;
+    file I/O only ever happens on the writer thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._write_loop, name=f"bluestar_ac writer {path}", daemon=True
+        )
+        self._thread.start()
+
+    def _write_loop(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as file:
+            while True:
+                line = self._queue.get()
+                if line is None:
+                    return
+                file.write(line)
+                file.write("\n")
+                if self._queue.empty():
+                    file.flush()
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        """Queue one entry for writing."""
+        self._queue.put(json.dumps(entry, separators=(",", ":"), default=str))
+
+    def close(self) -> None:
+        """Write out everything queued and stop the writer thread (blocking)."""
+        self._queue.put(None)
+        self._thread.join()
+
+
+class TrafficRecorder:
+    """Record HTTP exchanges and MQTT messages to a recording file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._start = time.monotonic()
+        self._writer = JsonLinesWriter(path)
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        entry["t"] = round(time.monotonic() - self._start, 4)
+        self._writer.write(entry)
+
+    def record_http(
+        self,
+        method: str,
+        path: str,
+        request_json: Any,
+        status: int,
+        headers: Any,
+        body: bytes,
+        duration: float,
+    ) -> None:
+        """Record one HTTP exchange."""
+        self._append(
+            {
+                "k": "http",
+                "m": method,
+                "p": path,
+                "rq": redact(request_json),
+                "s": status,
+                "d": round(duration, 4),
+                "h": {name: headers[name] for name in RECORDED_HEADERS if name in headers},
+                "b": _redact_body(body),
+            }
+        )
+
+    def record_mqtt(self, kind: str, topic: str, payload: Any) -> None:
+        """Record an MQTT publish (``pub``) or received message (``recv``)."""
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8", errors="replace")
+        if isinstance(payload, str):
+            try:
+                payload = json.loads(payload)
+            except ValueError:
+                pass
+        self._append({"k": kind, "topic": topic, "payload": redact(payload)})
+
+    def close(self) -> None:
+        """Finish writing the recording (blocking)."""
+        self._writer.close()
+
+
+def load_recording(path: str) -> List[Dict[str, Any]]:
+    """Read a recording file (blocking)."""
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+class BluestarReplayTransport:
+    """Serve a recording back to ``BluestarAPI`` instead of the network.
+
+    HTTP requests are answered in recorded order for each method and path,
+    after their recorded duration; received MQTT messages are delivered at
+    their recorded offsets. ``speed`` scales time (2.0 replays twice as
+    fast, 0 as fast as possible), so runs are repeatable without a network.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], speed: float = 1.0):
+        self.speed = speed
+        self._http = [entry for entry in entries if entry["k"] == "http"]
+        self._messages = [entry for entry in entries if entry["k"] == "recv"]
+        self._used = [False] * len(self._http)
+        self._start: Optional[float] = None
+
+    @classmethod
+    async def async_from_file(cls, path: str, speed: float = 1.0) -> "BluestarReplayTransport":
+        """Load a recording without blocking the event loop."""
+        entries = await asyncio.get_running_loop().run_in_executor(None, load_recording, path)
+        return cls(entries, speed)
+
+    def _scaled(self, seconds: float) -> float:
+        return seconds / self.speed if self.speed else 0.0
+
+    def _elapsed(self) -> float:
+        loop = asyncio.get_running_loop()
+        if self._start is None:
+            self._start = loop.time()
+        return loop.time() - self._start
+
+    async def async_http(self, method: str, path: str) -> RecordedResponse:
+        """Return the next recorded response for a request."""
+        self._elapsed()
+        for index, entry in enumerate(self._http):
+            if not self._used[index] and entry["m"] == method and entry["p"] == path:
+                self._used[index] = True
+                await asyncio.sleep(self._scaled(entry.get("d", 0)))
+                return RecordedResponse(entry["s"], entry.get("h", {}), entry["b"].encode())
+        raise aiohttp.ClientConnectionError(f"No recorded response left for {method} {path}")
+
+    async def async_deliver_messages(self, deliver: Callable[[str, Any], None]) -> None:
+        """Deliver every recorded MQTT message at its (scaled) offset."""
+        for entry in self._messages:
+            delay = self._scaled(entry["t"]) - self._elapsed()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            deliver(entry["topic"], entry["payload"])
+
+    def create_mqtt_client(self) -> "ReplayMQTTClient":
+        """Return an MQTT client that replays this recording's messages."""
+        return ReplayMQTTClient(self)
+
+
+class ReplayMQTTClient:
+    """Stand-in for ``BluestarMQTTClient`` fed from a recording."""
+
+    def __init__(self, transport: BluestarReplayTransport):
+        self._transport = transport
+        self._listeners: Dict[str, List[Callable[[str, Any], None]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.is_connected = False
+        self.traffic: Optional[TrafficRecorder] = None
+        self.published: List[Dict[str, Any]] = []
+
+    async def connect(self) -> bool:
+        self.is_connected = True
+        self._task = asyncio.get_running_loop().create_task(
+            self._transport.async_deliver_messages(self._deliver)
+        )
+        return True
+
+    def _deliver(self, topic: str, payload: Any) -> None:
+        for listener in list(self._listeners.get(topic, ())):
+            listener(topic, payload)
+
+    def subscribe(self, topic: str, listener: Callable[[str, Any], None]) -> Callable[[], None]:
+        listeners = self._listeners.setdefault(topic, [])
+        listeners.append(listener)
+
+        def _unsubscribe() -> None:
+            if listener in listeners:
+                listeners.remove(listener)
+            if not listeners and self._listeners.get(topic) is listeners:
+                del self._listeners[topic]
+
+        return _unsubscribe
+
+    async def async_publish(self, device_id: str, control_payload: Dict[str, Any]) -> bool:
+        self.published.append({"device_id": device_id, "payload": control_payload})
+        return True
+
+    async def async_force_sync(self, device_id: str) -> bool:
+        return await self.async_publish(device_id, {"fpsh": 1})
+
+    def disconnect(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self.is_connected = False
+
+    async def async_disconnect(self) -> None:
+        self.disconnect()
@@ -0,0 +1,9 @@
+"""Fixtures for Bluestar Smart AC tests."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load custom_components/bluestar_ac in every test."""
+    yield
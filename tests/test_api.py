@@ -0,0 +1,107 @@
+"""API client tests for Bluestar Smart AC integration."""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+from custom_components.bluestar_ac.api import BluestarAPI, BluestarAPIError
+from custom_components.bluestar_ac.traffic import RecordedResponse
+
+
+async def test_closed_client_refuses_requests():
+    """After close() no request goes out, no session opens and probing stays off."""
+    api = BluestarAPI(phone="9999999999", password="secret")
+    await api.close()
+
+    with pytest.raises(BluestarAPIError):
+        await api.login()
+    assert api._session is None
+    assert api.endpoints._probe_task is None
+
+
+THINGS_V1 = {
+    "things": [{"thing_id": "ac1", "user_config": {"name": "Bedroom AC"}}],
+    "states": {"ac1": {"connected": True, "state": {"pow": 0, "mode": 2}}},
+}
+THINGS_V2 = {
+    "things": THINGS_V1["things"],
+    "states": {"ac1": {"connected": True, "state": {"pow": 1, "mode": 2}}},
+}
+
+
+class FakeSession:
+    """Answers requests from a list of recorded responses, keeping their headers."""
+
+    closed = False
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.request_headers = []
+
+    @asynccontextmanager
+    async def request(self, method, url, headers=None, **kwargs):
+        self.request_headers.append(headers or {})
+        yield self.responses.pop(0)
+
+
+def _response(status, etag=None, body=b""):
+    return RecordedResponse(status, {"ETag": etag} if etag else {}, body)
+
+
+def _client(*responses):
+    api = BluestarAPI(phone="9999999999", password="secret", base_url="http://bluestar.test")
+    api.session_token = "token"
+    api._session = FakeSession(*responses)
+    return api
+
+
+async def test_not_modified_serves_cached_devices():
+    """A 304 for the cached ETag returns the cached documents unchanged."""
+    api = _client(
+        _response(200, '"v1"', json.dumps(THINGS_V1).encode()),
+        _response(304),
+    )
+    first = await api.get_devices()
+    version = api.devices_cache.state_version
+
+    assert await api.get_devices() == first
+    assert api._session.request_headers[1]["If-None-Match"] == '"v1"'
+    assert api.devices_cache.state_version == version
+
+
+async def test_failed_parse_keeps_previous_validators():
+    """A truncated body neither replaces the cache nor its ETag, so the retry refetches."""
+    body = json.dumps(THINGS_V2).encode()
+    api = _client(
+        _response(200, '"v1"', json.dumps(THINGS_V1).encode()),
+        _response(200, '"v2"', body[: len(body) // 2]),
+        _response(200, '"v2"', body),
+    )
+    await api.get_devices()
+
+    with pytest.raises(ValueError):
+        await api.get_devices()
+    assert api.devices_cache.etag == '"v1"'
+    assert api.devices_cache.states["ac1"]["state"]["pow"] == 0
+
+    data = await api.get_devices()
+    assert api._session.request_headers[2]["If-None-Match"] == '"v1"'
+    assert data["states"]["ac1"]["state"]["pow"] == 1
+    assert api.devices_cache.etag == '"v2"'
+
+
+async def test_timed_out_request_is_sampled():
+    """A request that hits its timeout feeds the adaptive timeout too."""
+    api = _client()
+
+    @asynccontextmanager
+    async def request(method, url, **kwargs):
+        raise asyncio.TimeoutError
+        yield
+
+    api._session.request = request
+    with pytest.raises(asyncio.TimeoutError):
+        await api.get_devices()
+    assert list(api.timeouts._samples["things"]) == [api.timeouts.ceiling]
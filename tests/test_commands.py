@@ -0,0 +1,227 @@
+"""Command pipeline tests for Bluestar Smart AC integration."""
+
+import asyncio
+import dataclasses
+import time
+
+import pytest
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+
+from custom_components.bluestar_ac.api import BluestarAPI, BluestarAPIError
+from custom_components.bluestar_ac.commands import (
+    BluestarCommandError,
+    DisplayCommand,
+    FanCommand,
+    ModeCommand,
+    PowerCommand,
+    PriorityLimiter,
+    SetpointCommand,
+    SwingCommand,
+)
+from custom_components.bluestar_ac.const import (
+    MAX_TEMP,
+    MIN_TEMP,
+    PRIORITY_BACKGROUND,
+    PRIORITY_USER,
+)
+from custom_components.bluestar_ac.coordinator import BluestarDataUpdateCoordinator
+from custom_components.bluestar_ac.sequences import BluestarCommandSequences
+
+DEVICES = {
+    "things": [
+        {"thing_id": "ac1", "user_config": {"name": "Bedroom AC"}},
+        {"thing_id": "ac2", "user_config": {"name": "Living Room AC"}},
+    ],
+    "states": {
+        "ac1": {"connected": True, "timestamp": 0, "state": {"pow": 0, "mode": 2, "stemp": "24.0"}},
+        "ac2": {"connected": True, "timestamp": 0, "state": {"pow": 0, "mode": 2, "stemp": "24.0"}},
+    },
+}
+
+
+@pytest.fixture
+async def coordinator(hass):
+    """A polled coordinator whose API records commands instead of sending them."""
+    api = BluestarAPI(phone="9999999999", password="secret")
+    api.session_token = "token"
+    api.sent = []
+    # device_id -> event a command to that device waits for, if set
+    api.gates = {}
+
+    async def get_devices(priority=None):
+        api.devices_cache.seed(DEVICES)
+        return api.devices_cache.data
+
+    async def control_device(device_id, control_data, ts=None):
+        api.sent.append((device_id, dict(control_data)))
+        gate = api.gates.get(device_id)
+        if gate is not None:
+            await gate.wait()
+        return {"path": "mqtt", "sent_at": time.monotonic(), "http": [], "errors": []}
+
+    api.get_devices = get_devices
+    api.control_device = control_device
+    coordinator = BluestarDataUpdateCoordinator(hass, api, scan_interval=None)
+    await coordinator.async_refresh()
+    yield coordinator
+    await coordinator.commands.async_shutdown()
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        SetpointCommand(MIN_TEMP - 1),
+        SetpointCommand(MAX_TEMP + 1),
+        SetpointCommand(MIN_TEMP + 0.3),
+        ModeCommand(99),
+        FanCommand(99),
+        SwingCommand(),
+        SwingCommand(vertical=99),
+    ],
+)
+def test_invalid_commands_are_rejected(command):
+    """Out-of-range or unknown values never reach the API."""
+    with pytest.raises(BluestarCommandError):
+        command.validate()
+
+
+def test_commands_are_frozen_and_map_to_control_fields():
+    """Commands are immutable values that translate to Bluestar control fields."""
+    command = SetpointCommand(24)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        command.temperature = 25
+    assert command.to_control_data() == {"stemp": "24.0"}
+    assert PowerCommand(True).to_control_data() == {"pow": 1}
+    assert DisplayCommand(False).to_control_data() == {"display": 0}
+    assert SwingCommand(vertical=1).to_control_data() == {"vswing": 1}
+
+
+async def test_commands_of_one_call_are_sent_together(coordinator):
+    """Several commands in one call make a single control request."""
+    await coordinator.commands.async_send("ac1", PowerCommand(True), SetpointCommand(22))
+    assert coordinator.api.sent == [("ac1", {"pow": 1, "stemp": "22.0"})]
+    assert coordinator.commands.last_sequence("ac1") == 1
+
+
+async def test_invalid_command_fails_before_sending(coordinator):
+    """One invalid command rejects the whole call."""
+    with pytest.raises(BluestarCommandError):
+        await coordinator.commands.async_send("ac1", PowerCommand(True), ModeCommand(99))
+    assert coordinator.api.sent == []
+
+
+async def test_command_matching_confirmed_state_is_suppressed(coordinator):
+    """A command for the state the device already reported is not sent."""
+    result = await coordinator.commands.async_send("ac1", PowerCommand(False))
+    assert result["suppressed"]
+    assert coordinator.api.sent == []
+    assert coordinator.commands.suppressed_count == 1
+
+
+async def test_command_matching_pending_state_is_suppressed(coordinator):
+    """Repeating a command that is sent but not yet reported is a no-op too."""
+    await coordinator.commands.async_send("ac1", PowerCommand(True))
+    result = await coordinator.commands.async_send("ac1", PowerCommand(True))
+    assert result["suppressed"]
+    assert coordinator.api.sent == [("ac1", {"pow": 1})]
+
+
+async def test_only_changed_fields_are_sent(coordinator):
+    """Fields that already match are dropped from a mixed command."""
+    await coordinator.commands.async_send("ac1", PowerCommand(False), SetpointCommand(22))
+    assert coordinator.api.sent == [("ac1", {"stemp": "22.0"})]
+
+
+async def test_force_sends_no_op_commands(coordinator):
+    """``force`` bypasses suppression."""
+    await coordinator.commands.async_send("ac1", PowerCommand(False), force=True)
+    assert coordinator.api.sent == [("ac1", {"pow": 0})]
+
+
+async def test_commands_run_in_order_per_device_and_in_parallel_across_devices(coordinator):
+    """A device's second command waits for its first; another device does not."""
+    api = coordinator.api
+    api.gates["ac1"] = asyncio.Event()
+    first = asyncio.create_task(coordinator.commands.async_send("ac1", PowerCommand(True)))
+    second = asyncio.create_task(coordinator.commands.async_send("ac1", SetpointCommand(22)))
+    await asyncio.sleep(0.01)
+
+    await coordinator.commands.async_send("ac2", PowerCommand(True))
+    assert api.sent == [("ac1", {"pow": 1}), ("ac2", {"pow": 1})]
+
+    api.gates["ac1"].set()
+    await asyncio.gather(first, second)
+    assert api.sent[2] == ("ac1", {"stemp": "22.0"})
+
+
+async def test_command_deadline(coordinator):
+    """A caller stops waiting after the deadline, with an API error."""
+    coordinator.commands.deadline = 0.05
+    coordinator.api.gates["ac1"] = asyncio.Event()
+    with pytest.raises(BluestarAPIError, match="did not complete"):
+        await coordinator.commands.async_send("ac1", PowerCommand(True))
+    coordinator.api.gates["ac1"].set()
+
+
+async def test_limiter_admits_lowest_priority_value_first():
+    """A user command waiting behind a background job gets the next free slot."""
+    limiter = PriorityLimiter(1)
+    order = []
+    release = asyncio.Event()
+
+    async def job(name, priority):
+        async with limiter.slot(priority):
+            order.append(name)
+            await release.wait()
+
+    holder = asyncio.create_task(job("holder", PRIORITY_USER))
+    await asyncio.sleep(0)
+    jobs = [
+        asyncio.create_task(job("poll", PRIORITY_BACKGROUND)),
+        asyncio.create_task(job("command", PRIORITY_USER)),
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, *jobs)
+    assert order == ["holder", "command", "poll"]
+    assert limiter.active == 0
+
+
+async def test_limiter_waiter_cancelled_while_waiting():
+    """A cancelled waiter neither takes nor leaks a slot."""
+    limiter = PriorityLimiter(1)
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+    release.set()
+    await holder
+    assert limiter.active == 0
+    async with limiter.slot():
+        assert limiter.active == 1
+
+
+async def test_sequence_numbers_continue_after_reload(hass, coordinator):
+    """A new pipeline for the entry continues each device's sequence."""
+    sequences = BluestarCommandSequences(hass, "entry")
+    await sequences.async_load()
+    assert [sequences.async_next("ac1") for _ in range(3)] == [1, 2, 3]
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+
+    restored = BluestarCommandSequences(hass, "entry")
+    await restored.async_load()
+    coordinator.commands.sequences = restored
+    await coordinator.commands.async_send("ac1", PowerCommand(True))
+    assert coordinator.commands.last_sequence("ac1") == 4
+    assert coordinator.commands.last_sequence("ac2") == 0
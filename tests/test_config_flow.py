@@ -0,0 +1,74 @@
+"""Config flow tests for Bluestar Smart AC integration."""
+
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant import config_entries
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.bluestar_ac.const import (
+    CONF_BASE_URL,
+    CONF_PASSWORD,
+    CONF_PHONE,
+    DATA_HUB,
+    DEFAULT_BASE_URL,
+    DOMAIN,
+)
+
+USER_INPUT = {CONF_PHONE: "9999999999", CONF_PASSWORD: "secret", CONF_BASE_URL: DEFAULT_BASE_URL}
+DEVICES = {
+    "things": [{"thing_id": "ac1", "user_config": {"name": "Bedroom AC"}}],
+    "states": {"ac1": {"connected": True, "timestamp": 0, "state": {"pow": 1, "mode": 2}}},
+}
+
+
+@pytest.fixture
+def logins():
+    """Count logins made by the flow; setting up the entry is skipped."""
+    calls = []
+
+    async def fake_login(self, connect_mqtt=True):
+        calls.append(self.phone)
+        self.session_token = "token"
+        return {"session": "token"}
+
+    async def fake_get_devices(self, priority=None):
+        return DEVICES
+
+    async def fake_setup_entry(hass, entry):
+        return True
+
+    with patch("custom_components.bluestar_ac.api.BluestarAPI.login", fake_login), patch(
+        "custom_components.bluestar_ac.api.BluestarAPI.get_devices", fake_get_devices
+    ), patch("custom_components.bluestar_ac.async_setup_entry", fake_setup_entry):
+        yield calls
+
+
+async def test_new_account_stashes_validated_login(hass, logins):
+    """The login made by the flow is handed to the hub for the new entry."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}, data=USER_INPUT
+    )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert logins == ["9999999999"]
+
+    hub = hass.data[DOMAIN][DATA_HUB]
+    assert hub._pop_validated(hub.account_key("9999999999", DEFAULT_BASE_URL)) == (
+        {"session": "token"},
+        DEVICES,
+    )
+
+
+async def test_duplicate_account_aborts_without_stashing(hass, logins):
+    """A flow for a configured phone number aborts before logging in."""
+    MockConfigEntry(domain=DOMAIN, unique_id="9999999999", data=USER_INPUT).add_to_hass(hass)
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}, data=USER_INPUT
+    )
+    assert result["type"] == FlowResultType.ABORT
+    assert result["reason"] == "already_configured"
+    assert logins == []
+    assert DATA_HUB not in hass.data.get(DOMAIN, {})
@@ -0,0 +1,101 @@
+"""API endpoint pool tests for Bluestar Smart AC integration."""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+
+from custom_components.bluestar_ac.const import BLUESTAR_BASE_URLS
+from custom_components.bluestar_ac.endpoints import (
+    DEGRADED_ERROR_RATE,
+    BluestarEndpointPool,
+    EndpointHealth,
+)
+
+PRIMARY, BACKUP = (url.rstrip("/") for url in BLUESTAR_BASE_URLS)
+
+
+class ProbeSession:
+    """Answers probes per host: a status code, or None for a connection error."""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+
+    @asynccontextmanager
+    async def get(self, url, **kwargs):
+        status = next(value for host, value in self.statuses.items() if url.startswith(host))
+        if status is None:
+            raise aiohttp.ClientConnectionError()
+        yield SimpleNamespace(status=status)
+
+
+def _fail(pool, url, times):
+    for _ in range(times):
+        pool.record(url, False, 0.1)
+
+
+def test_health_is_smoothed():
+    """Latency and error rate are exponentially weighted moving averages."""
+    health = EndpointHealth(PRIMARY)
+    health.record(True, 1.0)
+    health.record(True, 2.0)
+    assert health.latency == pytest.approx(1.2)
+    assert health.score == pytest.approx(1.2)
+
+    for _ in range(3):
+        health.record(False, 5.0)
+    # Failed requests do not move the latency, only the error rate
+    assert health.latency == pytest.approx(1.2)
+    assert health.error_rate == pytest.approx(1 - 0.8 ** 3)
+    assert not health.degraded
+    health.record(False, 5.0)
+    assert health.error_rate >= DEGRADED_ERROR_RATE
+    assert health.degraded
+
+
+def test_unknown_hosts_are_not_pooled():
+    """A custom base URL is used alone, without failover candidates."""
+    pool = BluestarEndpointPool("http://bluestar.test/")
+    assert pool.urls == ["http://bluestar.test"]
+
+
+def test_fails_over_when_current_degrades():
+    """The current endpoint is kept while healthy and left once degraded."""
+    pool = BluestarEndpointPool(PRIMARY)
+    pool.record(BACKUP, True, 0.2)
+    pool.record(PRIMARY, True, 0.5)
+    _fail(pool, PRIMARY, 3)
+    assert pool.current == PRIMARY
+
+    _fail(pool, PRIMARY, 1)
+    assert pool.current == BACKUP
+
+
+def test_stays_when_no_alternative_is_healthy():
+    """With every endpoint degraded there is nowhere better to go."""
+    pool = BluestarEndpointPool(PRIMARY)
+    _fail(pool, BACKUP, 5)
+    _fail(pool, PRIMARY, 5)
+    assert pool.current == PRIMARY
+
+
+async def test_probes_recover_an_endpoint_and_fail_back():
+    """Probes heal a degraded endpoint, which takes over when the other one fails."""
+    pool = BluestarEndpointPool(PRIMARY)
+    pool.record(BACKUP, True, 0.2)
+    _fail(pool, PRIMARY, 5)
+    assert pool.current == BACKUP
+
+    # Primary answers probes again (401 is fine for an unauthenticated probe)
+    session = ProbeSession({PRIMARY: 401, BACKUP: 401})
+    for _ in range(5):
+        await pool.async_probe(session)
+    assert not pool.as_dict()["endpoints"][PRIMARY]["degraded"]
+    # Sticky: a healthy current endpoint is not switched away from
+    assert pool.current == BACKUP
+
+    session.statuses[BACKUP] = None
+    for _ in range(4):
+        await pool.async_probe(session)
+    assert pool.current == PRIMARY
@@ -0,0 +1,72 @@
+"""Import-time benchmarks for Bluestar Smart AC integration."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PLATFORM_MODULES = [
+    "custom_components.bluestar_ac",
+    "custom_components.bluestar_ac.config_flow",
+    "custom_components.bluestar_ac.climate",
+    "custom_components.bluestar_ac.sensor",
+    "custom_components.bluestar_ac.select",
+    "custom_components.bluestar_ac.switch",
+    "custom_components.bluestar_ac.button",
+]
+
+# Upper bound for importing the integration and all its platforms on top of
+# homeassistant.core; generous so slow CI runners do not flake
+IMPORT_BUDGET = 3.0  # seconds
+
+# Run in a fresh interpreter so earlier tests cannot pre-load anything
+MEASURE_SCRIPT = """
+import importlib, json, sys, time
+modules = json.loads(sys.argv[1])
+import homeassistant.core  # baseline: Home Assistant itself is always loaded
+timings = {}
+for name in modules:
+    start = time.perf_counter()
+    importlib.import_module(name)
+    timings[name] = time.perf_counter() - start
+print(json.dumps({
+    "timings": timings,
+    "paho_loaded": "paho.mqtt.client" in sys.modules,
+    "mqtt_loaded": "custom_components.bluestar_ac.mqtt" in sys.modules,
+}))
+"""
+
+
+def _measure_imports() -> dict:
+    pytest.importorskip("homeassistant")
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_SCRIPT, json.dumps(PLATFORM_MODULES)],
+        cwd=ROOT,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_platform_import_does_not_load_mqtt_transport(record_property):
+    """Loading the integration and its platforms must not import paho-mqtt.
+
+    Per-module import times are recorded as test properties (they end up in
+    the JUnit XML report) and their total is held to ``IMPORT_BUDGET``.
+    """
+    measured = _measure_imports()
+
+    timings = measured["timings"]
+    for name, seconds in timings.items():
+        record_property(f"import_ms:{name}", round(seconds * 1000, 1))
+    total = sum(timings.values())
+    record_property("import_ms:total", round(total * 1000, 1))
+
+    assert not measured["mqtt_loaded"]
+    assert not measured["paho_loaded"]
+    assert total < IMPORT_BUDGET
@@ -0,0 +1,64 @@
+"""Streaming /things parser tests for Bluestar Smart AC integration."""
+
+import json
+
+import pytest
+
+from custom_components.bluestar_ac.jsonstream import ThingsStreamParser
+
+BODY = json.dumps(
+    {
+        "meta": {"note": "brace } bracket ] quote \" backslash \\", "count": 2},
+        "things": [
+            {"thing_id": "ac1", "user_config": {"name": "Bedroom \"AC\" \\ 1"}},
+            {"thing_id": "ac2", "user_config": {"name": "Küche ❄"}},
+        ],
+        "states": {
+            "ac1": {"connected": True, "state": {"pow": 1, "stemp": "24.0", "tags": []}},
+            "a\"c2": {"connected": False, "state": {"pow": 0, "ctemp": -1.5e1}},
+        },
+        "total": 12345,
+    },
+    ensure_ascii=False,
+).encode()
+
+
+def _parse(chunks):
+    parser = ThingsStreamParser()
+    members = []
+    for chunk in chunks:
+        members.extend(parser.feed(chunk))
+    parser.close()
+    return [(section, key, json.loads(raw)) for section, key, raw in members]
+
+
+EXPECTED = _parse([BODY])
+
+
+def test_whole_body_yields_every_member():
+    """Things come without a key, states keyed by thing id; other keys are skipped."""
+    document = json.loads(BODY)
+    assert EXPECTED == [
+        *(("things", None, thing) for thing in document["things"]),
+        *(("states", key, state) for key, state in document["states"].items()),
+    ]
+
+
+def test_every_two_chunk_split():
+    """A split anywhere (keys, strings, escapes, numbers, UTF-8 sequences) parses the same."""
+    for split in range(1, len(BODY)):
+        assert _parse([BODY[:split], BODY[split:]]) == EXPECTED, split
+
+
+def test_one_byte_chunks():
+    """The worst case: every token arrives across many chunks."""
+    assert _parse([BODY[i:i + 1] for i in range(len(BODY))]) == EXPECTED
+
+
+@pytest.mark.parametrize("cut", [1, len(BODY) // 2, len(BODY) - 1])
+def test_truncated_body_raises(cut):
+    """close() rejects a body that ended early."""
+    parser = ThingsStreamParser()
+    parser.feed(BODY[:cut])
+    with pytest.raises(ValueError):
+        parser.close()
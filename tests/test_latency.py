@@ -0,0 +1,43 @@
+"""Command latency tracking tests for Bluestar Smart AC integration."""
+
+from custom_components.bluestar_ac.latency import (
+    COMMAND_APPLY_TIMEOUT,
+    TIMEOUT_CEILING,
+    TIMEOUT_MULTIPLIER,
+    TIMEOUT_SAMPLES,
+    AdaptiveTimeouts,
+    CommandLatencyTracker,
+)
+
+
+def test_unapplied_command_times_out_without_state_change():
+    """A command the device never applies is flagged once the timeout passes."""
+    tracker = CommandLatencyTracker()
+    tracker.record_sent("ac1", {"pow": 1}, "mqtt", sent_at=0.0, seq=1, ts=0)
+
+    # Reports that do not match (or no reports at all) leave it outstanding
+    tracker.observe("ac1", {"pow": 0}, "poll", observed_at=5.0)
+    assert tracker.expire(now=COMMAND_APPLY_TIMEOUT - 1) == 0
+    assert tracker.pending_count("ac1") == 1
+
+    assert tracker.expire(now=COMMAND_APPLY_TIMEOUT + 1) == 1
+    assert tracker.pending_count() == 0
+    assert tracker.stats[("ac1", "mqtt")].timed_out == 1
+    assert tracker.stats[("ac1", "mqtt")].applied == 0
+
+
+def test_timeouts_widen_again_after_requests_time_out():
+    """A tight timeout that requests keep hitting grows instead of staying put."""
+    timeouts = AdaptiveTimeouts()
+    for _ in range(TIMEOUT_SAMPLES):
+        timeouts.record("things", 1.5)
+    tight = timeouts.timeout("things")
+    assert tight == 1.5 * TIMEOUT_MULTIPLIER
+
+    timeouts.record_timeout("things")
+    timeouts.record_timeout("things")
+    assert timeouts.timeout("things") > tight
+
+    for _ in range(TIMEOUT_SAMPLES):
+        timeouts.record_timeout("things")
+    assert timeouts.timeout("things") == TIMEOUT_CEILING
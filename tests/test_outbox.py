@@ -0,0 +1,126 @@
+"""Offline command outbox tests for Bluestar Smart AC integration."""
+
+import time
+
+import pytest
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+
+from custom_components.bluestar_ac.api import BluestarAPI, BluestarAPIError
+from custom_components.bluestar_ac.coordinator import BluestarDataUpdateCoordinator
+from custom_components.bluestar_ac.outbox import BluestarOutbox
+
+DEVICES = {
+    "things": [{"thing_id": "ac1", "user_config": {"name": "Bedroom AC"}}],
+    "states": {"ac1": {"connected": True, "timestamp": 0, "state": {"pow": 0, "mode": 2}}},
+}
+
+
+def _control_result(device_id, control_data, sent=True, errors=()):
+    return {
+        "deviceId": device_id,
+        "controlData": control_data,
+        "path": "mqtt" if sent else None,
+        "sent_at": time.monotonic() if sent else None,
+        "http": [],
+        "errors": list(errors),
+    }
+
+
+@pytest.fixture
+def api():
+    """An API client that never touches the network."""
+    client = BluestarAPI(phone="9999999999", password="secret")
+    client.session_token = "token"
+    client.sent = []
+    client.control_errors = None
+
+    async def get_devices(priority=None):
+        client.devices_cache.seed(DEVICES)
+        return client.devices_cache.data
+
+    async def control_device(device_id, control_data, ts=None):
+        if client.control_errors is not None:
+            return _control_result(device_id, control_data, False, client.control_errors)
+        client.sent.append((device_id, dict(control_data)))
+        return _control_result(device_id, control_data)
+
+    client.get_devices = get_devices
+    client.control_device = control_device
+    return client
+
+
+async def test_commands_coalesce_per_device(hass):
+    """Later values of a field replace earlier ones; other fields are kept."""
+    outbox = BluestarOutbox(hass, "entry")
+    outbox.async_add("ac1", {"pow": 1, "stemp": "24.0"})
+    outbox.async_add("ac1", {"pow": 0})
+    outbox.async_add("ac2", {"fspd": 3})
+
+    batch = outbox.async_take_all()
+    assert batch["ac1"][0] == {"pow": 0, "stemp": "24.0"}
+    assert batch["ac2"][0] == {"fspd": 3}
+    assert len(outbox) == 0
+
+
+async def test_expired_fields_are_dropped(hass):
+    """Fields past their TTL are not sent, live ones are."""
+    outbox = BluestarOutbox(hass, "entry", ttl=60)
+    outbox.async_add("ac1", {"pow": 1}, expires=time.time() - 1)
+    outbox.async_add("ac1", {"stemp": "24.0"})
+    outbox.async_add("ac2", {"fspd": 3}, expires=time.time() - 1)
+
+    batch = outbox.async_take_all()
+    assert list(batch) == ["ac1"]
+    assert batch["ac1"][0] == {"stemp": "24.0"}
+
+
+async def test_outbox_survives_reload(hass, hass_storage):
+    """Queued commands are saved and restored by a new outbox for the entry."""
+    outbox = BluestarOutbox(hass, "entry")
+    outbox.async_add("ac1", {"pow": 1})
+    outbox.async_add("ac2", {"fspd": 3}, expires=time.time() - 1)
+    # Shutting down writes every delayed save
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+    assert "bluestar_ac.outbox.entry" in hass_storage
+
+    restored = BluestarOutbox(hass, "entry")
+    await restored.async_load()
+    assert restored.as_dict() == {"ac1": ["pow"]}
+
+
+async def test_outage_is_queued_and_flushed_after_poll(hass, api):
+    """A command that hit an outage is sent by the next successful poll."""
+    outbox = BluestarOutbox(hass, "entry")
+    coordinator = BluestarDataUpdateCoordinator(hass, api, scan_interval=None, outbox=outbox)
+    await coordinator.async_refresh()
+
+    api.control_errors = [BluestarAPIError("Preferences control failed: 503", 503)]
+    result = await coordinator.commands.async_send_control_data("ac1", {"pow": 1})
+    assert result["queued"]
+    assert outbox.as_dict() == {"ac1": ["pow"]}
+    assert coordinator.commands.sent_count == 0
+
+    api.control_errors = None
+    await coordinator.async_refresh()
+    await coordinator.commands._flush_task
+    assert api.sent == [("ac1", {"pow": 1})]
+    assert len(outbox) == 0
+
+
+async def test_refusal_is_raised_not_queued(hass, api):
+    """A 4xx from the cloud is an error for the caller, never replayed later."""
+    outbox = BluestarOutbox(hass, "entry")
+    coordinator = BluestarDataUpdateCoordinator(hass, api, scan_interval=None, outbox=outbox)
+    await coordinator.async_refresh()
+
+    api.control_errors = [
+        BluestarAPIError("MQTT publish failed"),
+        BluestarAPIError("Preferences control failed: 400", 400),
+    ]
+    with pytest.raises(BluestarAPIError) as error:
+        await coordinator.commands.async_send_control_data("ac1", {"pow": 1})
+    assert error.value.status_code == 400
+    assert len(outbox) == 0
+    assert coordinator.commands.pending_control_data("ac1") == {}
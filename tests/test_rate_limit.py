@@ -0,0 +1,74 @@
+"""Request rate limiting tests for Bluestar Smart AC integration."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from custom_components.bluestar_ac.api import BluestarRateLimiter, TokenBucket
+from custom_components.bluestar_ac.const import (
+    BLUESTAR_BASE_URLS,
+    PRIORITY_BACKGROUND,
+    PRIORITY_USER,
+)
+from custom_components.bluestar_ac.endpoints import BluestarEndpointPool
+
+
+async def test_waiters_are_served_by_priority():
+    """A user request queued after a background one still gets the next token."""
+    bucket = TokenBucket(capacity=1, rate=20)
+    assert await bucket.acquire() == 0.0
+
+    order = []
+
+    async def take(name, priority):
+        await bucket.acquire(priority)
+        order.append(name)
+
+    background = asyncio.create_task(take("poll", PRIORITY_BACKGROUND))
+    await asyncio.sleep(0)
+    user = asyncio.create_task(take("command", PRIORITY_USER))
+    await asyncio.gather(background, user)
+    assert order == ["command", "poll"]
+
+
+async def test_tokens_refill_up_to_capacity():
+    """Spent tokens come back at the bucket's rate, never beyond its capacity."""
+    bucket = TokenBucket(capacity=2, rate=50)
+    await bucket.acquire()
+    await bucket.acquire()
+    assert bucket.as_dict()["tokens"] < 1
+
+    await asyncio.sleep(0.1)
+    assert bucket.as_dict()["tokens"] == 2
+    assert await bucket.acquire() == 0.0
+
+
+async def test_close_drops_timer_and_waiters():
+    """A closed limiter keeps no loop-bound timer and can be used again."""
+    limiter = BluestarRateLimiter({"read": (1, 0.01)})
+    await limiter.acquire("read")
+    waiter = asyncio.create_task(limiter.acquire("read"))
+    await asyncio.sleep(0)
+    assert limiter.buckets["read"]._timer is not None
+
+    limiter.close()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert waiter.cancelled()
+    assert limiter.buckets["read"]._timer is None
+
+
+async def test_endpoint_probes_take_tokens():
+    """Every probe of a candidate spends a token first."""
+    pool = BluestarEndpointPool(BLUESTAR_BASE_URLS[0])
+    tokens = []
+
+    class Session:
+        @asynccontextmanager
+        async def get(self, url, **kwargs):
+            yield SimpleNamespace(status=401)
+
+    async def acquire_token():
+        tokens.append(True)
+
+    await pool.async_probe(Session(), acquire_token)
+    assert len(tokens) == len(pool.urls) > 1
@@ -0,0 +1,114 @@
+"""Reload resource-leak regression tests for Bluestar Smart AC integration."""
+
+import os
+import socket
+import threading
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.bluestar_ac.const import DOMAIN
+
+RELOAD_CYCLES = 5
+
+DEVICES = {
+    "things": [{"thing_id": "ac1", "user_config": {"name": "Bedroom AC"}}],
+    "states": {"ac1": {"connected": True, "timestamp": 0, "state": {"pow": 1, "mode": 2}}},
+}
+
+
+class FakeMQTTClient:
+    """Stands in for paho: one network thread and one open socket pair."""
+
+    def __init__(self):
+        self._listeners = {}
+        self.is_connected = True
+        self._sockets = socket.socketpair()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._stop.wait, daemon=True)
+        self._thread.start()
+
+    def subscribe(self, topic, listener):
+        return lambda: None
+
+    def disconnect(self):
+        self._stop.set()
+        self._thread.join()
+        for sock in self._sockets:
+            sock.close()
+        self.is_connected = False
+
+    async def async_disconnect(self):
+        self.disconnect()
+
+
+async def fake_login(self, connect_mqtt=True):
+    """Log in without the network, but hold the resources a real login does."""
+    self.session_token = "token"
+    assert not self.session.closed  # opens the aiohttp session
+    self.mqtt_client = FakeMQTTClient()
+    return {}
+
+
+async def fake_get_devices(self, priority=None):
+    return DEVICES
+
+
+def _open_sockets() -> int:
+    count = 0
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            if os.readlink(f"/proc/self/fd/{fd}").startswith("socket:"):
+                count += 1
+        except OSError:
+            continue
+    return count
+
+
+@pytest.fixture
+def mock_config_entry():
+    """Mock config entry."""
+    return MockConfigEntry(
+        domain=DOMAIN,
+        title="Test Bluestar AC",
+        data={
+            "phone": "+919876543210",
+            "password": "test_password",
+            "base_url": "https://api.bluestarindia.com/prod",
+        },
+        options={},
+        entry_id="test_entry_id",
+    )
+
+
+@pytest.mark.asyncio
+async def test_reload_does_not_leak_threads_or_sockets(hass: HomeAssistant, mock_config_entry):
+    """Threads and sockets return to baseline after repeated reloads."""
+    with patch("custom_components.bluestar_ac.api.BluestarAPI.login", fake_login), \
+         patch("custom_components.bluestar_ac.api.BluestarAPI.get_devices", fake_get_devices):
+
+        # One warm-up cycle so executor threads and other lazily created
+        # resources are part of the baseline
+        mock_config_entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(mock_config_entry.entry_id)
+        await hass.async_block_till_done()
+        assert await hass.config_entries.async_unload(mock_config_entry.entry_id)
+        await hass.async_block_till_done()
+
+        threads = threading.active_count()
+        sockets = _open_sockets()
+
+        assert await hass.config_entries.async_setup(mock_config_entry.entry_id)
+        await hass.async_block_till_done()
+        for _ in range(RELOAD_CYCLES):
+            assert await hass.config_entries.async_reload(mock_config_entry.entry_id)
+            await hass.async_block_till_done()
+        assert await hass.config_entries.async_unload(mock_config_entry.entry_id)
+        await hass.async_block_till_done()
+
+        assert threading.active_count() == threads
+        assert _open_sockets() == sockets
+        assert mock_config_entry.entry_id not in hass.data[DOMAIN]
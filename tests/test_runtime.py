@@ -0,0 +1,20 @@
+"""Runtime tracker tests for Bluestar Smart AC integration."""
+
+from custom_components.bluestar_ac.runtime import BluestarRuntimeTracker
+
+
+async def test_listeners_called_on_transitions_only(hass):
+    """A device's listeners run when it turns on, off or changes mode, not on repeats."""
+    tracker = BluestarRuntimeTracker(hass, "entry")
+    calls = {"ac1": 0, "ac2": 0}
+    tracker.async_add_listener(lambda: calls.__setitem__("ac1", calls["ac1"] + 1), "ac1")
+    tracker.async_add_listener(lambda: calls.__setitem__("ac2", calls["ac2"] + 1), "ac2")
+
+    running = {"state": {"pow": 1, "mode": 2}}
+    tracker.async_observe("ac1", running)
+    tracker.async_observe("ac1", running)
+    assert calls == {"ac1": 1, "ac2": 0}
+
+    tracker.async_observe("ac1", {"state": {"pow": 1, "mode": 0}})
+    tracker.async_observe("ac1", {"state": {"pow": 0, "mode": 0}})
+    assert calls == {"ac1": 3, "ac2": 0}
@@ -0,0 +1,21 @@
+"""Service tests for Bluestar Smart AC integration."""
+
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.bluestar_ac.const import DOMAIN, SERVICE_PROFILE
+from custom_components.bluestar_ac.services import async_setup_services
+
+
+async def test_profile_refuses_without_yappi(hass, caplog):
+    """Without yappi the MQTT thread cannot be profiled, so nothing is profiled."""
+    async_setup_services(hass)
+    with patch("custom_components.bluestar_ac.services._import_yappi", return_value=None):
+        with pytest.raises(HomeAssistantError):
+            await hass.services.async_call(
+                DOMAIN, SERVICE_PROFILE, {"seconds": 1}, blocking=True
+            )
+    assert "needs yappi" in caplog.text
@@ -0,0 +1,68 @@
+"""Shadow state store tests for Bluestar Smart AC integration."""
+
+from custom_components.bluestar_ac.state import BluestarStateStore, timestamp_ms
+
+
+def test_stale_version_is_dropped():
+    """A document with a lower shadow version never overwrites a newer one."""
+    store = BluestarStateStore()
+    assert store.reduce("ac1", {"version": 5, "state": {"pow": 1}})
+    assert not store.reduce("ac1", {"version": 4, "state": {"pow": 0}})
+    assert store.states["ac1"]["state"] == {"pow": 1}
+    assert store.dropped_stale == 1
+
+
+def test_duplicate_is_dropped():
+    """Re-reporting the same document changes nothing and is counted."""
+    store = BluestarStateStore()
+    document = {"version": 5, "timestamp": 1_700_000_000, "state": {"pow": 1}}
+    assert store.reduce("ac1", document)
+    assert not store.reduce("ac1", dict(document))
+    assert store.dropped_duplicate == 1
+    assert store.dropped_stale == 0
+
+
+def test_version_wins_over_timestamp():
+    """With versions on both sides, a newer version is accepted despite an older timestamp."""
+    store = BluestarStateStore()
+    store.reduce("ac1", {"version": 5, "timestamp": 1_700_000_100, "state": {"pow": 0}})
+    assert store.reduce("ac1", {"version": 6, "timestamp": 1_700_000_000, "state": {"pow": 1}})
+    assert store.states["ac1"]["state"] == {"pow": 1}
+
+
+def test_timestamps_are_ordered_across_units():
+    """Without versions, seconds and milliseconds timestamps are compared as ms."""
+    assert timestamp_ms({"timestamp": 1_700_000_000}) == 1_700_000_000_000
+    assert timestamp_ms({"timestamp": 1_700_000_000_500}) == 1_700_000_000_500
+    assert timestamp_ms({"timestamp": True}) is None
+
+    store = BluestarStateStore()
+    store.reduce("ac1", {"timestamp": 1_700_000_000_500, "state": {"pow": 1}})
+    # 1_700_000_000 s is 500 ms older than the stored document
+    assert not store.reduce("ac1", {"timestamp": 1_700_000_000, "state": {"pow": 0}})
+    assert store.reduce("ac1", {"timestamp": 1_700_000_001, "state": {"pow": 0}})
+    assert store.dropped_stale == 1
+
+
+def test_partial_push_merges_over_polled_state():
+    """An MQTT push only updates the fields it carries; a poll replaces everything."""
+    store = BluestarStateStore()
+    store.reduce(
+        "ac1", {"version": 1, "connected": True, "state": {"pow": 1, "mode": 2, "stemp": "24.0"}}
+    )
+    assert store.reduce("ac1", {"version": 2, "state": {"stemp": "22.0"}}, partial=True)
+    assert store.states["ac1"] == {
+        "version": 2,
+        "connected": True,
+        "state": {"pow": 1, "mode": 2, "stemp": "22.0"},
+    }
+
+    assert store.reduce("ac1", {"version": 3, "state": {"pow": 0}})
+    assert store.states["ac1"] == {"version": 3, "state": {"pow": 0}}
+
+
+def test_partial_push_for_unknown_device_is_stored():
+    """The first document for a device is taken as-is, partial or not."""
+    store = BluestarStateStore()
+    assert store.reduce("ac1", {"state": {"pow": 1}}, partial=True)
+    assert store.states["ac1"] == {"state": {"pow": 1}}
@@ -0,0 +1,74 @@
+"""Trace export tests for Bluestar Smart AC integration."""
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.bluestar_ac.const import CONF_TRACE_EXPORT, DOMAIN
+from custom_components.bluestar_ac.tracing import (
+    TRACE_DIR,
+    JsonLinesSpanExporter,
+    OTLPSpanExporter,
+    create_exporter,
+    valid_trace_target,
+)
+
+
+@pytest.mark.parametrize(
+    "target", ["spans.jsonl", "bench/spans.jsonl", "http://collector:4318/v1/traces"]
+)
+def test_valid_trace_targets(target):
+    """Collector URLs and plain relative file names are accepted."""
+    assert valid_trace_target(target)
+
+
+@pytest.mark.parametrize(
+    "target",
+    [
+        "/etc/cron.d/spans",
+        "../secrets.yaml",
+        "traces/../../secrets.yaml",
+        "./spans.jsonl",
+        "traces//spans.jsonl",
+        "C:spans.jsonl",
+        "..\\secrets.yaml",
+    ],
+)
+def test_unsafe_trace_targets_are_rejected(target):
+    """Absolute paths, ``..`` and other ways out of the trace directory fail."""
+    assert not valid_trace_target(target)
+    with pytest.raises(ValueError):
+        create_exporter(target, lambda *parts: "/config/" + "/".join(parts))
+
+
+async def test_trace_files_are_written_below_the_trace_directory(hass, tmp_path):
+    """A file name is resolved inside the trace directory, which is created."""
+    hass.config.config_dir = str(tmp_path)
+    exporter = create_exporter("spans.jsonl", hass.config.path)
+    assert isinstance(exporter, JsonLinesSpanExporter)
+    await exporter.async_shutdown()
+    assert (tmp_path / TRACE_DIR / "spans.jsonl").exists()
+
+    exporter = create_exporter("http://collector:4318/v1/traces", hass.config.path)
+    assert isinstance(exporter, OTLPSpanExporter)
+    await exporter.async_shutdown()
+
+
+async def test_options_flow_rejects_unsafe_trace_export(hass):
+    """The options form is shown again for a path outside the trace directory."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"phone": "9999999999", "password": "secret"})
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_TRACE_EXPORT: "../secrets.yaml"}
+    )
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {CONF_TRACE_EXPORT: "invalid_trace_export"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_TRACE_EXPORT: " spans.jsonl "}
+    )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options[CONF_TRACE_EXPORT] == "spans.jsonl"